@@ -0,0 +1,120 @@
+# bench_media.py
+# Media sends, previous path vs media.py: Attach click + file-chooser round trip
+# with the original file on every send, against the prepared, cached copy set
+# straight on the hidden input (and albums of several files in one send).
+# Runs against the offline mock (mock_server.py); pacing is disabled.
+# Usage: python bench_media.py [sends_per_config] [--prepare-only] [--headed]
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from media import MediaCache, media_list
+
+MEDIA_FILE = "red_rose.png"
+ALBUM_SIZE = 3
+
+
+class ChooserSender:
+    """Mixin with the attach step as it was before media.py"""
+
+    def attach(self, files):
+        self.page.click('div[title="Attach"]')
+        with self.page.expect_file_chooser() as fc_info:
+            self.page.click('input[type="file"]')
+        fc_info.value.set_files(files)
+
+
+class Originals:
+    """Stands in for MediaCache: the original files, untouched, every time"""
+
+    def prepare_all(self, media):
+        return media_list(media)
+
+
+def bench_prepare(path, sends):
+    cache_dir = tempfile.mkdtemp(prefix="wa_media_")
+    try:
+        cache = MediaCache(cache_dir=cache_dir)
+        start = time.perf_counter()
+        prepared = cache.prepare(path)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(sends):
+            cache.prepare(path)
+        warm = (time.perf_counter() - start) / sends
+        fresh = MediaCache(cache_dir=cache_dir)  # new process, same disk cache
+        start = time.perf_counter()
+        fresh.prepare(path)
+        disk = time.perf_counter() - start
+        print(f"{'prepare':<28} cold {cold * 1000:.2f} ms · disk hit {disk * 1000:.2f} ms · "
+              f"per send {warm * 1e6:.1f} µs ({'Pillow' if cache.pillow else 'no Pillow'})")
+        original, upload = os.path.getsize(path), os.path.getsize(prepared)
+        print(f"{'bytes per file':<28} {original / 1024:.0f} KB original -> {upload / 1024:.0f} KB uploaded, "
+              f"{(original - upload) * sends / 2**20:.1f} MB saved over {sends} sends\n")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def bench_browser(path, sends, headless):
+    from mock_server import MockWhatsAppServer
+    from pacing import Pacer
+    from sender import MessageSender
+    from session import WhatsAppSession
+
+    class LegacySender(ChooserSender, MessageSender):
+        pass
+
+    cache_dir = tempfile.mkdtemp(prefix="wa_media_")
+    album_dir = tempfile.mkdtemp(prefix="wa_album_")
+    album = []
+    for i in range(ALBUM_SIZE):
+        album.append(os.path.join(album_dir, f"{i}_{os.path.basename(path)}"))
+        shutil.copyfile(path, album[-1])
+    configs = [
+        ("chooser, original", LegacySender, Originals(), [path]),
+        ("direct, cached", MessageSender, MediaCache(cache_dir=cache_dir), [path]),
+        (f"chooser, {ALBUM_SIZE} files", LegacySender, Originals(), album),
+        (f"direct, album of {ALBUM_SIZE}", MessageSender, MediaCache(cache_dir=cache_dir), album),
+    ]
+
+    server = MockWhatsAppServer().start()
+    profile = tempfile.mkdtemp(prefix="wa_bench_")
+    session = WhatsAppSession(user_data_dir=profile, base_url=server.url, snapshot=False)
+    print(f"{'configuration':<28} {'contacts/s':>10} {'files/s':>8} {'ok':>5} {'attach p50':>11}")
+    try:
+        if not session.start(headless=headless):
+            print("session did not start")
+            return
+        for name, cls, cache, files in configs:
+            server.reset()
+            pacer = Pacer("bench", rate=1e6, burst=1e6, max_rate=1e6, jitter=0)
+            sender = cls(session.page, base_url=server.url, pacer=pacer, media_cache=cache)
+            ok = 0
+            attach = []
+            start = time.perf_counter()
+            for i in range(sends):
+                # The chooser path can attach only one file per send; it sends them one by one
+                batches = [files] if cls is MessageSender else [[f] for f in files]
+                for batch in batches:
+                    ok += sender.send_message(f"88017{i:08d}", f"Media benchmark {i}", batch)
+                    attach.append(sender.attempt.stages.get("attach", 0.0))
+            elapsed = time.perf_counter() - start
+            attach.sort()
+            print(f"{name:<28} {sends / elapsed:10.2f} {sends * len(files) / elapsed:8.2f} {ok:>5} "
+                  f"{attach[len(attach) // 2] * 1000:9.1f}ms")
+    finally:
+        session.close()
+        server.stop()
+        for d in (profile, cache_dir, album_dir):
+            shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    sends = int(args[0]) if args else 30
+    print(f"🧪 {MEDIA_FILE}, {sends} sends per configuration\n")
+    bench_prepare(MEDIA_FILE, sends)
+    if "--prepare-only" not in sys.argv:
+        bench_browser(MEDIA_FILE, sends, headless="--headed" not in sys.argv)
\ No newline at end of file
@@ -0,0 +1,61 @@
+# bench_navigation.py
+# Per-chat latency and browser CPU of goto vs in-app navigation.
+# Only opens chats (nothing is sent). Needs a logged-in profile.
+# Usage: python bench_navigation.py contacts.csv [chats_per_mode]
+import statistics
+import sys
+import time
+
+from sender import MessageSender, NAV_GOTO, NAV_IN_APP
+from session import WhatsAppSession
+from utils import iter_contacts
+
+
+def browser_cpu_seconds(cdp):
+    """Main-thread task time of the page's renderer, from CDP Performance metrics"""
+    metrics = {m["name"]: m["value"] for m in cdp.send("Performance.getMetrics")["metrics"]}
+    return metrics.get("TaskDuration", 0.0)
+
+
+def bench_mode(session, mode, phones):
+    sender = MessageSender(session.page, navigation=mode)
+    cdp = session.page.context.new_cdp_session(session.page)
+    cdp.send("Performance.enable")
+
+    latencies = []
+    cpu_before = browser_cpu_seconds(cdp)
+    for phone in phones:
+        start = time.perf_counter()
+        try:
+            sender.open_chat(phone)
+        except Exception as e:
+            print(f"  ⚠️ {phone}: {e}")
+            continue
+        latencies.append(time.perf_counter() - start)
+    cpu = browser_cpu_seconds(cdp) - cpu_before
+    cdp.detach()
+    return latencies, cpu
+
+
+if __name__ == "__main__":
+    contact_file = sys.argv[1] if len(sys.argv) > 1 else "data.csv"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    phones = [c["phone"] for _, c in zip(range(count), iter_contacts(contact_file))]
+
+    session = WhatsAppSession()
+    if not session.start(headless=False):
+        sys.exit("Not logged in.")
+    try:
+        for mode in (NAV_GOTO, NAV_IN_APP):
+            latencies, cpu = bench_mode(session, mode, phones)
+            if not latencies:
+                print(f"{mode:<8} no chats opened")
+                continue
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{mode:<8} {len(latencies)} chats  "
+                  f"median {statistics.median(latencies) * 1000:7.0f} ms  "
+                  f"p95 {p95 * 1000:7.0f} ms  "
+                  f"renderer CPU {cpu / len(latencies) * 1000:6.0f} ms/chat")
+    finally:
+        session.close()
\ No newline at end of file
@@ -0,0 +1,83 @@
+# bench_phones.py
+# Rows/second of the per-row formatter vs the vectorized normalizer (best of REPEATS runs).
+# Usage: python bench_phones.py [rows]
+import contextlib
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+from phones import normalize_phones
+from utils import CHUNK_SIZE, format_phone_number
+
+REPEATS = 3  # best of, for every method
+
+
+def make_numbers(rows, dirty_ratio=0.15, seed=42):
+    rng = random.Random(seed)
+    shapes = [
+        lambda n: f"01{n}",
+        lambda n: f"1{n}",
+        lambda n: f"+8801{n}",
+        lambda n: f"880 1{n[:4]}-{n[4:]}",
+    ]
+    numbers = []
+    for _ in range(rows):
+        n = f"{rng.randint(3, 9)}{rng.randint(0, 99999999):08d}"
+        if rng.random() < dirty_ratio:
+            numbers.append(rng.choice(["", "n/a", "12345", f"+44{n}", f"0{n[:5]}"]))
+        else:
+            numbers.append(rng.choice(shapes)(n))
+    return numbers
+
+
+def bench_per_row(numbers):
+    valid = 0
+    for phone in numbers:
+        try:
+            format_phone_number(phone)
+            valid += 1
+        except Exception:
+            pass
+    return valid
+
+
+def bench_per_row_logged(numbers):
+    """What load_contacts used to do: raise and print once per bad row"""
+    valid = 0
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        for phone in numbers:
+            try:
+                format_phone_number(phone)
+                valid += 1
+            except Exception as e:
+                print(f"❌ Skipping invalid number {phone}: {e}")
+    return valid
+
+
+def bench_vectorized(numbers):
+    """Chunked the same way iter_contacts feeds it"""
+    series = pd.Series(numbers)
+    valid = 0
+    for start in range(0, len(series), CHUNK_SIZE):
+        valid += int(normalize_phones(series.iloc[start:start + CHUNK_SIZE])["valid"].sum())
+    return valid
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    numbers = make_numbers(rows)
+    print(f"📊 {rows:,} numbers, ~15% dirty")
+
+    bench_vectorized(numbers[:CHUNK_SIZE])  # pandas/numpy warm-up, not part of any measurement
+    for label, fn in (("per-row format_phone_number", bench_per_row),
+                      ("per-row + print (old loader)", bench_per_row_logged),
+                      ("vectorized normalize_phones", bench_vectorized)):
+        elapsed = float("inf")
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            valid = fn(numbers)
+            elapsed = min(elapsed, time.perf_counter() - start)
+        print(f"  {label:<30} {rows / elapsed:>12,.0f} rows/s  ({valid:,} valid, {elapsed:.2f}s)")
\ No newline at end of file
@@ -0,0 +1,90 @@
+# bench_throughput.py
+# End-to-end throughput of WhatsAppSession + MessageSender against the offline
+# mock (mock_server.py): startup time, messages/s, memory and CPU per configuration.
+# Pacing is disabled so the numbers show the browser/sender cost alone.
+# Memory and CPU cover the session's driver and browser processes.
+# Usage: python bench_throughput.py [messages_per_config] [--headed]
+import shutil
+import sys
+import tempfile
+import time
+
+from mock_server import DEFAULTS, MockWhatsAppServer
+from pacing import Pacer
+from sender import MessageSender, NAV_GOTO, NAV_IN_APP
+from session import WhatsAppSession
+
+MEDIA_FILE = "red_rose.png"
+
+CONFIGS = [
+    {"name": "in-app, text", "navigation": NAV_IN_APP},
+    {"name": "in-app, text, lean", "navigation": NAV_IN_APP, "lean": True},
+    {"name": "goto, text", "navigation": NAV_GOTO},
+    {"name": "in-app, media", "navigation": NAV_IN_APP, "media": True},
+    {"name": "in-app, media, lean", "navigation": NAV_IN_APP, "media": True, "lean": True},
+    {"name": "in-app, slow network", "navigation": NAV_IN_APP, "mock": {"latency_ms": 800, "jitter_ms": 400}},
+    {"name": "in-app, 10% invalid", "navigation": NAV_IN_APP, "mock": {"invalid_rate": 0.1}},
+    {"name": "goto, 10% invalid", "navigation": NAV_GOTO, "mock": {"invalid_rate": 0.1}},
+]
+
+
+def unpaced():
+    return Pacer("bench", rate=1e6, burst=1e6, max_rate=1e6, jitter=0)
+
+
+def run_config(server, cfg, messages, headless):
+    server.configure(**{**DEFAULTS, **cfg.get("mock", {})})
+    server.reset()
+    profile = tempfile.mkdtemp(prefix="wa_bench_")
+    session = WhatsAppSession(user_data_dir=profile, base_url=server.url, lean=cfg.get("lean", False),
+                              snapshot=False)
+    try:
+        start = time.perf_counter()
+        if not session.start(headless=headless):
+            return None
+        startup = time.perf_counter() - start
+
+        sender = MessageSender(session.page, navigation=cfg["navigation"], base_url=server.url, pacer=unpaced())
+        media = MEDIA_FILE if cfg.get("media") else None
+        before = session.usage()
+        start = time.perf_counter()
+        ok = 0
+        for i in range(messages):
+            ok += sender.send_message(f"88017{i:08d}", f"Benchmark message {i}", media)
+        elapsed = time.perf_counter() - start
+        after = session.usage()
+        time.sleep(0.2)  # let the last /api/sent land
+        return {
+            "startup": startup,
+            "rate": messages / elapsed,
+            "ok": ok,
+            "server": server.stats(),
+            "rss": after["rss"] if after else None,
+            "cpu": (after["cpu"] - before["cpu"]) / messages if after and before else None,
+        }
+    finally:
+        session.close()
+        shutil.rmtree(profile, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    messages = int(args[0]) if args else 50
+    headless = "--headed" not in sys.argv
+
+    server = MockWhatsAppServer().start()
+    print(f"🧪 Mock on {server.url}, {messages} messages per configuration\n")
+    print(f"{'configuration':<24} {'startup':>8} {'msg/s':>7} {'ok':>5} {'delivered':>9} "
+          f"{'browser RSS':>16} {'CPU/msg':>8}")
+    try:
+        for cfg in CONFIGS:
+            result = run_config(server, cfg, messages, headless)
+            if result is None:
+                print(f"{cfg['name']:<24} session did not start")
+                continue
+            rss = f"{result['rss'] / 2**20:.0f} MB" if result["rss"] is not None else "n/a"
+            cpu = f"{result['cpu'] * 1000:.0f} ms" if result["cpu"] is not None else "n/a"
+            print(f"{cfg['name']:<24} {result['startup']:7.2f}s {result['rate']:7.2f} {result['ok']:>5} "
+                  f"{result['server']['sent']:>9} {rss:>16} {cpu:>8}")
+    finally:
+        server.stop()
\ No newline at end of file
@@ -0,0 +1,159 @@
+# campaign.py
+import logging
+
+from journal import SendJournal, campaign_id_for, STATUS_SENT, STATUS_FAILED
+
+logger = logging.getLogger("campaign")
+
+def send_contacts(sender, contacts, media_path=None, total=0, journal=None, already_sent=0, retries=None,
+                  reconnect=None, stop=None):
+    """Core send loop shared by the entry points; yields (sent, total, failed).
+
+    Contacts arrive with contact["message"] already rendered (Template.render_stream).
+    Failures are sorted by retry.classify: transient ones come back later from
+    `retries` (a retry.RetryQueue) between fresh contacts, permanent ones are
+    final, and session-level ones call `reconnect()` first (the new page, or
+    None to stop). Each contact is journaled once, with its final outcome, and
+    the delivery ticks the page reports meanwhile update the journaled rows.
+    Setting `stop` (a threading.Event) ends the run after the current send;
+    the contacts not journaled yet stay pending for a resume.
+    """
+    from retry import RetryQueue, classify, PERMANENT, SESSION
+    from sender import SendStopped
+    import config
+
+    retries = RetryQueue() if retries is None else retries
+    success_count = already_sent
+    processed = already_sent
+    failed = []
+    reconnects = 0
+
+    for contact, attempt in retries.interleave(contacts, stop):
+        name = contact['name']
+        phone = contact['phone']
+        msg = contact['message']
+
+        try:
+            ok = sender.send_message(phone, msg, media_path)
+        except SendStopped:
+            break  # nothing was sent; the contact stays pending
+        if ok:
+            success_count += 1
+            status, error = STATUS_SENT, None
+        else:
+            status, error = STATUS_FAILED, sender.last_status
+            kind = classify(sender.last_status, sender.last_error)
+            if kind == SESSION:
+                page = None
+                if reconnect is not None and reconnects < config.MAX_RECONNECTS:
+                    reconnects += 1
+                    page = reconnect()
+                if page is None:
+                    # No session to send with: give up on what is waiting, leave the rest for a resume
+                    lost = [contact] + [c for c, _ in retries.drain()]
+                    failed.extend(lost)
+                    if journal is not None:
+                        for c in lost:
+                            journal.record(c['phone'], c['name'], STATUS_FAILED, error)
+                    processed += len(lost)
+                    logger.error("❌ Session lost and not restored; campaign stopped after %d contacts.", processed)
+                    yield success_count, processed, failed
+                    return
+                _record_deliveries(sender, journal)  # the old page's tracker goes with it
+                sender.page = page
+            if kind != PERMANENT and retries.schedule(contact, attempt):
+                logger.info("🔁 %s failed (%s), retry %d of %d later", phone, error, attempt,
+                            retries.max_retries)
+                continue
+            failed.append(contact)
+        if journal is not None:
+            journal.record(phone, name, status, error)
+        _record_deliveries(sender, journal)
+
+        processed += 1
+        yield success_count, max(total, processed), failed
+
+    if journal is not None and not (stop is not None and stop.is_set()):
+        sender.settle()
+        _record_deliveries(sender, journal)
+    if processed < total:  # invalid/duplicate rows were skipped, close the bar
+        yield success_count, processed, failed
+
+def _record_deliveries(sender, journal):
+    if journal is not None:
+        for phone, state in sender.delivery_updates().items():
+            journal.record_delivery(phone, state)
+
+def log_deliveries(journal):
+    """Final delivery states of the campaign's sent messages, for the run report"""
+    counts = journal.delivery_counts()
+    if counts:
+        logger.info("📬 Delivery: %s", ", ".join(f"{n} {state}" for state, n in sorted(counts.items())))
+    return counts
+
+def check_campaign(contact_file, message, media_path=None):
+    """Validate a campaign before any browser starts; returns (total, template, media).
+
+    Raises FileNotFoundError for a missing source, ValueError for a template
+    the sources can't fill and media.MediaError for a bad attachment.
+    """
+    from contact_store import count_sources
+    from template_registry import Template
+    from media import prepare_media
+
+    total = count_sources(contact_file)
+    template = Template(message)
+    template.check_sources(contact_file)  # every source has the placeholders' columns
+    media = prepare_media(media_path) or None  # once per campaign; also warms the cache
+    return total, template, media
+
+
+def run_campaign(session, contact_file, message, media_path=None, campaign_id=None, resume=False, pacer=None,
+                 stop=None):
+    """Run one campaign on an already logged-in session; yields (sent, total, failed).
+
+    The session is left open, so a caller holding a warm browser (see
+    daemon.py) can run the next campaign straight away. A
+    transport.SimulatedSession works too; `pacer` replaces the account's pacer.
+    Setting `stop` (a threading.Event) ends it early, as in send_contacts.
+    """
+    from utils import export_failed_contacts
+    from contact_store import ContactStore
+    from sender import MessageSender
+    from pacing import get_pacer
+    from negative_cache import NegativeCache
+    from metrics import get_metrics
+    import config
+
+    total, template, media = check_campaign(contact_file, message, media_path)
+    if not total:
+        yield 0, 0, []
+        return
+
+    journal = SendJournal(campaign_id or campaign_id_for(contact_file, message, media_path))
+    metrics = get_metrics()
+    metrics.begin(journal.campaign_id)
+    negative_cache = NegativeCache()
+    store = ContactStore()
+    try:
+        # One pass over every source: dedup, opt-outs and the frequency cap
+        contacts = store.stream(contact_file, journal.campaign_id)
+        if resume:
+            contacts = journal.pending(contacts)
+        contacts = template.render_stream(contacts)
+
+        sender = MessageSender(session.page, base_url=session.base_url,
+                               pacer=pacer or get_pacer(session.user_data_dir), negative_cache=negative_cache,
+                               stop=stop)
+        yield from send_contacts(sender, contacts, media, total, journal, journal.resumed,
+                                 reconnect=lambda: session.page if session.reconnect() else None, stop=stop)
+
+        log_deliveries(journal)
+        if journal.counts().get(STATUS_FAILED):
+            export_failed_contacts(journal=journal)
+    finally:
+        journal.close()
+        negative_cache.close()
+        store.close()
+        if config.METRICS_FILE:
+            metrics.write_file()
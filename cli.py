@@ -0,0 +1,204 @@
+# cli.py
+# Headless entry point for cron/scheduled runs; no Qt, and pandas/Playwright
+# are only imported once a campaign actually sends from this process.
+#
+#   python -m cli send --contacts data.csv --template welcome
+#   python -m cli send --contacts data.csv --message "Hi {name}" --media offer.png --workers 2
+#   python -m cli send --contacts data.csv --template welcome --media a.jpg b.jpg c.jpg
+#   python -m cli templates
+#
+# No browser: --simulate sends through transport.SimulatedTransport, and
+# --profile writes cProfile/tracemalloc reports of the whole run:
+#   python -m cli --profile send --contacts big.csv --message "Hi {name}" --simulate --sim-latency-ms 0
+import argparse
+import os
+import sys
+import time
+
+PROGRESS_INTERVAL = 2.0  # seconds between progress lines
+PROFILE_TOP = 40         # rows per report section
+
+
+def _message(args):
+    if args.message is not None:
+        return args.message
+    from template_registry import get_registry
+    try:
+        return get_registry().get(args.template).text
+    except KeyError:
+        raise SystemExit(f"❌ Unknown template {args.template!r}")
+
+
+def _simulated(args, message):
+    """Campaign on a SimulatedSession; journal, contact store, negative cache,
+    metrics and logs go to state/simulation so real campaigns never see them.
+    That state is kept between runs (resume and --no-resume work as usual)
+    unless --sim-reset clears it first."""
+    import shutil
+    import config
+    from campaign import run_campaign
+    from logsetup import setup_logging
+    from pacing import Pacer
+    from transport import SimulatedSession
+
+    sim_dir = os.path.join(config.STATE_DIR, "simulation")
+    if args.sim_reset:
+        shutil.rmtree(sim_dir, ignore_errors=True)
+    os.makedirs(sim_dir, exist_ok=True)
+    config.JOURNAL_DB = os.path.join(sim_dir, "journal.sqlite3")
+    config.CONTACT_STORE_DB = os.path.join(sim_dir, "contacts.sqlite3")
+    config.NEGATIVE_CACHE_DB = os.path.join(sim_dir, "negative_cache.sqlite3")
+    config.METRICS_FILE = os.path.join(sim_dir, "metrics.prom")
+    config.LOG_FILE = os.path.join(sim_dir, "send_log.log")
+    config.EVENTS_FILE = os.path.join(sim_dir, "send_events.jsonl")
+    config.FAILED_DIR = sim_dir
+    config.RETRY_BASE_DELAY = args.sim_retry_delay
+    config.RETRY_MAX_DELAY = args.sim_retry_delay * 16
+    setup_logging()
+
+    session = SimulatedSession(latency_ms=args.sim_latency_ms, jitter_ms=args.sim_latency_ms / 2,
+                               distribution=args.sim_distribution, invalid_rate=args.sim_invalid_rate,
+                               stall_rate=args.sim_stall_rate, error_rate=args.sim_error_rate, seed=args.sim_seed,
+                               undelivered_rate=args.sim_undelivered_rate,
+                               attach_ms=args.sim_latency_ms / 3, send_ms=args.sim_latency_ms / 8)
+    # Pacing would hold a simulated million-message run to real send rates
+    pacer = None if args.paced else Pacer("simulated", rate=1e9, burst=1e9, max_rate=1e9, jitter=0)
+    try:
+        yield from run_campaign(session, args.contacts, message, args.media, args.campaign_id,
+                                resume=not args.no_resume, pacer=pacer)
+    finally:
+        print(f"🧪 Simulated client: {session.page.counts} (state in {sim_dir})")
+
+
+def cmd_send(args):
+    from media import MediaError
+
+    message = _message(args)
+    sent = total = 0
+    failed = []
+    last_print = 0.0
+    if args.simulate:
+        progress = _simulated(args, message)
+    else:
+        from main import run_sender_yielding
+        progress = run_sender_yielding(args.contacts, message, args.media, args.workers,
+                                       campaign_id=args.campaign_id, resume=not args.no_resume,
+                                       use_daemon=not args.no_daemon)
+    try:
+        for sent, total, failed in progress:
+            now = time.monotonic()
+            if not args.quiet and now - last_print >= PROGRESS_INTERVAL:
+                print(f"📊 {sent}/{total} sent, {len(failed)} failed", flush=True)
+                last_print = now
+    except (ValueError, FileNotFoundError, MediaError) as e:  # bad template, source or media: no browser started
+        print(f"❌ {e}")
+        return 2
+    except RuntimeError as e:  # the browser session did not come up
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ Done: {sent}/{total} sent, {len(failed)} failed")
+    return 1 if failed else 0
+
+
+def cmd_templates(args):
+    from template_registry import get_registry
+    for name in get_registry().names():
+        print(name)
+    return 0
+
+
+def profiled(func, args, out_dir):
+    """Run func(args) under cProfile and tracemalloc, then write the reports to out_dir:
+    <stamp>.pstats (for snakeviz/pstats), <stamp>-functions.txt and <stamp>-allocations.txt.
+
+    Only this process is measured; pool workers (--workers > 1) are not.
+    """
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    base = os.path.join(out_dir, stamp)
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        return func(args)
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        tracemalloc.stop()
+
+        profiler.dump_stats(f"{base}.pstats")
+        with open(f"{base}-functions.txt", "w", encoding="utf-8") as f:
+            f.write(f"wall time {elapsed:.2f} s\n\n")
+            stats = pstats.Stats(profiler, stream=f).strip_dirs()
+            stats.sort_stats("tottime").print_stats(PROFILE_TOP)
+            stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+        top = snapshot.statistics("lineno")
+        with open(f"{base}-allocations.txt", "w", encoding="utf-8") as f:
+            f.write(f"traced memory: current {current / 2**20:.1f} MB, peak {peak / 2**20:.1f} MB\n\n")
+            for stat in top[:PROFILE_TOP]:
+                f.write(f"{stat}\n")
+
+        print(f"\n⏱️ {elapsed:.2f} s, peak traced memory {peak / 2**20:.1f} MB")
+        print("🔥 Most time spent in:")
+        by_self = sorted(pstats.Stats(profiler).stats.items(), key=lambda item: item[1][2], reverse=True)
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in by_self[:10]:
+            print(f"   {tottime:8.3f} s {calls:>9} calls  {name} ({os.path.basename(filename)}:{line})")
+        print(f"📄 Reports: {base}.pstats, {base}-functions.txt, {base}-allocations.txt")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cli", description="WhatsApp bulk sender (no GUI)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="DIR",
+                        help="profile the run (cProfile + tracemalloc); reports go to DIR "
+                             "(default: state/profiling)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    send = sub.add_parser("send", help="send a campaign and wait for it to finish")
+    send.add_argument("--contacts", required=True, nargs="+",
+                      help="CSV, TXT or XLSX files; merged, deduplicated and checked against opt-outs "
+                           "(and against config.FREQUENCY_CAP, off by default)")
+    group = send.add_mutually_exclusive_group(required=True)
+    group.add_argument("--template", help="name of a file in templates/ (without .txt)")
+    group.add_argument("--message", help="message text; any contact column works as {placeholder}")
+    send.add_argument("--media", nargs="+", help="image/PDF to attach; several files go out as one album")
+    send.add_argument("--workers", type=int, default=1, help="parallel browser profiles")
+    send.add_argument("--campaign-id", help="journal id (default: derived from file + message)")
+    send.add_argument("--no-resume", action="store_true", help="resend contacts already sent")
+    send.add_argument("--no-daemon", action="store_true", help="do not hand off to a running session daemon")
+    send.add_argument("--quiet", action="store_true", help="only print the final summary")
+    sim = send.add_argument_group("simulation (no browser, state kept apart in state/simulation)")
+    sim.add_argument("--simulate", action="store_true", help="send through transport.SimulatedTransport")
+    sim.add_argument("--sim-latency-ms", type=float, default=150, help="chat open latency; 0 = no sleeping")
+    sim.add_argument("--sim-distribution", default="uniform", choices=("uniform", "lognormal", "fixed"))
+    sim.add_argument("--sim-invalid-rate", type=float, default=0.0)
+    sim.add_argument("--sim-stall-rate", type=float, default=0.0, help="share of chats that time out")
+    sim.add_argument("--sim-error-rate", type=float, default=0.0)
+    sim.add_argument("--sim-undelivered-rate", type=float, default=0.0, help="sent messages that stay at one tick")
+    sim.add_argument("--sim-seed", type=int)
+    sim.add_argument("--sim-retry-delay", type=float, default=0.5, help="first retry backoff, seconds")
+    sim.add_argument("--sim-reset", action="store_true", help="clear state/simulation before the run")
+    sim.add_argument("--paced", action="store_true", help="keep the account's real pacing")
+    send.set_defaults(func=cmd_send)
+
+    templates = sub.add_parser("templates", help="list message templates")
+    templates.set_defaults(func=cmd_templates)
+
+    args = parser.parse_args(argv)
+    if args.profile is not None:
+        import config
+        return profiled(args.func, args, args.profile or os.path.join(config.STATE_DIR, "profiling"))
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,6 +1,5 @@
 # config.py
 import os
-from datetime import datetime
 
 CHROME_USER_DATA_DIR = os.path.expanduser("~/whatsapp_profile")
 WHATSAPP_URL = "https://web.whatsapp.com"
@@ -8,16 +7,101 @@ MIN_DELAY = 5
 MAX_DELAY = 15
 MAX_RETRIES = 3
 
+# Retries (retry.py): transient failures come back after RETRY_BASE_DELAY,
+# doubling per attempt up to RETRY_MAX_DELAY; session-level ones relaunch the browser
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 600
+MAX_RECONNECTS = 3         # browser relaunches per campaign (per worker in the pool)
+
+# Pacing (pacing.Pacer): starts at one message per avg(MIN_DELAY, MAX_DELAY)
+PACING_BURST = 2           # messages allowed back to back after idling
+PACING_MAX_RATE = 0.5      # msg/s ceiling per account
+PACING_INCREASE = 0.002    # msg/s added per successful send
+PACING_JITTER = 0.3        # extra random delay, as a fraction of one interval
+
+# Chat navigation (sender.MessageSender): "goto" reloads WhatsApp Web for every
+# contact; "in_app" lets the loaded app route to the chat (goto as fallback).
+# Stays opt-in until bench_navigation.py has measured it on a real profile.
+NAVIGATION = "goto"
+
+# GUI: progress and log lines are pushed to the window at this rate
+UI_REFRESH_MS = 100
+
+# Lean sessions: headless after the first QR login, no images/media/fonts,
+# small viewport and memory-saving Chromium flags (session.LEAN_ARGS)
+LEAN_MODE = True
+LEAN_VIEWPORT = {"width": 960, "height": 640}
+LEAN_BLOCKED_RESOURCES = ("image", "media", "font")
+
+# Browser profiles (profiles.py): login snapshots restore a missing profile
+# without a QR scan; caches are pruned before launch once they pass PROFILE_PRUNE_MB
+PROFILE_SNAPSHOTS_DIR = os.path.expanduser("~/whatsapp_snapshots")
+PROFILE_AUTO_SNAPSHOT = True   # snapshot a profile after its first login
+PROFILE_PRUNE_MB = 200         # 0 = never prune automatically
+
 # Directories
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 FAILED_DIR = os.path.join(BASE_DIR, "failed_contacts")
+STATE_DIR = os.path.join(BASE_DIR, "state")
+
+_dirs_ready = False
+
+
+def init_dirs():
+    """Create the working directories; called by whatever writes into them, not on import"""
+    global _dirs_ready
+    if not _dirs_ready:
+        for path in (LOGS_DIR, TEMPLATES_DIR, FAILED_DIR, STATE_DIR):
+            os.makedirs(path, exist_ok=True)
+        _dirs_ready = True
+
+# Attachments (media.py): prepared once per file content and cached
+MEDIA_CACHE_DIR = os.path.join(STATE_DIR, "media")
+MEDIA_MAX_SIDE = 1600          # px; larger images are scaled down (needs Pillow)
+MEDIA_JPEG_QUALITY = 80
+MEDIA_MAX_BYTES = 16 * 1024 * 1024            # photos and videos
+MEDIA_MAX_DOCUMENT_BYTES = 100 * 1024 * 1024
+MEDIA_MAX_FILES = 30           # files in one album
+
+# Contact store (contact_store.py): merged sources, opt-outs, cross-campaign frequency cap
+CONTACT_STORE_DB = os.path.join(STATE_DIR, "contacts.sqlite3")
+FREQUENCY_CAP = 0              # campaigns that may reach a number within FREQUENCY_CAP_DAYS (0 = no cap)
+FREQUENCY_CAP_DAYS = 1
+
+# Delivery tracking (delivery.py): tick states reported by the page through a binding
+DELIVERY_TRACKING = True
+DELIVERY_CONFIRM_TIMEOUT_MS = 10000  # wait for a sent bubble to leave the outbox
+DELIVERY_SETTLE_SECONDS = 10         # after the last send, for bubbles still in the outbox
+
+# Send journal (resumable campaigns)
+JOURNAL_DB = os.path.join(STATE_DIR, "journal.sqlite3")
+
+# Numbers that are not on WhatsApp are skipped for this long
+NEGATIVE_CACHE_DB = os.path.join(STATE_DIR, "negative_cache.sqlite3")
+NEGATIVE_CACHE_TTL_DAYS = 30
+
+# Scheduled jobs (scheduler.Scheduler)
+SCHEDULER_DB = os.path.join(STATE_DIR, "scheduler.sqlite3")
+SCHEDULER_WORKERS = 1          # campaigns on one browser profile cannot overlap
+SCHEDULER_MISFIRE_GRACE = 60   # seconds late before a run counts as missed
+
+# Session daemon (local socket, authenticated with a per-install key file)
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 6010
+DAEMON_KEY_FILE = os.path.join(STATE_DIR, "daemon.key")
 
-# Create directories
-os.makedirs(LOGS_DIR, exist_ok=True)
-os.makedirs(TEMPLATES_DIR, exist_ok=True)
-os.makedirs(FAILED_DIR, exist_ok=True)
+# Logging (logsetup.setup_logging): written by a background listener thread
+LOG_FILE = os.path.join(LOGS_DIR, "send_log.log")
+EVENTS_FILE = os.path.join(LOGS_DIR, "send_events.jsonl")  # one JSON record per send attempt
+LOG_LEVEL = "INFO"         # DEBUG shows every step of every send
+SEND_EVENTS = "all"        # "all", "failures" or "off"
+LOG_ROTATE = "midnight"    # "size" or a TimedRotatingFileHandler interval
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 7
 
-# Log file
-LOG_FILE = os.path.join(LOGS_DIR, f"send_log_{datetime.now().strftime('%Y-%m-%d')}.log")
\ No newline at end of file
+# Send metrics (metrics.py): per-stage latency, throughput, error rates
+METRICS_PORT = None        # e.g. 9464 to serve Prometheus text on 127.0.0.1:9464/metrics
+METRICS_FILE = os.path.join(STATE_DIR, "metrics.prom")  # None to disable
+METRICS_FILE_INTERVAL = 10  # seconds between rewrites of METRICS_FILE
\ No newline at end of file
@@ -0,0 +1,236 @@
+# contact_store.py
+# Local contact index: several CSV/TXT/XLSX sources merged into one stream,
+# deduplicated on the normalized number, checked against opt-outs and a
+# cross-campaign frequency cap, before anything reaches MessageSender.
+#
+#   python -m contact_store suppress 8801712345678 01812345678 --reason opt_out
+#   python -m contact_store suppress --file optouts.txt
+#   python -m contact_store check a.csv b.xlsx
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import time
+
+import config
+
+logger = logging.getLogger("contacts")
+
+SOURCE_SEPARATOR = ";"  # "a.csv; b.xlsx" in a text field = two sources
+
+# Why a contact was left out of the stream
+SKIP_DUPLICATE = "duplicate"
+SKIP_SUPPRESSED = "suppressed"
+SKIP_CAPPED = "frequency_cap"
+
+SUPPRESS_OPT_OUT = "opt_out"
+
+
+def contact_sources(contact_file):
+    """"a.csv", "a.csv; b.xlsx" or ["a.csv", "b.xlsx"] -> list of paths"""
+    if not contact_file:
+        return []
+    if isinstance(contact_file, str):
+        contact_file = contact_file.split(SOURCE_SEPARATOR)
+    return [p.strip() for p in contact_file if p and p.strip()]
+
+
+def count_sources(contact_file):
+    """Row count over all sources for the progress bar (duplicates included)"""
+    from utils import count_contacts
+    return sum(count_contacts(path) for path in contact_sources(contact_file))
+
+
+def normalize(phones):
+    """Normalized numbers of `phones`; invalid ones are dropped"""
+    from phones import normalize_phones
+    result = normalize_phones(list(phones))
+    return result.loc[result["valid"], "phone"].tolist()
+
+
+class ContactStore:
+    """SQLite index of every contact seen (phone-keyed) plus the suppression list.
+
+    Send history comes from the journal (config.JOURNAL_DB), so the frequency
+    cap covers every campaign without a second write per send. The hot path
+    works on in-memory sets/dicts loaded once per stream.
+    """
+
+    def __init__(self, path=None, journal_path=None, batch_size=5000):
+        self.path = path or config.CONTACT_STORE_DB
+        self.journal_path = journal_path or config.JOURNAL_DB
+        self.batch_size = batch_size
+        self.stats = {}
+        self.batch = []  # contacts rows not yet upserted
+        config.init_dirs()
+        self.conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # the index is rebuilt by the next campaign anyway
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS contacts (
+                phone   TEXT PRIMARY KEY,
+                name    TEXT,
+                fields  TEXT,
+                source  TEXT,
+                updated REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS suppressions (
+                phone  TEXT PRIMARY KEY,
+                reason TEXT,
+                added  REAL NOT NULL
+            );
+        """)
+
+    # --- Suppression list ---
+    def suppress(self, phones, reason=SUPPRESS_OPT_OUT):
+        """Never send to these numbers again (until unsuppress); returns how many were added"""
+        now = time.time()
+        with self.conn:
+            return self.conn.executemany(
+                "INSERT OR REPLACE INTO suppressions (phone, reason, added) VALUES (?, ?, ?)",
+                [(phone, reason, now) for phone in normalize(phones)],
+            ).rowcount
+
+    def unsuppress(self, phones):
+        with self.conn:
+            return self.conn.executemany("DELETE FROM suppressions WHERE phone = ?",
+                                         [(phone,) for phone in normalize(phones)]).rowcount
+
+    def suppressed(self):
+        return {phone for (phone,) in self.conn.execute("SELECT phone FROM suppressions")}
+
+    # --- Cross-campaign history ---
+    def recent_sends(self, days, exclude_campaign=None):
+        """{phone: campaigns that reached it in the last `days`}, read from the journal"""
+        if not os.path.exists(self.journal_path):
+            return {}
+        conn = sqlite3.connect(f"file:{self.journal_path}?mode=ro", uri=True, timeout=10)
+        try:
+            rows = conn.execute("""
+                SELECT phone, COUNT(*) FROM sends
+                WHERE status = 'sent' AND updated > ? AND campaign != ?
+                GROUP BY phone
+            """, (time.time() - days * 86400, exclude_campaign or ""))
+            return dict(rows.fetchall())
+        except sqlite3.OperationalError:
+            return {}  # no journal table yet
+        finally:
+            conn.close()
+
+    # --- Streaming pass ---
+    def stream(self, contact_file, campaign_id=None, cap=None, cap_days=None, skip_known_bad=True):
+        """Yield each deliverable contact once, in source order.
+
+        Sources are read chunk by chunk (utils.iter_contacts, which also
+        normalizes numbers and drops the negative cache). The first row for a
+        number wins; later rows, suppressed numbers and numbers that other
+        campaigns already reached `cap` times within `cap_days` are skipped
+        and counted in self.stats. Every yielded contact is upserted into
+        the contacts table in batches.
+        """
+        from utils import iter_contacts
+
+        cap = config.FREQUENCY_CAP if cap is None else cap
+        cap_days = cap_days or config.FREQUENCY_CAP_DAYS
+        sources = contact_sources(contact_file)
+        for path in sources:  # a bad path fails before anything is sent
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Contact file not found: {path}")
+
+        suppressed = self.suppressed()
+        history = self.recent_sends(cap_days, campaign_id) if cap else {}
+        seen = set()
+        stats = self.stats = {"read": 0, "passed": 0, SKIP_DUPLICATE: 0, SKIP_SUPPRESSED: 0, SKIP_CAPPED: 0}
+        try:
+            for path in sources:
+                source = os.path.basename(path)
+                for contact in iter_contacts(path, skip_known_bad=skip_known_bad):
+                    stats["read"] += 1
+                    phone = contact["phone"]
+                    if phone in seen:
+                        stats[SKIP_DUPLICATE] += 1
+                        continue
+                    seen.add(phone)
+                    if phone in suppressed:
+                        stats[SKIP_SUPPRESSED] += 1
+                        continue
+                    if cap and history.get(phone, 0) >= cap:
+                        stats[SKIP_CAPPED] += 1
+                        continue
+                    stats["passed"] += 1
+                    self.batch.append(contact_row(contact, source))
+                    if len(self.batch) >= self.batch_size:
+                        self.flush()
+                    yield contact
+        finally:
+            if self.conn is not None:  # a stream abandoned mid-way is flushed by close()
+                self.flush()
+            skipped = {k: stats[k] for k in (SKIP_DUPLICATE, SKIP_SUPPRESSED, SKIP_CAPPED) if stats[k]}
+            if skipped:
+                logger.info("🧹 %d of %d contacts skipped: %s", sum(skipped.values()), stats["read"], skipped)
+
+    def flush(self):
+        rows, self.batch = self.batch, []
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO contacts (phone, name, fields, source, updated) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (phone) DO UPDATE SET
+                    name = excluded.name, fields = excluded.fields,
+                    source = excluded.source, updated = excluded.updated
+            """, rows)
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+        self.conn = None
+
+
+def contact_row(contact, source):
+    extra = {k: v for k, v in contact.items() if k not in ("name", "phone", "message")}
+    return (contact["phone"], str(contact.get("name", "")), json.dumps(extra, default=str) if extra else None,
+            source, time.time())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Contact store: opt-outs and source checks")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    for cmd in ("suppress", "unsuppress"):
+        p = sub.add_parser(cmd, help=f"{cmd} numbers")
+        p.add_argument("phones", nargs="*")
+        p.add_argument("--file", help="CSV/TXT/XLSX whose numbers to use")
+        if cmd == "suppress":
+            p.add_argument("--reason", default=SUPPRESS_OPT_OUT)
+
+    check = sub.add_parser("check", help="run the sources through dedup/suppression/cap without sending")
+    check.add_argument("sources", nargs="+")
+    check.add_argument("--campaign-id")
+
+    args = parser.parse_args(argv)
+    store = ContactStore()
+    try:
+        if args.cmd == "check":
+            for _ in store.stream(args.sources, args.campaign_id):
+                pass
+            print(f"📇 {store.stats}")
+            return
+        phones = list(args.phones)
+        if args.file:
+            from utils import iter_contacts
+            phones += [c["phone"] for c in iter_contacts(args.file, skip_known_bad=False)]
+        if args.cmd == "suppress":
+            print(f"🚫 {store.suppress(phones, args.reason)} numbers suppressed")
+        else:
+            print(f"✅ {store.unsuppress(phones)} numbers removed from the suppression list")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
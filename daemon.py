@@ -0,0 +1,320 @@
+# daemon.py
+# Resident session daemon: keeps a logged-in browser warm and runs submitted
+# campaigns one after another, so a new campaign skips launch and login.
+#
+#   python daemon.py serve [--profile DIR] [--headless | --headed]
+#   python daemon.py submit contacts.csv --template welcome
+#   python daemon.py status <job_id>
+#   python daemon.py cancel <job_id>
+#   python daemon.py stop
+import argparse
+import logging
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+import uuid
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import config
+from contact_store import contact_sources
+from media import media_list
+from metrics import get_metrics, set_remote_summary, start_exporter
+
+logger = logging.getLogger("daemon")
+
+KEEPALIVE_SECONDS = 30
+
+
+def _authkey(create=False):
+    """Shared secret for the local socket; the daemon creates it on first start (owner-only)"""
+    if create and not os.path.exists(config.DAEMON_KEY_FILE):
+        config.init_dirs()
+        fd = os.open(config.DAEMON_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+    with open(config.DAEMON_KEY_FILE, "r") as f:
+        return f.read().strip().encode()
+
+
+class SessionDaemon:
+    def __init__(self, profile_dir=None, headless=None, address=None):
+        self.profile_dir = profile_dir
+        self.headless = headless
+        self.address = address or (config.DAEMON_HOST, config.DAEMON_PORT)
+        self.session = None
+        self.jobs = {}
+        self.stops = {}  # job_id -> threading.Event, set by "cancel"
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+        self.running = True
+
+    # --- Browser (only ever touched from the main thread; Playwright sync API is thread-bound) ---
+    def _ensure_session(self):
+        if self.session is not None and self.session.is_ready():
+            return True
+        from session import WhatsAppSession  # Playwright only once a browser has to launch
+
+        if self.session is not None:
+            logger.warning("⚠️ Session lost, restarting browser...")
+            self.session.close()
+        self.session = WhatsAppSession(user_data_dir=self.profile_dir, lean=config.LEAN_MODE)
+        if self.session.start(headless=self.headless):
+            return True
+        self.session.close()
+        self.session = None
+        return False
+
+    def _run_job(self, job):
+        from campaign import run_campaign
+        from journal import campaign_id_for
+
+        job_id = job["id"]
+        with self.lock:
+            stop = self.stops[job_id]
+            if stop.is_set():  # cancelled while queued
+                del self.stops[job_id]
+                return
+        campaign_id = job.get("campaign_id") or campaign_id_for(job["contacts"], job["message"], job.get("media"))
+        self._update(job_id, state="running", started=time.time(), campaign_id=campaign_id)
+        try:
+            if not self._ensure_session():
+                self._update(job_id, state="failed", error="not logged in")
+                return
+            reported = 0
+            for sent, total, failed in run_campaign(self.session, job["contacts"], job["message"],
+                                                    job.get("media"), campaign_id,
+                                                    job.get("resume", True), stop=stop):
+                with self.lock:  # only the failures new since the last tick
+                    self.jobs[job_id].update(sent=sent, total=total)
+                    self.jobs[job_id]["failed"].extend(failed[reported:])
+                reported = len(failed)
+            self._update(job_id, state="cancelled" if stop.is_set() else "done", finished=time.time())
+        except Exception as e:
+            logger.exception("💥 Job %s crashed: %s", job_id, e)
+            self._update(job_id, state="failed", error=str(e))
+        finally:
+            with self.lock:
+                del self.stops[job_id]
+
+    def _update(self, job_id, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+
+    # --- Socket side (listener thread + one thread per client) ---
+    def _handle(self, request):
+        cmd = request.get("cmd")
+        if cmd == "submit":
+            job = dict(request["job"])
+            job["id"] = uuid.uuid4().hex[:12]
+            with self.lock:
+                self.jobs[job["id"]] = {"state": "queued", "sent": 0, "total": 0, "failed": [],
+                                        "submitted": time.time()}
+                self.stops[job["id"]] = threading.Event()
+            self.pending.put(job)
+            return {"ok": True, "job_id": job["id"]}
+        if cmd == "status":
+            with self.lock:
+                job = self.jobs.get(request.get("job_id"))
+                if job is None:
+                    return {"ok": False, "error": "unknown job"}
+                since = request.get("failed_since", 0)
+                status = dict(job, failed=job["failed"][since:], failed_count=len(job["failed"]))
+            if status.get("campaign_id"):
+                status["metrics"] = get_metrics().summary(status["campaign_id"])
+            return {"ok": True, **status}
+        if cmd == "cancel":
+            # A queued job never starts; a running one stops after the current send
+            with self.lock:
+                job = self.jobs.get(request.get("job_id"))
+                if job is None:
+                    return {"ok": False, "error": "unknown job"}
+                stop = self.stops.get(request["job_id"])
+                if stop is not None:
+                    stop.set()
+                    if job["state"] == "queued":
+                        job.update(state="cancelled", finished=time.time())
+                return {"ok": True, "state": job["state"]}
+        if cmd == "jobs":
+            with self.lock:
+                return {"ok": True, "jobs": {k: v["state"] for k, v in self.jobs.items()}}
+        if cmd == "ping":
+            return {"ok": True, "ready": self.session is not None}
+        if cmd == "stop":
+            self.running = False
+            self.pending.put(None)
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown command {cmd!r}"}
+
+    def _serve_client(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                conn.send(self._handle(request))
+
+    def _accept_loop(self, listener):
+        while self.running:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                if self.running:
+                    logger.warning("⚠️ Rejected connection: %s", e)
+                continue
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def serve_forever(self):
+        listener = Listener(self.address, authkey=_authkey(create=True))
+        threading.Thread(target=self._accept_loop, args=(listener,), daemon=True).start()
+        logger.info("🟢 Session daemon listening on %s:%s", *self.address)
+
+        self._ensure_session()
+        try:
+            while self.running:
+                try:
+                    job = self.pending.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    if self._ensure_session():  # keep the context warm between campaigns
+                        self.session.report_usage(logging.DEBUG)
+                    continue
+                if job is not None:
+                    self._run_job(job)
+        finally:
+            listener.close()
+            if self.session is not None:
+                self.session.close()
+            logger.info("🔴 Session daemon stopped.")
+
+
+# --- Client helpers (GUI, CLI, scheduler) ---
+def _request(payload, address=None):
+    with Client(address or (config.DAEMON_HOST, config.DAEMON_PORT), authkey=_authkey()) as conn:
+        conn.send(payload)
+        return conn.recv()
+
+
+def submit_job(contact_file, message, media_path=None, campaign_id=None, resume=True, address=None):
+    job = {"contacts": [os.path.abspath(p) for p in contact_sources(contact_file)], "message": message,
+           "media": [os.path.abspath(p) for p in media_list(media_path)] or None,
+           "campaign_id": campaign_id, "resume": resume}
+    return _request({"cmd": "submit", "job": job}, address)["job_id"]
+
+
+def job_status(job_id, failed_since=0, address=None):
+    return _request({"cmd": "status", "job_id": job_id, "failed_since": failed_since}, address)
+
+
+def cancel_job(job_id, address=None):
+    return _request({"cmd": "cancel", "job_id": job_id}, address)
+
+
+def daemon_running(address=None):
+    """Ping without side effects: no key file means no daemon was ever started here"""
+    if not os.path.exists(config.DAEMON_KEY_FILE):
+        return False
+    try:
+        return _request({"cmd": "ping"}, address).get("ok", False)
+    except (OSError, EOFError, AuthenticationError):
+        return False
+
+
+def run_remote_yielding(contact_file, message, media_path=None, campaign_id=None, resume=True,
+                        poll_interval=0.5, address=None):
+    """run_sender_yielding over the daemon: same (sent, total, failed) stream.
+
+    Closing the generator early cancels the job.
+    """
+    job_id = submit_job(contact_file, message, media_path, campaign_id, resume, address)
+    failed = []
+    finished = False
+    try:
+        while True:
+            status = job_status(job_id, failed_since=len(failed), address=address)
+            failed.extend(status["failed"])
+            set_remote_summary(status.get("metrics"))
+            finished = status["state"] in ("done", "failed", "cancelled")
+            yield status["sent"], max(status["total"], 1), failed
+            if finished:
+                if status.get("error"):
+                    logger.error("❌ Job %s failed: %s", job_id, status["error"])
+                return
+            time.sleep(poll_interval)
+    finally:
+        if not finished:
+            try:
+                cancel_job(job_id, address)
+                logger.info("⏹️ Job %s cancelled.", job_id)
+            except (OSError, EOFError, AuthenticationError) as e:
+                logger.warning("⚠️ Job %s not cancelled: %s", job_id, e)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WhatsApp session daemon")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    serve = sub.add_parser("serve", help="run the daemon in the foreground")
+    serve.add_argument("--profile", help="browser profile directory")
+    display = serve.add_mutually_exclusive_group()
+    display.add_argument("--headless", dest="headless", action="store_const", const=True,
+                         help="default: headless once the profile has logged in")
+    display.add_argument("--headed", dest="headless", action="store_const", const=False)
+    serve.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on 127.0.0.1:PORT")
+
+    submit = sub.add_parser("submit", help="queue a campaign")
+    submit.add_argument("contacts", nargs="+", help="one or more CSV/TXT/XLSX files, merged and deduplicated")
+    group = submit.add_mutually_exclusive_group(required=True)
+    group.add_argument("--message")
+    group.add_argument("--template")
+    submit.add_argument("--media", nargs="+", help="one file, or several sent as one album")
+    submit.add_argument("--no-resume", action="store_true")
+    submit.add_argument("--wait", action="store_true", help="follow progress until the job ends")
+
+    status = sub.add_parser("status", help="show a job")
+    status.add_argument("job_id")
+
+    cancel = sub.add_parser("cancel", help="cancel a job (a running one stops after the current send)")
+    cancel.add_argument("job_id")
+
+    sub.add_parser("stop", help="stop the daemon")
+
+    args = parser.parse_args(argv)
+
+    if args.cmd == "serve":
+        from logsetup import setup_logging
+        setup_logging()
+        start_exporter(args.metrics_port)
+        SessionDaemon(args.profile, args.headless).serve_forever()
+    elif args.cmd == "submit":
+        message = args.message
+        if args.template:
+            from template_registry import get_registry
+            message = get_registry().get(args.template).text
+        if args.wait:
+            for sent, total, failed in run_remote_yielding(args.contacts, message, args.media,
+                                                           resume=not args.no_resume):
+                print(f"📊 {sent}/{total} sent, {len(failed)} failed")
+        else:
+            print(submit_job(args.contacts, message, args.media, resume=not args.no_resume))
+    elif args.cmd == "status":
+        status = job_status(args.job_id)
+        print(f"{status.get('state')}: {status.get('sent')}/{status.get('total')} sent, "
+              f"{status.get('failed_count', 0)} failed")
+    elif args.cmd == "cancel":
+        reply = cancel_job(args.job_id)
+        if not reply.get("ok"):
+            print(f"❌ {reply.get('error')}")
+            return 1
+        print(f"⏹️ Cancel requested ({reply['state']}).")
+    elif args.cmd == "stop":
+        _request({"cmd": "stop"})
+        print("🔴 Stop requested.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
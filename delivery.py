@@ -0,0 +1,253 @@
+# delivery.py
+# Tick states of outgoing messages, reported by the page instead of guessed.
+# A MutationObserver inside WhatsApp Web watches outgoing bubbles (clock, one
+# tick, two ticks, blue ticks, error) and the chat list, and calls a binding
+# (page.expose_binding) on every change. MessageSender waits only until the
+# new bubble has left the outbox; the later ticks arrive in the background and
+# end up in the journal as each message's final delivery state.
+import json
+import logging
+import weakref
+
+logger = logging.getLogger("delivery")
+
+DELIVERY_PENDING = "pending"      # clock: still in the outbox
+DELIVERY_FAILED = "failed"        # WhatsApp gave up on it
+DELIVERY_SENT = "sent"            # one tick: on WhatsApp's servers
+DELIVERY_DELIVERED = "delivered"  # two ticks: on the recipient's phone
+DELIVERY_READ = "read"            # blue ticks
+
+# A message only moves forward (events for one bubble can arrive out of
+# order); a resend that gets through overrides "failed"
+RANK = {DELIVERY_PENDING: 0, DELIVERY_FAILED: 1, DELIVERY_SENT: 2, DELIVERY_DELIVERED: 3, DELIVERY_READ: 4}
+
+BINDING = "ravenDelivery"
+OUTGOING_BUBBLE = 'div[data-id^="true_"]'  # data-id = true_<phone>@c.us_<message id>
+BUBBLE_ICONS = {"msg-time": DELIVERY_PENDING, "msg-check": DELIVERY_SENT, "msg-dblcheck": DELIVERY_DELIVERED,
+                "msg-dblcheck-ack": DELIVERY_READ, "msg-error": DELIVERY_FAILED}
+# Once the chat is closed its bubbles leave the DOM; the chat list row keeps
+# showing the ticks of the last message
+CHAT_ROW = '[aria-label="Chat list"] [role="listitem"]'
+ROW_ICONS = {"status-check": DELIVERY_SENT, "status-dblcheck": DELIVERY_DELIVERED,
+             "status-dblcheck-ack": DELIVERY_READ}
+BLIND_LIMIT = 3  # sends without any outgoing bubble before confirm() stops waiting
+
+# Installed once per document. Bubbles that are already there when a chat
+# opens (history) are remembered as null and never reported; only bubbles
+# first seen in the outbox are ours.
+OBSERVER_JS = """
+(cfg) => {
+    if (window.__ravenDelivery) return;
+    const raven = window.__ravenDelivery = {states: {}, phones: {}, rows: {}, claimed: new Set(), waiters: new Set()};
+    const selector = icons => Object.keys(icons).map(k => `[data-icon="${k}"]`).join(', ');
+    const bubbleIcon = selector(cfg.bubbleIcons), rowIcon = selector(cfg.rowIcons);
+    const iconState = (icon, icons) => {
+        const state = icons[icon.getAttribute('data-icon')];
+        return state === 'delivered' && /read/i.test(icon.getAttribute('aria-label') || '') ? 'read' : state;
+    };
+    const bubble = (node) => {
+        const id = node.getAttribute('data-id');
+        const icon = node.querySelector(bubbleIcon);
+        const state = icon && iconState(icon, cfg.bubbleIcons);
+        if (!id || !state) return;
+        const prev = raven.states[id];
+        if (prev === undefined && state !== 'pending') { raven.states[id] = null; return; }
+        if (prev === null || prev === state) return;
+        raven.states[id] = state;
+        const phone = id.split('_')[1].split('@')[0];
+        const ids = raven.phones[phone] = raven.phones[phone] || [];
+        if (!ids.includes(id)) ids.push(id);
+        window[cfg.binding]({id, phone, state});
+        raven.waiters.forEach(check => check());
+    };
+    const row = (node) => {
+        const title = node.querySelector('span[title]');
+        const icon = node.querySelector(rowIcon);
+        if (!title || !icon) return;
+        const phone = title.getAttribute('title').replace(/\\D/g, '');
+        const state = iconState(icon, cfg.rowIcons);
+        if (!raven.phones[phone] || !state || raven.rows[phone] === state) return;
+        raven.rows[phone] = state;
+        window[cfg.binding]({phone, state});
+    };
+    const scan = (node) => {
+        if (node.nodeType !== 1) return;
+        const b = node.closest(cfg.bubble);
+        if (b) return bubble(b);
+        const r = node.closest(cfg.row);
+        if (r) return row(r);
+        node.querySelectorAll(cfg.bubble).forEach(bubble);
+        node.querySelectorAll(cfg.row).forEach(row);
+    };
+    new MutationObserver(records => records.forEach(r => r.type === 'attributes' ? scan(r.target) : r.addedNodes.forEach(scan)))
+        .observe(document, {subtree: true, childList: true, attributes: true, attributeFilter: ['data-icon', 'aria-label']});
+}
+"""
+INIT_JS = "(%s)(%s)" % (OBSERVER_JS.strip(), json.dumps({
+    "binding": BINDING, "bubble": OUTGOING_BUBBLE, "row": CHAT_ROW,
+    "bubbleIcons": BUBBLE_ICONS, "rowIcons": ROW_ICONS,
+}))
+
+# Resolves as soon as a new bubble for `phone` leaves the outbox (or fails),
+# driven by the observer rather than by polling. Bubbles handed out here are
+# claimed, so a retry to the same number waits for its own bubble.
+CONFIRM_JS = """
+([phone, timeout]) => new Promise(resolve => {
+    const raven = window.__ravenDelivery;
+    if (!raven) return resolve(null);
+    const fresh = () => (raven.phones[phone] || []).filter(id => !raven.claimed.has(id));
+    const done = (result) => {
+        raven.waiters.delete(check);
+        clearTimeout(timer);
+        result.ids.forEach(id => raven.claimed.add(id));
+        resolve(result);
+    };
+    const check = () => {
+        const ids = fresh();
+        const id = ids.find(i => raven.states[i] !== 'pending');
+        if (id) done({ids, id, state: raven.states[id]});
+    };
+    const timer = setTimeout(() => {
+        const ids = fresh();
+        done({ids, id: ids[0] || null, state: ids.length ? 'pending' : null});
+    }, timeout);
+    raven.waiters.add(check);
+    check();
+})
+"""
+
+# After the last send: until nothing this page sent is still in the outbox
+SETTLE_JS = """
+(timeout) => new Promise(resolve => {
+    const raven = window.__ravenDelivery;
+    const idle = () => !raven || !Object.values(raven.states).includes('pending');
+    if (idle()) return resolve(true);
+    const check = () => { if (idle()) { raven.waiters.delete(check); clearTimeout(timer); resolve(true); } };
+    const timer = setTimeout(() => { raven.waiters.delete(check); resolve(false); }, timeout);
+    raven.waiters.add(check);
+})
+"""
+
+
+class DeliveryFailedError(Exception):
+    pass
+
+
+def phone_of(message_id):
+    """'true_8801712345678@c.us_3EB0...' -> '8801712345678'"""
+    return message_id.split("_")[1].split("@")[0]
+
+
+class DeliveryTracker:
+    """Delivery state per phone, fed by the page binding (or by a simulated client).
+
+    The state of a phone is that of its latest send; an album counts as its
+    least advanced bubble. drain() hands out the phones that changed since
+    the last call, for the journal.
+    """
+
+    def __init__(self, page=None):
+        self.page = page
+        self.enabled = page is not None
+        self.states = {}      # message id -> state
+        self.phones = {}      # phone -> message ids of its latest send
+        self.retired = set()  # ids of earlier sends to a phone, ignored from then on
+        self.changed = set()
+        self.blind = 0
+        if page is not None:
+            self.install(page)
+
+    def install(self, page):
+        try:
+            page.expose_binding(BINDING, self.on_event)
+            page.add_init_script(INIT_JS)  # every document this page loads from now on
+            page.evaluate(INIT_JS)         # and the one it shows now
+        except Exception as e:
+            logger.warning("⚠️ Delivery tracking unavailable: %s", e)
+            self.enabled = False
+
+    def on_event(self, source, event):
+        self.report(event["phone"], event["state"], event.get("id"))
+
+    def report(self, phone, state, message_id=None):
+        """A tick state for one bubble, or for the last message of a chat (message_id None)"""
+        if state not in RANK:
+            return
+        if message_id is None:
+            ids = self.phones.get(phone, ())
+        elif message_id in self.retired:
+            return
+        else:
+            ids = self.phones.setdefault(phone, [])
+            if message_id not in ids:
+                ids.append(message_id)  # late part of an album
+            ids = (message_id,)
+        for msg_id in ids:
+            if RANK[state] > RANK.get(self.states.get(msg_id), -1):
+                self.states[msg_id] = state
+                self.changed.add(phone)
+
+    def claim(self, phone, ids, message_id=None, state=None):
+        """`ids` are the bubbles of a new send to `phone`; earlier ones stop counting"""
+        for old in self.phones.get(phone, ()):
+            if old not in ids:
+                self.retired.add(old)
+                self.states.pop(old, None)
+        self.phones[phone] = list(ids)
+        for msg_id in ids:
+            self.states.setdefault(msg_id, DELIVERY_PENDING)
+        self.changed.add(phone)
+        if message_id is not None and state is not None:
+            self.report(phone, state, message_id)
+
+    def state(self, phone):
+        states = [self.states[i] for i in self.phones.get(phone, ()) if i in self.states]
+        return min(states, key=RANK.get) if states else None
+
+    def pending(self):
+        return sum(1 for state in self.states.values() if state == DELIVERY_PENDING)
+
+    def drain(self):
+        """{phone: state} of the phones that changed since the last call"""
+        changed, self.changed = self.changed, set()
+        return {phone: self.state(phone) for phone in changed if self.state(phone) is not None}
+
+    def confirm(self, phone, timeout_ms):
+        """Wait until the new bubble for `phone` leaves the outbox; its state, or None if no bubble showed up.
+
+        A page that never shows an outgoing bubble (the markup changed) is
+        not waited on again after BLIND_LIMIT sends.
+        """
+        if not self.enabled:
+            return None
+        result = self.page.evaluate(CONFIRM_JS, [phone, timeout_ms])
+        if not result or not result["ids"]:
+            self.blind += 1
+            if self.blind >= BLIND_LIMIT:
+                logger.warning("⚠️ No outgoing message bubbles seen after %d sends; "
+                               "not waiting for delivery ticks any more.", self.blind)
+                self.enabled = False
+            return None
+        self.blind = 0
+        self.claim(phone, result["ids"], result["id"], result["state"])
+        return self.state(phone)
+
+    def settle(self, seconds):
+        """Give messages still in the outbox up to `seconds` to leave it"""
+        if self.page is None or not self.pending():
+            return
+        try:
+            self.page.evaluate(SETTLE_JS, int(seconds * 1000))
+        except Exception as e:
+            logger.debug("Delivery settle failed: %s", e)
+
+
+_trackers = weakref.WeakKeyDictionary()
+
+
+def tracker_for(page):
+    """The page's DeliveryTracker; a binding can be exposed only once per page"""
+    tracker = _trackers.get(page)
+    if tracker is None:
+        tracker = _trackers[page] = DeliveryTracker(page)
+    return tracker
\ No newline at end of file
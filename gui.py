@@ -1,39 +1,105 @@
 # gui.py (Simplified - No Scheduling)
 import sys
+import threading
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QLineEdit, QTextEdit, QFileDialog, QMessageBox,
-    QComboBox, QProgressBar, QListWidget, QTabWidget, QGroupBox
+    QComboBox, QProgressBar, QListView, QTabWidget, QGroupBox, QSpinBox, QCheckBox
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QThread, QTimer, QAbstractListModel, QModelIndex, pyqtSignal
 from PyQt6.QtGui import QFont
-from utils import load_templates
+import config
+from template_registry import get_registry
+from metrics import format_summary, latest_summary
+from contact_store import SOURCE_SEPARATOR
+from media import MEDIA_SEPARATOR
+
+
+class LogModel(QAbstractListModel):
+    """Status log kept as a plain list; QListView only asks for visible rows"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lines = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.lines)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return self.lines[index.row()]
+        return None
+
+    def append(self, lines):
+        """Add many lines with a single insert notification"""
+        if not lines:
+            return
+        start = len(self.lines)
+        self.beginInsertRows(QModelIndex(), start, start + len(lines) - 1)
+        self.lines.extend(lines)
+        self.endInsertRows()
 
 
 class SendWorker(QThread):
-    """Background thread for sending"""
-    log = pyqtSignal(str)
-    progress = pyqtSignal(int, int)
+    """Background thread for sending.
+
+    Progress and log lines are buffered here and collected by the window
+    with drain() on a timer, so the UI refreshes at a fixed rate however
+    fast messages go out.
+    """
     finished = pyqtSignal()
 
-    def __init__(self, contact_file, message, media_path):
+    def __init__(self, contact_file, message, media_path, workers=1, resume=False):
         super().__init__()
         self.contact_file = contact_file
         self.message = message
         self.media_path = media_path
+        self.workers = workers
+        self.resume = resume
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.progress = None
+        self.pending_logs = []
+
+    def stop(self):
+        """Stop after the message being sent now (retry and pacing waits end at once);
+        the journal keeps the rest for a resume"""
+        self.stopping.set()
+
+    def log(self, text):
+        with self.lock:
+            self.pending_logs.append(text)
+
+    def drain(self):
+        """Latest (sent, total) or None, and the log lines since the last call"""
+        with self.lock:
+            progress, self.progress = self.progress, None
+            logs, self.pending_logs = self.pending_logs, []
+        return progress, logs
 
     def run(self):
         from main import run_sender_yielding
+        progress = None
         try:
-            for sent, total, failed in run_sender_yielding(self.contact_file, self.message, self.media_path):
-                self.progress.emit(sent, total)
-                if failed:
-                    last = failed[-1]
-                    self.log.emit(f"❌ Failed: {last['name']} - {last['phone']}")
-            self.log.emit("✅ All messages sent!")
+            reported = 0
+            progress = run_sender_yielding(self.contact_file, self.message, self.media_path,
+                                           self.workers, resume=self.resume, stop=self.stopping)
+            for sent, total, failed in progress:
+                lines = [f"❌ Failed: {c['name']} - {c['phone']}" for c in failed[reported:]]
+                reported = len(failed)
+                with self.lock:
+                    self.progress = (sent, total)
+                    self.pending_logs.extend(lines)
+                if self.stopping.is_set():
+                    self.log("⏹️ Sending stopped.")
+                    break
+            else:
+                self.log("⏹️ Sending stopped." if self.stopping.is_set() else "✅ All messages sent!")
         except Exception as e:
-            self.log.emit(f"🚨 Error: {str(e)}")
+            self.log(f"🚨 Error: {str(e)}")
         finally:
+            if progress is not None:
+                progress.close()  # closes the browser and flushes the journal now, in this thread
             self.finished.emit()
 
 
@@ -57,7 +123,7 @@ class WhatsAppGUI(QMainWindow):
         layout.addWidget(title)
 
         # Contact File
-        layout.addWidget(QLabel("📁 Contacts (CSV or TXT):"))
+        layout.addWidget(QLabel("📁 Contacts (CSV, TXT or XLSX):"))
         file_layout = QHBoxLayout()
         self.file_input = QLineEdit()
         self.browse_btn = QPushButton("Browse")
@@ -75,7 +141,7 @@ class WhatsAppGUI(QMainWindow):
         layout.addWidget(self.template_combo)
 
         # Message Editor
-        layout.addWidget(QLabel("💬 Edit Message ({name} = person's name):"))
+        layout.addWidget(QLabel("💬 Edit Message ({name} = person's name, any CSV column works):"))
         self.message_input = QTextEdit()
         self.message_input.setPlaceholderText("Hi {name}, this is a test.")
         layout.addWidget(self.message_input)
@@ -90,20 +156,39 @@ class WhatsAppGUI(QMainWindow):
         media_layout.addWidget(self.media_btn)
         layout.addLayout(media_layout)
 
+        # Parallel profiles
+        workers_layout = QHBoxLayout()
+        workers_layout.addWidget(QLabel("🧩 Parallel profiles:"))
+        self.workers_input = QSpinBox()
+        self.workers_input.setRange(1, 16)
+        self.workers_input.setValue(1)
+        workers_layout.addWidget(self.workers_input)
+        self.resume_check = QCheckBox("Resume previous run (skip already sent)")
+        self.resume_check.setChecked(True)
+        workers_layout.addWidget(self.resume_check)
+        layout.addLayout(workers_layout)
+
         # Progress
         layout.addWidget(QLabel("📊 Progress:"))
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
         layout.addWidget(self.progress_bar)
+        self.stats_label = QLabel(format_summary(None))
+        self.stats_label.setWordWrap(True)
+        self.stats_label.setStyleSheet("color:#555;")
+        layout.addWidget(self.stats_label)
 
         # Logs
         layout.addWidget(QLabel("📋 Status Log:"))
-        self.log_list = QListWidget()
+        self.log_model = LogModel(self)
+        self.log_list = QListView()
+        self.log_list.setModel(self.log_model)
+        self.log_list.setUniformItemSizes(True)  # no per-row size queries
+        self.log_list.setLayoutMode(QListView.LayoutMode.Batched)
         layout.addWidget(self.log_list)
 
         # Send Button
         self.send_btn = QPushButton("🚀 START SENDING")
-        self.send_btn.clicked.connect(self.start_sending) 
         self.send_btn.setStyleSheet("""
             QPushButton {
                 background:#128C7E; color:white; padding:12px; border-radius:8px;
@@ -114,74 +199,105 @@ class WhatsAppGUI(QMainWindow):
         self.send_btn.clicked.connect(self.start_sending)
         layout.addWidget(self.send_btn)
 
+        self.worker = None
+        self.close_pending = False  # the window closes once the worker has stopped
+        self.ui_timer = QTimer(self)
+        self.ui_timer.setInterval(config.UI_REFRESH_MS)
+        self.ui_timer.timeout.connect(self.refresh_from_worker)
+
     def browse_file(self):
-        file, _ = QFileDialog.getOpenFileName(
-            self, "Select Contacts", "", "CSV Files (*.csv);;Text Files (*.txt)"
+        files, _ = QFileDialog.getOpenFileNames(
+            self, "Select Contacts", "", "Contact Files (*.csv *.txt *.xlsx);;CSV Files (*.csv);;"
+                                         "Text Files (*.txt);;Excel Files (*.xlsx)"
         )
-        if file:
-            self.file_input.setText(file)
+        if files:
+            # Several sources are merged and deduplicated (contact_store.py)
+            self.file_input.setText(f"{SOURCE_SEPARATOR} ".join(files))
 
     def select_media(self):
-        file, _ = QFileDialog.getOpenFileName(self, "Attach File", "", "All Files (*)")
-        if file:
-            self.media_input.setText(file)
+        files, _ = QFileDialog.getOpenFileNames(self, "Attach Files", "", "All Files (*)")
+        if files:
+            self.media_input.setText(f"{MEDIA_SEPARATOR} ".join(files))  # several files = one album
 
     def load_templates(self):
-        templates = load_templates()
-        for name in templates:
+        for name in get_registry().names():
             self.template_combo.addItem(name)
 
     def load_template(self, name):
         if name == "Custom Message":
             return
-        templates = load_templates()
-        if name in templates:
-            self.message_input.setPlainText(templates[name])
+        try:
+            template = get_registry().get(name)  # cached, re-read only if the file changed
+        except KeyError:
+            return
+        self.message_input.setPlainText(template.text)
 
     def start_sending(self):
-        print("🔥 [DEBUG] Button clicked! start_sending() called")  # 🔴 MUST SEE THIS
-
         contact_file = self.file_input.text().strip()
-        print(f"📁 [DEBUG] Contact file: {contact_file}")
-
         message = self.message_input.toPlainText().strip()
-        print(f"💬 [DEBUG] Message: {message}")
-
         media_path = self.media_input.text().strip() or None
-        print(f"📎 [DEBUG] Media: {media_path}")
 
         if not contact_file or not message:
-            print("❌ [DEBUG] Validation failed")  # 🔴
             QMessageBox.critical(self, "Error", "Please select contact file and message.")
             return
+        if self.worker is not None and self.worker.isRunning():
+            return
 
         self.send_btn.setEnabled(False)
+        self.progress_bar.setValue(0)
         self.add_log("🔄 Sending messages...")
 
-        try:
-            print("🚀 [DEBUG] Importing run_sender_yielding...")  # 🔴
-            from main import run_sender_yielding
-            print("✅ [DEBUG] Successfully imported!")  # 🔴
-
-            gen = run_sender_yielding(contact_file, message, media_path)
-            print("✅ [DEBUG] Generator created, starting loop...")
-
-            for sent, total, failed in gen:
-                print(f"📊 [DEBUG] Progress: {sent}/{total}")
-                self.progress_bar.setMaximum(total)
-                self.progress_bar.setValue(sent)
-                self.statusBar().showMessage(f"Sent: {sent}/{total}")
-                if failed:
-                    last = failed[-1]
-                    self.add_log(f"❌ Failed: {last['name']}")
-            self.add_log("✅ All messages sent!")
-        except Exception as e:
-            self.add_log(f"🚨 Error: {str(e)}")
-            import traceback
-            traceback.print_exc()  # This will show hidden errors
-        finally:
-            self.send_btn.setEnabled(True) 
-    
+        self.worker = SendWorker(contact_file, message, media_path, self.workers_input.value(),
+                                 resume=self.resume_check.isChecked())
+        self.worker.finished.connect(self.sending_finished)
+        self.worker.start()
+        self.ui_timer.start()
+
+    def refresh_from_worker(self):
+        if self.worker is None:
+            return
+        progress, logs = self.worker.drain()
+        if progress is not None:
+            sent, total = progress
+            self.progress_bar.setMaximum(total)
+            self.progress_bar.setValue(sent)
+            self.statusBar().showMessage(f"Sent: {sent}/{total}")
+            self.stats_label.setText(format_summary(latest_summary()))
+        self.add_logs(logs)
+
+    def sending_finished(self):
+        self.ui_timer.stop()
+        self.refresh_from_worker()  # whatever arrived after the last tick
+        self.send_btn.setEnabled(True)
+        if self.close_pending:
+            self.worker.wait()  # run() has returned; only the thread's own exit is left
+            self.close()
+
+    def closeEvent(self, event):
+        if self.worker is not None and self.worker.isRunning():
+            event.ignore()
+            if self.close_pending:
+                return  # already stopping
+            answer = QMessageBox.question(self, "Sending in progress",
+                                          "Messages are still being sent. Quit anyway?")
+            if answer != QMessageBox.StandardButton.Yes:
+                return
+            # A QThread destroyed while running aborts the process; the window closes from
+            # sending_finished once the current send is done, and stays responsive meanwhile
+            self.statusBar().showMessage("Stopping after the current message...")
+            self.close_pending = True
+            self.worker.stop()
+            return
+        event.accept()
+
     def add_log(self, text):
-        self.log_list.addItem(text)
-        
\ No newline at end of file
+        self.add_logs([text])
+
+    def add_logs(self, lines):
+        if not lines:
+            return
+        bar = self.log_list.verticalScrollBar()
+        at_bottom = bar.value() == bar.maximum()
+        self.log_model.append(lines)
+        if at_bottom:
+            self.log_list.scrollToBottom()
\ No newline at end of file
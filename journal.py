@@ -0,0 +1,157 @@
+# journal.py
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+
+import config
+from contact_store import SOURCE_SEPARATOR, contact_sources
+from media import MEDIA_SEPARATOR, media_list
+
+logger = logging.getLogger("journal")
+
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+# PRAGMA synchronous levels: OFF never fsyncs, NORMAL fsyncs at WAL checkpoints,
+# FULL fsyncs every commit
+SYNC_LEVELS = ("OFF", "NORMAL", "FULL")
+
+
+def campaign_id_for(contact_file, message, media_path=None):
+    """Stable id for 'this file + this message', so a rerun after a crash resumes it"""
+    sources = [os.path.abspath(p) for p in contact_sources(contact_file)]
+    key = f"{SOURCE_SEPARATOR.join(sources)}|{message}|{MEDIA_SEPARATOR.join(media_list(media_path))}"
+    stem = os.path.splitext(os.path.basename(sources[0]))[0] if sources else "campaign"
+    return f"{stem}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]}"
+
+
+class SendJournal:
+    """Append-style SQLite journal of send attempts, keyed by (campaign, phone).
+
+    Records are buffered and written in one transaction every `batch_size`
+    records or `flush_interval` seconds, so the send loop never waits on the
+    disk per message. A crash can lose at most the unflushed buffer; use
+    batch_size=1 and sync="FULL" when that is not acceptable.
+    """
+
+    def __init__(self, campaign_id, path=None, batch_size=50, flush_interval=2.0, sync="NORMAL"):
+        if sync not in SYNC_LEVELS:
+            raise ValueError(f"sync must be one of {SYNC_LEVELS}")
+        self.campaign_id = campaign_id
+        self.path = path or config.JOURNAL_DB
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.deliveries = {}  # phone -> (delivery state, time), written after the sends
+        self.resumed = 0
+        self.last_flush = time.monotonic()
+
+        config.init_dirs()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={sync}")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sends (
+                campaign TEXT NOT NULL,
+                phone    TEXT NOT NULL,
+                name     TEXT,
+                status   TEXT NOT NULL,
+                error    TEXT,
+                attempts INTEGER NOT NULL DEFAULT 1,
+                updated  REAL NOT NULL,
+                delivery TEXT,
+                delivery_updated REAL,
+                PRIMARY KEY (campaign, phone)
+            );
+            -- contact_store.ContactStore.recent_sends (frequency cap across campaigns)
+            CREATE INDEX IF NOT EXISTS sends_status_updated ON sends (status, updated);
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(sends)")}
+        for column, kind in (("delivery", "TEXT"), ("delivery_updated", "REAL")):
+            if column not in columns:  # journals from before delivery tracking
+                self.conn.execute(f"ALTER TABLE sends ADD COLUMN {column} {kind}")
+
+    # --- Resume ---
+    def completed(self):
+        """Phones already sent in this campaign, as a set for O(1) lookups"""
+        rows = self.conn.execute(
+            "SELECT phone FROM sends WHERE campaign = ? AND status = ?",
+            (self.campaign_id, STATUS_SENT),
+        )
+        return {phone for (phone,) in rows}
+
+    def pending(self, contacts):
+        """Drop contacts this campaign already sent; `self.resumed` says how many.
+
+        The sent set is the checkpoint: failed and never-tried contacts are
+        sent again, wherever they are in the file.
+        """
+        done = self.completed()
+        self.resumed = len(done)
+        if done:
+            logger.info("⏭️ Resuming campaign %s: %d contacts already sent.", self.campaign_id, len(done))
+        return (c for c in contacts if c["phone"] not in done)
+
+    # --- Recording ---
+    def record(self, phone, name, status, error=None):
+        self.buffer.append((self.campaign_id, phone, name, status, error, time.time()))
+        if len(self.buffer) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def record_delivery(self, phone, state):
+        """Latest delivery state (delivery.DELIVERY_*) of a message this campaign sent"""
+        self.deliveries[phone] = (state, time.time())
+
+    def flush(self):
+        if self.buffer or self.deliveries:
+            with self.conn:
+                if self.buffer:
+                    self.conn.executemany("""
+                        INSERT INTO sends (campaign, phone, name, status, error, updated)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (campaign, phone) DO UPDATE SET
+                            status = excluded.status,
+                            error = excluded.error,
+                            attempts = attempts + 1,
+                            updated = excluded.updated
+                    """, self.buffer)
+                if self.deliveries:  # after the sends, so a row written in this batch gets its state too
+                    self.conn.executemany(
+                        "UPDATE sends SET delivery = ?, delivery_updated = ? WHERE campaign = ? AND phone = ?",
+                        [(state, at, self.campaign_id, phone) for phone, (state, at) in self.deliveries.items()],
+                    )
+            self.buffer = []
+            self.deliveries = {}
+        self.last_flush = time.monotonic()
+
+    # --- Reporting ---
+    def failed_contacts(self):
+        self.flush()
+        rows = self.conn.execute(
+            "SELECT name, phone, error, attempts FROM sends WHERE campaign = ? AND status = ? ORDER BY updated",
+            (self.campaign_id, STATUS_FAILED),
+        )
+        return [{"name": name, "phone": phone, "error": error, "attempts": attempts}
+                for name, phone, error, attempts in rows]
+
+    def counts(self):
+        self.flush()
+        rows = self.conn.execute(
+            "SELECT status, COUNT(*) FROM sends WHERE campaign = ? GROUP BY status", (self.campaign_id,)
+        )
+        return dict(rows.fetchall())
+
+    def delivery_counts(self):
+        """{delivery state: count} over the messages this campaign sent ("unknown" = never reported)"""
+        self.flush()
+        rows = self.conn.execute(
+            "SELECT COALESCE(delivery, 'unknown'), COUNT(*) FROM sends WHERE campaign = ? AND status = ? "
+            "GROUP BY delivery", (self.campaign_id, STATUS_SENT),
+        )
+        return dict(rows.fetchall())
+
+    def close(self):
+        self.flush()
+        self.conn.close()
\ No newline at end of file
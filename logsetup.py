@@ -0,0 +1,193 @@
+# logsetup.py
+# Logging pipeline: callers only put records on a queue; one listener thread
+# formats them and writes the console, the rotating text log and the
+# JSON-lines send events.
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import time
+
+import config
+from metrics import get_metrics
+
+EVENTS_LOGGER = "events"
+
+# config.SEND_EVENTS values
+EVENTS_ALL = "all"
+EVENTS_FAILURES = "failures"
+EVENTS_OFF = "off"
+
+_queue = None
+_listener = None
+_handlers = []
+_events_mode = EVENTS_ALL
+_events = logging.getLogger(EVENTS_LOGGER)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Hands records over unformatted, so formatting cost lands on the listener thread"""
+
+    def prepare(self, record):
+        if record.exc_info:
+            # Tracebacks cannot cross a process queue; render them here
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        event = record.msg if isinstance(record.msg, dict) else {"message": record.getMessage()}
+        return json.dumps({"ts": round(record.created, 3), **event}, ensure_ascii=False)
+
+
+class _OnlyEvents(logging.Filter):
+    def filter(self, record):
+        return record.name == EVENTS_LOGGER
+
+
+class _NoEvents(logging.Filter):
+    def filter(self, record):
+        return record.name != EVENTS_LOGGER
+
+
+def _file_handler(path, rotate):
+    if rotate == "size":
+        return logging.handlers.RotatingFileHandler(
+            path, maxBytes=config.LOG_MAX_BYTES, backupCount=config.LOG_BACKUPS, encoding="utf-8")
+    return logging.handlers.TimedRotatingFileHandler(
+        path, when=rotate, backupCount=config.LOG_BACKUPS, encoding="utf-8")
+
+
+def _build_handlers(console, rotate):
+    handlers = []
+    if console:
+        stream = logging.StreamHandler()
+        stream.setFormatter(logging.Formatter("%(message)s"))
+        stream.addFilter(_NoEvents())
+        handlers.append(stream)
+
+    text = _file_handler(config.LOG_FILE, rotate)
+    text.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"))
+    text.addFilter(_NoEvents())
+    handlers.append(text)
+
+    events = _file_handler(config.EVENTS_FILE, rotate)
+    events.setFormatter(JsonLinesFormatter())
+    events.addFilter(_OnlyEvents())
+    handlers.append(events)
+    return handlers
+
+
+def setup_logging(level=None, events=None, console=True, rotate=None, log_queue=None):
+    """Route all logging through a queue. Safe to call more than once.
+
+    level: threshold for the console/text log (config.LOG_LEVEL).
+    events: per-send JSON-lines records, "all", "failures" or "off" (config.SEND_EVENTS).
+    rotate: "size" (config.LOG_MAX_BYTES) or a TimedRotatingFileHandler `when`, e.g. "midnight".
+    log_queue: in a worker process, the parent's queue (see listen()); nothing is
+    written locally then.
+    """
+    global _queue, _listener, _handlers, _events_mode
+
+    level = level or config.LOG_LEVEL
+    _events_mode = events or config.SEND_EVENTS
+    root = logging.getLogger()
+    root.setLevel(level)
+    _events.setLevel(logging.INFO if _events_mode != EVENTS_OFF else logging.CRITICAL + 1)
+
+    if log_queue is not None:
+        root.handlers = [_QueueHandler(log_queue)]
+        return log_queue
+    if _listener is not None:
+        return _queue
+
+    config.init_dirs()
+    _queue = queue.SimpleQueue()
+    _handlers = _build_handlers(console, rotate or config.LOG_ROTATE)
+    root.handlers = [_QueueHandler(_queue)]
+    _listener = logging.handlers.QueueListener(_queue, *_handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _queue
+
+
+def listen(log_queue):
+    """Write records that worker processes put on `log_queue`; returns the listener to stop()"""
+    setup_logging()
+    listener = logging.handlers.QueueListener(log_queue, *_handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def stop_logging():
+    """Flush everything still queued (also runs at exit)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        for handler in _handlers:
+            handler.close()
+
+
+def phone_hash(phone):
+    """Short stable digest, so event logs can be joined without storing numbers"""
+    return hashlib.blake2b(str(phone).encode(), digest_size=8).hexdigest()
+
+
+class SendAttempt:
+    """Times the stages of one send (monotonic clock), feeds them to metrics and
+    emits a single JSON-lines event.
+
+    stage(name) closes the previous stage and starts the next one (a stage
+    entered twice, e.g. navigation after a fallback, adds up); the stage open
+    when finish() is called is the one reported as where it ended.
+    """
+
+    __slots__ = ("phone", "account", "started", "mark", "current", "stages", "duration",
+                 "status", "error")
+
+    def __init__(self, phone, account=None):
+        self.phone = phone
+        self.account = account
+        self.started = self.mark = time.perf_counter()
+        self.current = None
+        self.stages = {}
+        self.duration = None
+        self.status = None
+        self.error = None
+
+    def stage(self, name):
+        now = time.perf_counter()
+        self._close(now)
+        self.current, self.mark = name, now
+
+    def _close(self, now):
+        if self.current is not None:
+            self.stages[self.current] = self.stages.get(self.current, 0.0) + now - self.mark
+
+    def finish(self, status, error=None):
+        now = time.perf_counter()
+        self._close(now)
+        self.duration = now - self.started
+        ok = error is None
+        self.status = status
+        self.error = None if ok else type(error).__name__
+        get_metrics().record(status, self.duration, self.stages, self.error)
+
+        if _events_mode == EVENTS_OFF or (ok and _events_mode == EVENTS_FAILURES):
+            return
+        _events.info({
+            "event": "send",
+            "phone": phone_hash(self.phone),
+            "account": self.account,
+            "status": status,
+            "stage": self.current,
+            "duration_ms": round(self.duration * 1000, 1),
+            "stages": {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()},
+            "error": self.error,
+            "detail": None if ok else str(error)[:200],
+        })
\ No newline at end of file
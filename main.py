@@ -1,54 +1,67 @@
 # main.py
-from PyQt6.QtWidgets import QApplication
-from gui import WhatsAppGUI
+# GUI entry point; run_sender_yielding is shared with cli.py, daemon.py and scheduler.py.
+# Qt is only imported when the window is opened.
 import sys,time
+import config
+import logging
+from logsetup import setup_logging
 
-def run_sender_yielding(contact_file, message, media_path=None):
-    from session import WhatsAppSession
-    from utils import load_contacts
-    from sender import MessageSender
-
-    try:
-        contacts = load_contacts(contact_file)
-        if not contacts:
-            yield 0, 1, []
-            return
+logger = logging.getLogger("main")
 
-        session = WhatsAppSession()
-        if not session.start(headless=False):  # Set True after login
-            yield 0, len(contacts), []
-            return
+def run_sender_yielding(contact_file, message, media_path=None, workers=1, campaign_id=None, resume=False,
+                        use_daemon=True, stop=None):
+    """(sent, total, failed) progress for one campaign.
 
-        sender = MessageSender(session.page)
-        success_count = 0
+    The template, sources and media are checked before any browser starts;
+    ValueError, FileNotFoundError and media.MediaError reach the caller.
+    Setting `stop` (a threading.Event) ends a local single-session run after
+    the current send; closing the generator cancels a daemon job.
+    """
+    setup_logging()
+    from metrics import start_exporter, set_remote_summary
+    from campaign import check_campaign
+    start_exporter()
+    set_remote_summary(None)
+    total, _, _ = check_campaign(contact_file, message, media_path)
+    if not total:
+        yield 0, 0, []
+        return
 
-        for contact in contacts:
-            name = contact['name']
-            phone = contact['phone']
-            msg = message.format(name=name)
+    if workers == 1 and use_daemon:
+        from daemon import daemon_running, run_remote_yielding
+        if daemon_running():  # warm browser already logged in, skip launch + login
+            yield from run_remote_yielding(contact_file, message, media_path, campaign_id, resume)
+            return
 
-            if sender.send_message(phone, msg, media_path):
-                success_count += 1
-            else:
-                pass  # will yield below
+    if workers > 1:
+        from pool import run_pool_yielding
+        yield from run_pool_yielding(contact_file, message, media_path, workers=workers,
+                                     campaign_id=campaign_id, resume=resume)
+        return
 
-            yield success_count, len(contacts), []
+    from session import WhatsAppSession
+    from campaign import run_campaign
 
+    session = WhatsAppSession(lean=config.LEAN_MODE)
+    if not session.start():  # headless once the profile has logged in (lean mode)
+        raise RuntimeError("WhatsApp session did not start; log in once with a visible browser")
+    try:
+        yield from run_campaign(session, contact_file, message, media_path, campaign_id, resume, stop=stop)
+    finally:
         session.close()
         time.sleep(1)
-    except Exception as e:
-        print(f"Error in run_sender_yielding: {e}")
-        yield 0, 1, []
-    
-# At the bottom of main.py
-if __name__ == "__main__":
-    print("🟢 App starting...")
+
+def run_gui():
+    from PyQt6.QtWidgets import QApplication
+    from gui import WhatsAppGUI
+
+    setup_logging()
+    logger.info("🟢 App starting...")
     app = QApplication(sys.argv)
     window = WhatsAppGUI()
     window.show()
+    return app.exec()
 
-    # 🔴 TEMP: Call sending directly to test
-    # Remove after test
-    window.start_sending()
 
-    sys.exit(app.exec())
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(run_gui())
\ No newline at end of file
@@ -0,0 +1,183 @@
+# media.py
+# Attachment stage: each asset is prepared once (images scaled down and
+# recompressed when Pillow is installed, size limits checked) and stored under
+# its content hash, so every send uploads the same small cached copy.
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+import config
+
+logger = logging.getLogger("media")
+
+MEDIA_SEPARATOR = ";"   # several files in one text field / CLI value = one album
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}  # GIFs are left alone (animation)
+VIDEO_EXTS = {".mp4", ".3gp", ".mov"}
+CHUNK = 1 << 20
+
+
+class MediaError(Exception):
+    pass
+
+
+def media_list(media):
+    """None, "a.png", "a.png; b.jpg" or ["a.png", "b.jpg"] -> list of paths"""
+    if not media:
+        return []
+    if isinstance(media, str):
+        media = media.split(MEDIA_SEPARATOR)
+    return [p.strip() for p in media if p and p.strip()]
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def size_limit(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in IMAGE_EXTS or ext in VIDEO_EXTS:
+        return config.MEDIA_MAX_BYTES
+    return config.MEDIA_MAX_DOCUMENT_BYTES
+
+
+def _pillow():
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+    return Image, ImageOps
+
+
+class MediaCache:
+    """Content-addressed cache of prepared attachments (config.MEDIA_CACHE_DIR).
+
+    The cache key covers the file content and the processing settings, so
+    renaming a file reuses its entry and changing MEDIA_MAX_SIDE does not.
+    Within a process, (path, mtime, size) is remembered too, so the per-send
+    cost after the first contact is one stat() per file.
+    """
+
+    def __init__(self, cache_dir=None, max_side=None, quality=None):
+        self.cache_dir = os.path.abspath(cache_dir or config.MEDIA_CACHE_DIR)
+        self.max_side = max_side or config.MEDIA_MAX_SIDE
+        self.quality = quality or config.MEDIA_JPEG_QUALITY
+        self.memo = {}
+        self.lock = threading.Lock()
+        self.pillow = _pillow()
+        self.warned = False
+
+    def _settings(self):
+        return f"{self.max_side}|{self.quality}|{'pil' if self.pillow else 'raw'}"
+
+    def prepare(self, path):
+        """Path of the copy to upload for `path`; raises MediaError if it can't be sent"""
+        path = os.path.abspath(path)
+        if os.path.dirname(os.path.dirname(path)) == self.cache_dir:
+            return path  # already prepared
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            raise MediaError(f"Attachment not readable: {path} ({e})")
+        memo_key = (path, st.st_mtime_ns, st.st_size)
+        with self.lock:
+            prepared = self.memo.get(memo_key)
+        if prepared is not None and os.path.exists(prepared):
+            return prepared
+
+        prepared = self._prepare(path)
+        size = os.path.getsize(prepared)
+        if size > size_limit(prepared):
+            raise MediaError(f"{os.path.basename(path)} is {size / 2**20:.1f} MB, "
+                             f"over the {size_limit(prepared) / 2**20:.0f} MB limit")
+        with self.lock:
+            self.memo[memo_key] = prepared
+        return prepared
+
+    def prepare_all(self, media):
+        paths = media_list(media)
+        if len(paths) > config.MEDIA_MAX_FILES:
+            raise MediaError(f"{len(paths)} attachments, WhatsApp takes at most {config.MEDIA_MAX_FILES} per send")
+        return [self.prepare(p) for p in paths]
+
+    def _prepare(self, path):
+        if os.path.splitext(path)[1].lower() not in IMAGE_EXTS:
+            return path  # documents/videos are uploaded as they are
+        if self.pillow is None:
+            if not self.warned:
+                logger.info("🖼️ Pillow is not installed; images are sent without recompression")
+                self.warned = True
+            return path
+
+        key = hashlib.sha256(f"{file_digest(path)}|{self._settings()}".encode()).hexdigest()[:32]
+        entry = os.path.join(self.cache_dir, key)
+        if os.path.isdir(entry):
+            names = os.listdir(entry)
+            if names:
+                return os.path.join(entry, names[0])
+
+        config.init_dirs()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir)
+        try:
+            name = self._process(path, tmp)
+            try:
+                os.rename(tmp, entry)  # atomic; another process may have won the race
+            except OSError:
+                if not os.path.isdir(entry):
+                    raise
+                name = os.listdir(entry)[0]
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        prepared = os.path.join(entry, name)
+        logger.info("🖼️ Prepared %s: %.0f KB -> %.0f KB", os.path.basename(path),
+                    os.path.getsize(path) / 1024, os.path.getsize(prepared) / 1024)
+        return prepared
+
+    def _process(self, path, out_dir):
+        """Scale down to max_side and re-encode into out_dir; returns the file name.
+
+        The original name is kept (WhatsApp shows it), only the extension may
+        change. The original is kept if re-encoding does not make it smaller.
+        """
+        Image, ImageOps = self.pillow
+        stem, ext = os.path.splitext(os.path.basename(path))
+        with Image.open(path) as im:
+            im = ImageOps.exif_transpose(im)
+            resized = max(im.size) > self.max_side
+            if resized:
+                im.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+            if im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info):
+                name = f"{stem}.png"
+                im.save(os.path.join(out_dir, name), "PNG", optimize=True)
+            else:
+                name = f"{stem}.jpg"
+                im.convert("RGB").save(os.path.join(out_dir, name), "JPEG", quality=self.quality,
+                                       optimize=True, progressive=True)
+        out = os.path.join(out_dir, name)
+        if not resized and os.path.getsize(out) >= os.path.getsize(path):
+            os.remove(out)
+            name = os.path.basename(path)
+            shutil.copyfile(path, os.path.join(out_dir, name))
+        return name
+
+
+_cache = None
+
+
+def get_media_cache():
+    global _cache
+    if _cache is None:
+        _cache = MediaCache()
+    return _cache
+
+
+def prepare_media(media):
+    """Prepare a campaign's attachments up front: fails fast and warms the cache"""
+    return get_media_cache().prepare_all(media)
\ No newline at end of file
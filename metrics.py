@@ -0,0 +1,274 @@
+# metrics.py
+# Per-campaign send metrics: stage latency histograms, outcome counters and
+# throughput, exported as Prometheus text over HTTP and/or to a file.
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, deque
+
+import config
+from statuses import STATUS_SENT
+
+logger = logging.getLogger("metrics")
+
+# Log-spaced bucket bounds (seconds): 1 ms .. ~9 min, 25% apart, so quantiles
+# read from the buckets are within ~12% of the true value
+BUCKETS = tuple(0.001 * 1.25 ** i for i in range(60))
+QUANTILES = (0.5, 0.95, 0.99)
+RECENT_WINDOW = 60.0    # seconds covered by the "recent" throughput (sent messages only)
+KEEP_CAMPAIGNS = 20     # finished campaigns kept for the exporter
+
+STAGE_TOTAL = "total"
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Linear interpolation inside the bucket holding the q-th value"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = BUCKETS[i - 1] if i > 0 else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+class CampaignMetrics:
+    def __init__(self, campaign_id):
+        self.campaign_id = campaign_id
+        self.started = time.time()
+        self.stages = OrderedDict()
+        self.statuses = {}
+        self.errors = {}
+        self.recent = deque()
+
+    def record(self, status, duration, stages, error=None):
+        now = time.time()
+        for stage, seconds in stages.items():
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = Histogram()
+            hist.observe(seconds)
+        if STAGE_TOTAL not in self.stages:
+            self.stages[STAGE_TOTAL] = Histogram()
+        self.stages[STAGE_TOTAL].observe(duration)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        if status == STATUS_SENT:
+            self.recent.append(now)
+        while self.recent and self.recent[0] < now - RECENT_WINDOW:
+            self.recent.popleft()
+
+    def summary(self):
+        attempts = sum(self.statuses.values())
+        sent = self.statuses.get(STATUS_SENT, 0)
+        elapsed = max(time.time() - self.started, 1e-9)
+        cutoff = time.time() - RECENT_WINDOW
+        recent = sum(1 for t in self.recent if t >= cutoff)
+        return {
+            "campaign": self.campaign_id,
+            "attempts": attempts,
+            "sent": sent,
+            "error_rate": (attempts - sent) / attempts if attempts else 0.0,
+            "per_minute": sent * 60.0 / elapsed,
+            "per_minute_recent": recent * 60.0 / min(elapsed, RECENT_WINDOW),
+            "statuses": dict(self.statuses),
+            "errors": dict(self.errors),
+            "stages": {stage: {"count": h.count, **{f"p{int(q * 100)}": h.quantile(q) for q in QUANTILES}}
+                       for stage, h in self.stages.items()},
+        }
+
+
+class Metrics:
+    """Process-wide registry; the campaign being sent is `current`"""
+
+    def __init__(self):
+        self.campaigns = OrderedDict()
+        self.current = None
+        self.sessions = {}
+        self.lock = threading.RLock()  # write_file holds it around prometheus()
+        self.dirty = False
+        self.writer = None
+
+    def begin(self, campaign_id):
+        with self.lock:
+            self.current = self.campaigns.pop(campaign_id, None) or CampaignMetrics(campaign_id)
+            self.campaigns[campaign_id] = self.current
+            while len(self.campaigns) > KEEP_CAMPAIGNS:
+                self.campaigns.popitem(last=False)
+        return self.current
+
+    def record(self, status, duration, stages, error=None):
+        """One send attempt: total seconds, {stage: seconds}, error class name or None"""
+        with self.lock:
+            if self.current is None:
+                self.current = self.campaigns["default"] = CampaignMetrics("default")
+            self.current.record(status, duration, stages, error)
+            self.dirty = True
+            if config.METRICS_FILE and self.writer is None:
+                self.writer = threading.Thread(target=self._write_loop, name="metrics-file", daemon=True)
+                self.writer.start()
+
+    def _write_loop(self):
+        """Rewrite METRICS_FILE every METRICS_FILE_INTERVAL while sends come in, off the send path"""
+        while True:
+            time.sleep(config.METRICS_FILE_INTERVAL)
+            if not self.dirty or not config.METRICS_FILE:
+                continue
+            try:
+                self.write_file()
+            except OSError as e:
+                logger.warning("⚠️ Metrics file not written: %s", e)
+
+    def record_session(self, name, usage):
+        """Latest procstats.tree_usage() of a browser session"""
+        with self.lock:
+            self.sessions[name] = usage
+
+    def summary(self, campaign_id=None):
+        with self.lock:
+            campaign = self.campaigns.get(campaign_id) if campaign_id else self.current
+            return campaign.summary() if campaign is not None else None
+
+    def prometheus(self):
+        lines = [
+            "# TYPE wa_sends_total counter",
+            "# TYPE wa_send_errors_total counter",
+            "# TYPE wa_throughput_per_minute gauge",
+            "# TYPE wa_stage_duration_seconds histogram",
+            "# TYPE wa_stage_duration_quantile_seconds gauge",
+            "# TYPE wa_session_rss_bytes gauge",
+            "# TYPE wa_session_cpu_seconds_total counter",
+            "# TYPE wa_session_processes gauge",
+        ]
+        with self.lock:
+            for name, usage in self.sessions.items():
+                label = f'session="{_escape(name)}"'
+                lines.append(f"wa_session_rss_bytes{{{label}}} {usage['rss']}")
+                lines.append(f"wa_session_cpu_seconds_total{{{label}}} {usage['cpu']:.2f}")
+                lines.append(f"wa_session_processes{{{label}}} {usage['processes']}")
+            for cid, c in self.campaigns.items():
+                label = f'campaign="{_escape(cid)}"'
+                for status, n in c.statuses.items():
+                    lines.append(f'wa_sends_total{{{label},status="{status}"}} {n}')
+                for error, n in c.errors.items():
+                    lines.append(f'wa_send_errors_total{{{label},error="{_escape(error)}"}} {n}')
+                summary = c.summary()
+                lines.append(f'wa_throughput_per_minute{{{label},window="campaign"}} {summary["per_minute"]:.3f}')
+                lines.append(f'wa_throughput_per_minute{{{label},window="recent"}} '
+                             f'{summary["per_minute_recent"]:.3f}')
+                for stage, h in c.stages.items():
+                    stage_label = f'{label},stage="{stage}"'
+                    cumulative = 0
+                    for bound, n in zip(BUCKETS, h.counts):
+                        cumulative += n
+                        lines.append(f'wa_stage_duration_seconds_bucket{{{stage_label},le="{bound:.4g}"}} '
+                                     f'{cumulative}')
+                    lines.append(f'wa_stage_duration_seconds_bucket{{{stage_label},le="+Inf"}} {h.count}')
+                    lines.append(f'wa_stage_duration_seconds_sum{{{stage_label}}} {h.sum:.6f}')
+                    lines.append(f'wa_stage_duration_seconds_count{{{stage_label}}} {h.count}')
+                    for q in QUANTILES:
+                        value = h.quantile(q)
+                        if value is not None:
+                            lines.append(f'wa_stage_duration_quantile_seconds{{{stage_label},quantile="{q}"}} '
+                                         f'{value:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path=None):
+        """Atomically replace the metrics file (node_exporter textfile format)"""
+        path = path or config.METRICS_FILE
+        config.init_dirs()
+        tmp = f"{path}.{os.getpid()}.tmp"  # another process may be writing the same file
+        with self.lock:  # the final write and the writer thread take turns
+            self.dirty = False
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.prometheus())
+            os.replace(tmp, path)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_summary(summary):
+    """One line for the GUI and CLI progress views"""
+    if not summary or not summary["attempts"]:
+        return "⏱️ No sends measured yet"
+    parts = [f"⏱️ {summary['per_minute_recent']:.1f} msg/min (avg {summary['per_minute']:.1f})",
+             f"errors {summary['error_rate']:.1%}"]
+    for stage, stats in summary["stages"].items():
+        if stats["p50"] is not None:
+            parts.append(f"{stage} p50 {stats['p50']:.1f}s p95 {stats['p95']:.1f}s p99 {stats['p99']:.1f}s")
+    return " · ".join(parts)
+
+
+_metrics = Metrics()
+_remote_summary = None
+_server = None
+
+
+def get_metrics():
+    return _metrics
+
+
+def set_remote_summary(summary):
+    """Summary of a campaign that runs in another process (the session daemon)"""
+    global _remote_summary
+    _remote_summary = summary
+
+
+def latest_summary():
+    """What the progress views show: the local campaign, or the remote one if it ran in the daemon"""
+    return _remote_summary or _metrics.summary()
+
+
+def start_exporter(port=None, host="127.0.0.1"):
+    """Serve /metrics in a background thread (config.METRICS_PORT; None disables it)"""
+    global _server
+    port = port or config.METRICS_PORT
+    if _server is not None or not port:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = _metrics.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes are not worth a log line
+
+    try:
+        _server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        print(f"⚠️ Metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{port}/metrics")
+    return _server
\ No newline at end of file
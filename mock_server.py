@@ -0,0 +1,306 @@
+# mock_server.py
+# Offline stand-in for web.whatsapp.com. It serves the DOM that session.py
+# and sender.py rely on (chat list, compose box, Attach, send icon,
+# invalid-number popup, login QR, outgoing bubbles with their ticks), with
+# injectable latency and failures.
+#
+#   python mock_server.py --port 8765 --latency-ms 200 --invalid-rate 0.05
+#   WhatsAppSession(base_url="http://127.0.0.1:8765") / MessageSender(page, base_url=...)
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+DEFAULTS = {
+    "login_delay_ms": 0,    # until the chat list shows up
+    "latency_ms": 150,      # opening a chat
+    "jitter_ms": 100,       # extra random latency, 0..jitter_ms
+    "invalid_rate": 0.0,    # share of chats answered with the invalid-number popup
+    "stall_rate": 0.0,      # share of chats whose compose box never appears
+    "logout_after": 0,      # show the login QR after this many sends (0 = never)
+    "delivery_ms": 300,     # second tick this long after the first (0 = never delivered)
+    "invalid_numbers": [],  # phones that are always invalid
+}
+
+APP_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>WhatsApp (mock)</title></head>
+<body>
+<div id="side"></div>
+<div id="main"></div>
+<script>
+const side = document.getElementById('side');
+const main = document.getElementById('main');
+
+async function api(path, body) {
+    const init = body ? {method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(body)} : {};
+    return (await fetch(path, init)).json();
+}
+
+function showLogin() {
+    side.innerHTML = '';
+    main.innerHTML = '<canvas aria-label="Scan me!" width="264" height="264"></canvas>';
+}
+
+function showInvalid() {
+    const popup = document.createElement('div');
+    popup.setAttribute('data-animate-modal-popup', 'true');
+    popup.textContent = 'Phone number shared via url is invalid.';
+    document.body.appendChild(popup);
+}
+
+function el(tag, attrs, text) {
+    const node = document.createElement(tag);
+    for (const [k, v] of Object.entries(attrs)) node.setAttribute(k, v);
+    if (text) node.textContent = text;
+    return node;
+}
+
+// Outgoing messages: a bubble with a clock, one tick once the server has it,
+// two ticks after delivery_ms; the chat list row shows the last message's ticks
+function chatRow(phone, icon) {
+    const list = side.querySelector('[aria-label="Chat list"]');
+    if (!list) return;
+    let row = list.querySelector(`[data-phone="${phone}"]`);
+    if (!row) {
+        row = el('div', {role: 'listitem', 'data-phone': phone});
+        row.append(el('span', {title: '+' + phone}, '+' + phone), el('span', {}));
+        list.prepend(row);
+    }
+    row.lastChild.setAttribute('data-icon', icon);
+}
+
+async function sendOut(conversation, phone, payload, bubbles) {
+    const ticks = [];
+    for (let i = 0; i < bubbles; i++) {
+        const id = `true_${phone}@c.us_${Date.now().toString(36)}${Math.random().toString(36).slice(2, 8)}`;
+        const bubble = el('div', {'data-id': id});
+        ticks.push(bubble.appendChild(el('span', {'data-icon': 'msg-time'})));
+        conversation.appendChild(bubble);
+    }
+    const r = await api('/api/sent', payload);
+    const tick = (msg, row) => { ticks.forEach(t => t.setAttribute('data-icon', msg)); chatRow(phone, row); };
+    tick('msg-check', 'status-check');
+    if (r.delivery_ms) setTimeout(() => tick('msg-dblcheck', 'status-dblcheck'), r.delivery_ms);
+}
+
+async function openChat(params) {
+    const phone = params.get('phone') || '';
+    const r = await api('/api/open?phone=' + encodeURIComponent(phone));
+    if (r.result === 'invalid') return showInvalid();
+    if (r.result === 'logged_out') return showLogin();
+    if (r.result === 'stall') return;
+
+    // A fresh compose box per chat, like the real app
+    const conversation = el('div', {id: 'conversation'});
+    const box = el('div', {contenteditable: 'true', 'data-tab': '10'}, params.get('text') || '');
+    const attach = el('div', {title: 'Attach'}, '📎');
+    const input = el('input', {type: 'file', multiple: '', style: 'display:none'});
+    box.addEventListener('keydown', e => {
+        if (e.key !== 'Enter') return;
+        e.preventDefault();
+        sendOut(conversation, phone, {phone, text: box.textContent, media: null}, 1);
+        box.textContent = '';
+    });
+    attach.addEventListener('click', () => { input.style.display = 'block'; });
+    input.addEventListener('change', () => {
+        const send = el('span', {'data-icon': 'send'}, '➤');
+        send.addEventListener('click', () => {
+            const media = Array.from(input.files, f => f.name);
+            sendOut(conversation, phone, {phone, text: box.textContent, media}, media.length);
+            main.replaceChildren(conversation);
+        });
+        main.appendChild(send);
+    });
+    main.replaceChildren(conversation, attach, input, box);
+}
+
+// Click-to-chat links are routed inside the app, without a page load
+document.addEventListener('click', e => {
+    const link = e.target.closest ? e.target.closest('a') : null;
+    if (!link) return;
+    const url = new URL(link.href, location.href);
+    if (url.origin !== location.origin || url.pathname !== '/send') return;
+    e.preventDefault();
+    history.pushState(null, '', url.pathname + url.search);
+    openChat(url.searchParams);
+});
+
+document.addEventListener('keydown', e => {
+    if (e.key === 'Escape') document.querySelectorAll('[data-animate-modal-popup]').forEach(p => p.remove());
+});
+
+(async () => {
+    const state = await api('/api/login');
+    if (!state.logged_in) return showLogin();
+    side.innerHTML = '<div aria-label="Chat list" role="grid"></div>';
+    if (location.pathname === '/send') openChat(new URLSearchParams(location.search));
+})();
+</script>
+</body></html>
+"""
+
+
+class MockWhatsAppServer:
+    """Threaded HTTP fixture; settings can be changed while it runs (configure())"""
+
+    def __init__(self, host="127.0.0.1", port=0, **settings):
+        self.settings = dict(DEFAULTS)
+        self.configure(**settings)
+        self.lock = threading.Lock()
+        self.reset()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def configure(self, **settings):
+        unknown = set(settings) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown mock settings: {sorted(unknown)}")
+        self.settings.update(settings)
+
+    def reset(self):
+        with self.lock:
+            self.counts = {"opened": 0, "invalid": 0, "stalled": 0, "logged_out": 0, "sent": 0, "media": 0, "files": 0}
+            self.messages = deque(maxlen=1000)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="mock-whatsapp", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    # --- Behaviour ---
+    def _latency(self, base_ms):
+        time.sleep((base_ms + random.uniform(0, self.settings["jitter_ms"])) / 1000.0)
+
+    def _logged_out(self):
+        limit = self.settings["logout_after"]
+        return bool(limit) and self.counts["sent"] >= limit
+
+    def _open(self, phone):
+        self._latency(self.settings["latency_ms"])
+        with self.lock:
+            self.counts["opened"] += 1
+            if self._logged_out():
+                result = "logged_out"
+            elif phone in self.settings["invalid_numbers"] or random.random() < self.settings["invalid_rate"]:
+                result = "invalid"
+            elif random.random() < self.settings["stall_rate"]:
+                result = "stalled"
+            else:
+                result = "ok"
+            if result != "ok":
+                self.counts[result] += 1
+        return {"result": "stall" if result == "stalled" else result}
+
+    def _sent(self, payload):
+        with self.lock:
+            self.counts["sent"] += 1
+            if payload.get("media"):
+                self.counts["media"] += 1
+                self.counts["files"] += len(payload["media"])
+            self.messages.append(payload)
+        return {"ok": True, "delivery_ms": self.settings["delivery_ms"]}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _json(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path in ("/", "/send"):
+                    body = APP_HTML.encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif url.path == "/api/login":
+                    server._latency(server.settings["login_delay_ms"])
+                    with server.lock:
+                        self._json({"logged_in": not server._logged_out()})
+                elif url.path == "/api/open":
+                    self._json(server._open(parse_qs(url.query).get("phone", [""])[0]))
+                elif url.path == "/api/stats":
+                    self._json(server.stats())
+                elif url.path == "/favicon.ico":
+                    self.send_response(204)
+                    self.end_headers()
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError as e:
+                    self._json({"error": f"invalid JSON: {e}"}, 400)
+                    return
+                if self.path == "/api/sent":
+                    self._json(server._sent(payload))
+                elif self.path == "/api/config":
+                    unknown = sorted(set(payload) - set(DEFAULTS))
+                    if unknown:
+                        self._json({"error": f"unknown mock settings: {unknown}", "unknown": unknown}, 400)
+                        return
+                    server.configure(**payload)
+                    self._json(server.settings)
+                elif self.path == "/api/reset":
+                    server.reset()
+                    self._json({"ok": True})
+                else:
+                    self.send_error(404)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline mock of WhatsApp Web")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    for key, value in DEFAULTS.items():
+        if isinstance(value, list):
+            continue
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    args = vars(parser.parse_args(argv))
+    host, port = args.pop("host"), args.pop("port")
+
+    server = MockWhatsAppServer(host, port, **args).start()
+    print(f"🧪 Mock WhatsApp Web on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"📊 {server.stats()}")
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,50 @@
+# negative_cache.py
+import sqlite3
+import time
+
+import config
+
+
+class NegativeCache:
+    """Numbers known not to be on WhatsApp, remembered for `ttl_days`.
+
+    Contacts are checked against it while loading, so a known-bad number
+    never costs a navigation again until its entry expires.
+    """
+
+    def __init__(self, path=None, ttl_days=None):
+        self.path = path or config.NEGATIVE_CACHE_DB
+        self.ttl = (ttl_days or config.NEGATIVE_CACHE_TTL_DAYS) * 86400
+        config.init_dirs()
+        self.conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS bad_numbers (
+                phone   TEXT PRIMARY KEY,
+                reason  TEXT,
+                expires REAL NOT NULL
+            )
+        """)
+
+    def add(self, phone, reason):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO bad_numbers (phone, reason, expires) VALUES (?, ?, ?)",
+                (phone, reason, time.time() + self.ttl),
+            )
+
+    def remove(self, phone):
+        with self.conn:
+            self.conn.execute("DELETE FROM bad_numbers WHERE phone = ?", (phone,))
+
+    def known_bad(self):
+        """Unexpired entries as a set, for O(1) checks in the loader"""
+        rows = self.conn.execute("SELECT phone FROM bad_numbers WHERE expires > ?", (time.time(),))
+        return {phone for (phone,) in rows}
+
+    def purge_expired(self):
+        with self.conn:
+            return self.conn.execute("DELETE FROM bad_numbers WHERE expires <= ?", (time.time(),)).rowcount
+
+    def close(self):
+        self.conn.close()
\ No newline at end of file
@@ -0,0 +1,98 @@
+# pacing.py
+import logging
+import random
+import threading
+import time
+
+import config
+
+logger = logging.getLogger("pacing")
+
+# Outcomes fed back into the controller
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"
+OUTCOME_TIMEOUT = "timeout"
+
+
+class Pacer:
+    """Per-account token bucket whose refill rate is tuned with AIMD.
+
+    Every successful send adds `increase` msg/s to the rate, every failure
+    multiplies it by `decrease` (timeouts, the usual sign of throttling, by
+    `timeout_decrease`). `burst` tokens may be spent back to back after an
+    idle period. Waits are handed out as reservations, so the caller can do
+    other work (navigation, compose-box wait) before it sleeps off the rest.
+    """
+
+    def __init__(self, account="default", rate=None, burst=None, min_rate=None, max_rate=None,
+                 increase=None, decrease=0.8, timeout_decrease=0.5, jitter=None):
+        self.account = account
+        self.rate = rate or 2.0 / (config.MIN_DELAY + config.MAX_DELAY)
+        self.burst = burst or config.PACING_BURST
+        self.min_rate = min_rate or 1.0 / (config.MAX_DELAY * 4)
+        self.max_rate = max_rate or config.PACING_MAX_RATE
+        self.increase = increase or config.PACING_INCREASE
+        self.decrease = decrease
+        self.timeout_decrease = timeout_decrease
+        self.jitter = config.PACING_JITTER if jitter is None else jitter
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token now; return the monotonic time at which it may be used"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            # Jitter only ever delays, by up to `jitter` of one interval
+            wait += random.uniform(0, self.jitter / self.rate)
+            return now + wait
+
+    def refund(self):
+        """Give back a reserved token that was never used for a send"""
+        with self.lock:
+            self.tokens = min(self.burst, self.tokens + 1)
+
+    def wait_until(self, ready_at, stop=None):
+        """Sleep until ready_at; False if `stop` (a threading.Event) was set first"""
+        delay = ready_at - time.monotonic()
+        if stop is None:
+            if delay > 0:
+                time.sleep(delay)
+            return True
+        return not stop.wait(max(0.0, delay))
+
+    def wait(self):
+        self.wait_until(self.reserve())
+
+    def record(self, outcome):
+        with self.lock:
+            old = self.rate
+            if outcome == OUTCOME_OK:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            elif outcome == OUTCOME_TIMEOUT:
+                self.rate = max(self.min_rate, self.rate * self.timeout_decrease)
+            else:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+            new = self.rate
+        level = logging.DEBUG if outcome == OUTCOME_OK else logging.INFO
+        logger.log(level, "pacing[%s] %s: %.4f -> %.4f msg/s (%.1fs/msg)",
+                   self.account, outcome, old, new, 1.0 / new)
+
+
+_pacers = {}
+_pacers_lock = threading.Lock()
+
+
+def get_pacer(account="default"):
+    """One shared Pacer per account (browser profile), whatever sends through it"""
+    with _pacers_lock:
+        if account not in _pacers:
+            _pacers[account] = Pacer(account)
+        return _pacers[account]
\ No newline at end of file
@@ -0,0 +1,200 @@
+# phones.py
+import numpy as np
+import pandas as pd
+
+# --- Country rules: calling code, national trunk prefix, national number shapes ---
+# Shapes are per-digit: a literal digit, "X" for any digit or "[a-b]" for a range.
+# Mobile ranges only, since every recipient has to be on WhatsApp.
+COUNTRY_RULES = {
+    "BD": {"code": "880", "trunk": "0", "nsn": ["1[3-9]XXXXXXXX"]},
+    "IN": {"code": "91", "trunk": "0", "nsn": ["[6-9]XXXXXXXXX"]},
+    "PK": {"code": "92", "trunk": "0", "nsn": ["3XXXXXXXXX"]},
+    "LK": {"code": "94", "trunk": "0", "nsn": ["7XXXXXXXX"]},
+    "NP": {"code": "977", "trunk": "", "nsn": ["9[7-8]XXXXXXXX"]},
+    "MY": {"code": "60", "trunk": "0", "nsn": ["1XXXXXXXX", "1XXXXXXXXX"]},
+    "AE": {"code": "971", "trunk": "0", "nsn": ["5XXXXXXXX"]},
+    "SA": {"code": "966", "trunk": "0", "nsn": ["5XXXXXXXX"]},
+    "GB": {"code": "44", "trunk": "0", "nsn": ["7XXXXXXXXX"]},
+    "US": {"code": "1", "trunk": "", "nsn": ["[2-9]XX[2-9]XXXXXX"]},
+}
+DEFAULT_COUNTRY = "BD"
+
+# Reject reasons
+REJECT_EMPTY = "empty"
+REJECT_UNKNOWN_COUNTRY = "unknown_country"
+REJECT_BAD_NUMBER = "bad_number"
+
+MAX_DIGITS = 16  # E.164 allows 15
+
+
+def _shape(pattern):
+    """'1[3-9]XX' -> [(1, 1), (3, 9), (0, 9), (0, 9)]"""
+    ranges = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "X":
+            ranges.append((0, 9))
+        elif ch == "[":
+            ranges.append((int(pattern[i + 1]), int(pattern[i + 3])))
+            i += 4
+        else:
+            ranges.append((int(ch), int(ch)))
+        i += 1
+    return ranges
+
+
+# bytes.translate delete-tables; "\0" is kept because it separates the values
+_DROP_ALL_BUT_DIGITS = bytes(b for b in range(1, 256) if not 48 <= b <= 57)
+_DROP_ALL_BUT_DIGITS_AND_PLUS = bytes(b for b in range(1, 256) if not (48 <= b <= 57 or b == 43))
+
+
+def _cell_text(value):
+    """One cell as text; a float phone number (Excel, CSV) is printed without its '.0'"""
+    if isinstance(value, float):
+        return "" if value != value else f"{value:.0f}"
+    return "" if value is None or value is pd.NA else str(value)
+
+
+def _digit_matrix(values):
+    """Strings -> (n, MAX_DIGITS) int8 matrix of their digits (-1 padded), lengths, '+' mask.
+
+    The whole column is joined into one buffer and cleaned with bytes.translate,
+    so the per-character work happens in C rather than once per row in Python.
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    if s.dtype.kind == "f":  # numbers read from Excel/CSV as floats
+        s = s.map(_cell_text)
+    n = len(s)
+    try:
+        blob = "\0".join(s.tolist())  # the usual all-str column, without a conversion pass
+    except TypeError:  # NaN, None, ints or floats mixed in
+        s = s.map(_cell_text)
+        blob = "\0".join(s.tolist())
+    blob = blob.encode("ascii", "ignore")
+    if blob.count(b"\0") != max(n - 1, 0):
+        blob = "\0".join(s.astype(str).str.replace("\0", "", regex=False).tolist()).encode(
+            "ascii", "ignore")
+
+    # "+" counts only as the first kept character of a value: look right after each separator
+    kept = np.frombuffer(blob.translate(None, _DROP_ALL_BUT_DIGITS_AND_PLUS) + b"\0", dtype=np.uint8)
+    starts = np.concatenate(([0], np.flatnonzero(kept == 0)[:-1] + 1))
+    plus = kept[starts] == ord("+")
+
+    only_digits = blob.translate(None, _DROP_ALL_BUT_DIGITS)
+    ends = np.flatnonzero(np.frombuffer(only_digits + b"\0", dtype=np.uint8) == 0)
+    lengths = np.diff(ends, prepend=-1).astype(np.int16) - 1
+    raw = np.array(only_digits.split(b"\0"), dtype=f"S{MAX_DIGITS}").view(np.uint8).reshape(n, MAX_DIGITS)
+    digits = raw.astype(np.int8) - ord("0")
+    digits[raw == 0] = -1
+    # Column-major: the rule matching below compares one digit position across all rows at a time
+    return np.asfortranarray(digits), lengths, plus
+
+
+def _matches(digits, lengths, start, ranges):
+    ok = lengths == start + len(ranges)
+    for i, (lo, hi) in enumerate(ranges, start):
+        if i >= digits.shape[1]:
+            return np.zeros(len(digits), dtype=bool)
+        ok &= (digits[:, i] >= lo) & (digits[:, i] <= hi)
+    return ok
+
+
+def _to_strings(digits, prefix=""):
+    as_bytes = np.where(digits >= 0, digits + ord("0"), 0).astype(np.uint8)
+    if prefix:
+        lead = np.full((len(digits), len(prefix)), list(prefix.encode()), dtype=np.uint8)
+        as_bytes = np.hstack([lead, as_bytes])
+    width = as_bytes.shape[1]
+    return np.ascontiguousarray(as_bytes).view(f"S{width}").ravel().astype(str)
+
+
+def normalize_phones(values, default_country=DEFAULT_COUNTRY, countries=None) -> pd.DataFrame:
+    """Normalize a whole column of phone numbers at once.
+
+    Every number is turned into a row of a digit matrix and matched against
+    the rule table with numpy comparisons, so there is no per-row Python
+    code. Numbers without "+" or "00" are first tried as national numbers of
+    `default_country` (with or without trunk "0"), then as international
+    numbers of every country in the table. Nothing is raised per row; the
+    result is aligned with the input and has these columns:
+
+        phone    digits for ?phone= (E.164 without "+"), None if invalid
+        e164     "+<code><number>", None if invalid
+        country  ISO code of the matching rule
+        valid    bool mask
+        reason   None, "empty", "unknown_country" or "bad_number"
+    """
+    rules = {k: COUNTRY_RULES[k] for k in (countries or COUNTRY_RULES)}
+    if default_country not in rules:
+        raise ValueError(f"Unknown default country: {default_country}")
+
+    index = values.index if isinstance(values, pd.Series) else None
+    if len(values) == 0:
+        return pd.DataFrame({col: pd.Series(dtype=object) for col in ("phone", "e164", "country", "reason")}
+                            ).assign(valid=pd.Series(dtype=bool))[["phone", "e164", "country", "valid", "reason"]]
+    digits, lengths, plus = _digit_matrix(values)
+    n = len(digits)
+
+    dial_00 = (digits[:, 0] == 0) & (digits[:, 1] == 0) & ~plus
+    digits[dial_00, :-2] = digits[dial_00, 2:]
+    digits[dial_00, -2:] = -1
+    lengths = np.where(dial_00, lengths - 2, lengths)
+    international = plus | dial_00
+
+    out = np.full_like(digits, -1)
+    country = np.full(n, None, dtype=object)
+    resolved = np.zeros(n, dtype=bool)
+
+    # National numbers of the default country: 017..., 17...
+    rule = rules[default_country]
+    code = [int(c) for c in rule["code"]]
+    trunk = _shape(rule["trunk"])
+    for shape in map(_shape, rule["nsn"]):
+        for start in {0, len(trunk)}:
+            hit = ~resolved & ~international & _matches(digits, lengths, 0, trunk[:start] + shape)
+            if not hit.any():
+                continue
+            out[hit, :len(code)] = code
+            out[hit, len(code):] = digits[hit, start:start + MAX_DIGITS - len(code)]
+            country[hit] = default_country
+            resolved |= hit
+
+    # International numbers: 88017..., +91..., 0044...
+    known_code = np.zeros(n, dtype=bool)
+    for iso, rule in rules.items():
+        code = _shape(rule["code"])
+        has_code = ~resolved & (lengths > len(code))
+        for i, (d, _) in enumerate(code):
+            has_code &= digits[:, i] == d
+        if not has_code.any():
+            continue
+        known_code |= has_code
+        for shape in map(_shape, rule["nsn"]):
+            hit = has_code & ~resolved & _matches(digits, lengths, 0, code + shape)
+            out[hit] = digits[hit]
+            country[hit] = iso
+            resolved |= hit
+
+    # Strings are built for the valid rows only, and "+" is prepended to those, not re-rendered
+    phone = np.full(n, None, dtype=object)
+    e164 = np.full(n, None, dtype=object)
+    if resolved.any():
+        valid = pd.Series(_to_strings(out[resolved]), dtype=object)
+        phone[resolved] = valid.to_numpy()
+        e164[resolved] = ("+" + valid).to_numpy()
+
+    # A trunk-prefixed number of the wrong length is a bad number, not a foreign one
+    trunk_digit = int(rules[default_country]["trunk"] or -1)
+    looks_national = ~international & (digits[:, 0] == trunk_digit)
+    reason = np.where(known_code | looks_national, REJECT_BAD_NUMBER, REJECT_UNKNOWN_COUNTRY).astype(object)
+    reason[lengths <= 0] = REJECT_EMPTY
+    reason[resolved] = None
+
+    return pd.DataFrame({
+        "phone": phone,
+        "e164": e164,
+        "country": country,
+        "valid": resolved,
+        "reason": reason,
+    }, index=index)
\ No newline at end of file
@@ -0,0 +1,279 @@
+# pool.py
+import logging
+import multiprocessing as mp
+import os
+import queue
+
+import config
+from logsetup import setup_logging, listen
+from metrics import get_metrics
+
+logger = logging.getLogger("pool")
+
+RESULT_WAIT = 5.0  # seconds between checks for exited workers while no result comes in
+
+def default_profile_dirs(count):
+    """One persistent Chromium profile per worker: ~/whatsapp_profile_1, _2, ..."""
+    return [os.path.expanduser(f"~/whatsapp_profile_{i + 1}") for i in range(count)]
+
+def _worker(profile_dir, tasks, results, media_path, headless, log_queue, taken):
+    """Worker process: own browser profile, own MessageSender, pulls contacts until sentinel.
+
+    `taken` (a shared int) is set to each contact's index as soon as it is
+    taken off the queue. Unlike a queued message it is visible to the parent
+    at once, even if the process is killed right after.
+    """
+    setup_logging(log_queue=log_queue)  # records go to the parent's log files
+    # Timings travel back with each result; only the parent writes and serves metrics
+    config.METRICS_FILE = None
+    config.METRICS_PORT = None
+    from session import WhatsAppSession
+    from sender import MessageSender
+    from pacing import get_pacer
+    from negative_cache import NegativeCache
+    from retry import classify, SESSION, TRANSIENT
+
+    session = WhatsAppSession(user_data_dir=profile_dir, lean=config.LEAN_MODE)
+    if not session.start(headless=headless):
+        results.put(("dead", profile_dir, None))
+        return
+    results.put(("ready", profile_dir, None))
+
+    negative_cache = NegativeCache()
+    sender = MessageSender(session.page, pacer=get_pacer(profile_dir), negative_cache=negative_cache)
+    reconnects = 0
+    try:
+        while True:
+            item = tasks.get()
+            if item is None:
+                break
+            index, contact = item
+            taken.value = index  # the parent knows what dies with this worker
+            sender.attempt = None
+            deliveries = {}
+            try:
+                ok = sender.send_message(contact['phone'], contact['message'], media_path)
+                error = None if ok else sender.last_status
+                failure = None if ok else classify(sender.last_status, sender.last_error)
+                # Tick states the page reported meanwhile, for any contact this worker sent
+                deliveries = sender.delivery_updates()
+            except Exception as e:
+                logger.exception("💥 [%s] Error sending to %s: %s", profile_dir, contact['phone'], e)
+                ok, error, failure = False, str(e), TRANSIENT
+            # Stage timings travel with the result; metrics are kept by the parent
+            attempt = sender.attempt
+            timing = None
+            if attempt is not None and attempt.duration is not None:
+                timing = (attempt.status, attempt.duration, attempt.stages, attempt.error)
+            results.put(("sent" if ok else "failed", profile_dir,
+                         (index, contact, error, failure, timing, deliveries)))
+            if failure == SESSION:
+                # The parent retries the contact; this worker needs a working browser first
+                reconnects += 1
+                if reconnects > config.MAX_RECONNECTS or not session.reconnect():
+                    results.put(("dead", profile_dir, None))
+                    return
+                sender.page = session.page
+    finally:
+        negative_cache.close()
+        session.close()
+        results.put(("done", profile_dir, None))
+
+
+class SessionPool:
+    """Runs N logged-in WhatsApp profiles in parallel, one worker process each.
+
+    Contacts go into one shared task queue, so whichever worker is free picks
+    up the next contact. Results from every worker come back on one queue and
+    are merged into the usual (sent, total, failed) progress stream.
+    """
+
+    def __init__(self, profile_dirs, headless=None, worker=None):
+        if not profile_dirs:
+            raise ValueError("SessionPool needs at least one profile directory")
+        self.profile_dirs = list(profile_dirs)
+        self.headless = headless
+        self.worker = worker or _worker  # a module-level stand-in can replace the browser worker
+        # Playwright does not survive fork(); always spawn fresh interpreters
+        self.ctx = mp.get_context("spawn")
+        self.processes = []
+
+    def run(self, contacts, message, media_path=None, total=None, journal=None, already_sent=0):
+        """Feed `contacts` (any iterable, consumed lazily) to the workers.
+
+        `total` is only used for progress; pass a pre-counted value when
+        `contacts` is a stream. Results are journaled here in the dispatcher,
+        so workers never touch the journal database.
+        """
+        from journal import STATUS_SENT, STATUS_FAILED
+        from template_registry import Template
+        from retry import RetryQueue, PERMANENT
+
+        if total is None:
+            contacts = list(contacts)
+            total = len(contacts)
+        contacts = Template(message).render_stream(contacts)
+        tasks = self.ctx.Queue()
+        results = self.ctx.Queue()
+        log_queue = self.ctx.Queue()
+        log_listener = listen(log_queue)
+
+        taken = {}  # profile_dir -> index of the contact that worker took last (-1: none yet)
+        for profile_dir in self.profile_dirs:
+            taken[profile_dir] = self.ctx.Value("q", -1, lock=False)
+            p = self.ctx.Process(
+                target=self.worker,
+                args=(profile_dir, tasks, results, media_path, self.headless, log_queue, taken[profile_dir]),
+                daemon=True,
+            )
+            p.start()
+            self.processes.append((profile_dir, p))
+
+        # Keep the shared queue shallow so a dead worker can't swallow the whole list
+        max_queued = 2 * len(self.profile_dirs)
+        next_index = 0
+        exhausted = False
+        in_flight = {}
+        processed = already_sent
+        stopped = set()
+        sent = already_sent
+        failed = []
+        # Failed contacts come back through here, ahead of fresh ones once their backoff is over
+        retries = RetryQueue()
+
+        try:
+            while (in_flight or not exhausted or retries) and len(stopped) < len(self.profile_dirs):
+                while len(in_flight) < max_queued:
+                    item = retries.pop_due()
+                    if item is None and not exhausted:
+                        contact = next(contacts, None)
+                        if contact is None:
+                            exhausted = True
+                        else:
+                            item = (contact, 1)
+                    if item is None:
+                        break
+                    in_flight[next_index] = item
+                    tasks.put((next_index, item[0]))
+                    next_index += 1
+
+                if not in_flight and not retries:
+                    break
+
+                wait = RESULT_WAIT if in_flight else min(RESULT_WAIT, max(0.05, retries.wait_time()))
+                # Only a process that has exited is gone; a live one that is quiet may be logging
+                # in, reconnecting or waiting on a slow page. An exited process has flushed what
+                # it put, so once the queue runs dry nothing more is coming from it.
+                exited = {d for d, p in self.processes if not p.is_alive()} - stopped
+                try:
+                    kind, profile_dir, item = results.get(timeout=wait)
+                    gone = set()
+                except queue.Empty:
+                    kind = None
+                    gone = exited
+
+                if kind == "ready":
+                    logger.info("✅ Worker ready: %s", profile_dir)
+                elif kind in ("dead", "done"):
+                    if profile_dir not in stopped:
+                        gone.add(profile_dir)
+                elif kind is not None:
+                    index, contact, error, failure, timing, deliveries = item
+                    if timing is not None:
+                        get_metrics().record(*timing)
+                    if journal is not None:
+                        for phone, state in deliveries.items():
+                            journal.record_delivery(phone, state)
+                    _, attempt = in_flight.pop(index, (contact, 1))
+                    if kind == "failed" and failure != PERMANENT and retries.schedule(contact, attempt):
+                        logger.info("🔁 %s failed (%s), retry %d of %d later", contact['phone'], error, attempt,
+                                    retries.max_retries)
+                        continue
+                    processed += 1
+                    if kind == "sent":
+                        sent += 1
+                    else:
+                        failed.append(contact)
+                    if journal is not None:
+                        journal.record(contact['phone'], contact['name'],
+                                       STATUS_SENT if kind == "sent" else STATUS_FAILED, error)
+                    yield sent, max(total, processed), failed
+
+                for profile_dir in gone:
+                    stopped.add(profile_dir)
+                    logger.warning("⚠️ Worker stopped: %s", profile_dir)
+                    index = taken[profile_dir].value
+                    if index not in in_flight:
+                        continue  # it was idle: its last contact already has a result
+                    # Died mid-send (crash, OOM kill) or before its result got out: the message
+                    # may be out, so no blind resend
+                    contact, _ = in_flight.pop(index)
+                    processed += 1
+                    failed.append(contact)
+                    if journal is not None:
+                        journal.record(contact['phone'], contact['name'], STATUS_FAILED, "worker stopped")
+                    yield sent, max(total, processed), failed
+
+            if in_flight or not exhausted or retries:
+                # Every worker is gone. Contacts that failed and were waiting for a retry are
+                # final now; the queued and unread ones were never tried and stay pending for a
+                # resume (like campaign.send_contacts), and the stream is not read any further.
+                lost = [c for c, _ in retries.drain()]
+                failed.extend(lost)
+                if journal is not None:
+                    for contact in lost:
+                        journal.record(contact['phone'], contact['name'], STATUS_FAILED, "worker stopped")
+                processed += len(lost)
+                logger.error("❌ All workers stopped after %d contacts; the rest is left for a resume.", processed)
+            yield sent, processed, failed
+        finally:
+            self.close(tasks)
+            log_listener.stop()
+
+    def close(self, tasks=None):
+        if tasks is not None:
+            for _ in self.processes:
+                tasks.put(None)
+        for _, p in self.processes:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+        self.processes = []
+
+
+def run_pool_yielding(contact_file, message, media_path=None, workers=2, profile_dirs=None, headless=None,
+                      campaign_id=None, resume=False):
+    """Same contract as main.run_sender_yielding, spread over several profiles"""
+    from utils import export_failed_contacts
+    from contact_store import ContactStore
+    from journal import SendJournal, campaign_id_for
+    from campaign import check_campaign, log_deliveries
+
+    # Raises before any worker starts. Media is prepared once here; the workers
+    # find the copies in the on-disk cache
+    total, _, media = check_campaign(contact_file, message, media_path)
+    if not total:
+        yield 0, 0, []
+        return
+    journal = store = None
+    try:
+        journal = SendJournal(campaign_id or campaign_id_for(contact_file, message, media_path))
+        get_metrics().begin(journal.campaign_id)
+        store = ContactStore()
+        contacts = store.stream(contact_file, journal.campaign_id)
+        if resume:
+            contacts = journal.pending(contacts)
+
+        pool = SessionPool(profile_dirs or default_profile_dirs(workers), headless=headless)
+        yield from pool.run(contacts, message, media, total=total,
+                            journal=journal, already_sent=journal.resumed)
+        log_deliveries(journal)
+        if journal.counts().get("failed"):
+            export_failed_contacts(journal=journal)
+    finally:
+        if journal is not None:
+            journal.close()
+        if store is not None:
+            store.close()
+        if config.METRICS_FILE:
+            get_metrics().write_file()
\ No newline at end of file
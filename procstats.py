@@ -0,0 +1,65 @@
+# procstats.py
+# Memory and CPU of a process and everything it started (Playwright driver,
+# Chromium and its renderers), read straight from /proc. Linux only.
+import os
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _stat_fields(pid):
+    with open(f"/proc/{pid}/stat", "r") as f:
+        stat = f.read()
+    # The command name may contain spaces and parentheses; fields start after the last ')'
+    return stat[stat.rfind(")") + 2:].split()
+
+
+def _children():
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            ppid = int(_stat_fields(entry)[1])
+        except (OSError, IndexError, ValueError):
+            continue  # exited while we were looking
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def children(pid=None):
+    """Direct child pids of `pid` (default: this process)"""
+    if not os.path.isdir("/proc"):
+        return []
+    return _children().get(pid or os.getpid(), [])
+
+
+def process_tree(pid=None):
+    pid = pid or os.getpid()
+    children = _children()
+    tree, todo = [], [pid]
+    while todo:
+        current = todo.pop()
+        tree.append(current)
+        todo.extend(children.get(current, ()))
+    return tree
+
+
+def tree_usage(pid=None):
+    """{"rss": bytes, "cpu": seconds, "processes": n} for `pid` and its descendants.
+
+    None where /proc is not available.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    rss = cpu_ticks = count = 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/statm", "r") as f:
+                rss += int(f.read().split()[1]) * PAGE_SIZE
+            fields = _stat_fields(p)
+            cpu_ticks += int(fields[11]) + int(fields[12])  # utime + stime
+            count += 1
+        except (OSError, IndexError, ValueError):
+            continue
+    return {"rss": rss, "cpu": cpu_ticks / CLOCK_TICKS, "processes": count}
\ No newline at end of file
@@ -0,0 +1,266 @@
+# profiles.py
+# Browser profile tooling: snapshot a logged-in profile with only the state
+# WhatsApp Web needs, prune Chromium caches, and restore/clone snapshots with
+# copy-on-write (cp --reflink / clonefile) where the filesystem supports it.
+#
+#   python -m profiles snapshot ~/whatsapp_profile_1
+#   python -m profiles prune ~/whatsapp_profile_1
+#   python -m profiles clone whatsapp_profile_1 /tmp/wa_test_profile
+#   python -m profiles list
+#
+# WhatsApp links every browser as its own device: a clone shares the login of
+# its snapshot, so run one browser per snapshot at a time. Each extra worker
+# still needs one QR login, after which its snapshot restores it in seconds.
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import config
+
+logger = logging.getLogger("profiles")
+
+MANIFEST = ".snapshot.json"
+
+# What a logged-in WhatsApp Web profile needs: cookies, localStorage and
+# IndexedDB (where the device keys live), plus Chromium's own settings and
+# the cookie encryption key in "Local State". Paths are relative to the profile.
+KEEP = (
+    "Local State",
+    ".wa_login.json",  # session.LOGIN_MARKER
+    "Default/Preferences",
+    "Default/Secure Preferences",
+    "Default/Cookies",
+    "Default/Cookies-journal",
+    "Default/Network/Cookies",
+    "Default/Network/Cookies-journal",
+    "Default/Local Storage",
+    "Default/IndexedDB",
+)
+
+# Caches and service-worker storage that Chromium and WhatsApp rebuild on
+# demand, plus the browsing-history databases that only ever grow
+JUNK = (
+    "Crashpad",
+    "Crash Reports",
+    "BrowserMetrics",
+    "GrShaderCache",
+    "GraphiteDawnCache",
+    "ShaderCache",
+    "component_crx_cache",
+    "extensions_crx_cache",
+    "segmentation_platform",
+    "Safe Browsing",
+    "OptimizationHints",
+    "Default/Cache",
+    "Default/Code Cache",
+    "Default/GPUCache",
+    "Default/DawnGraphiteCache",
+    "Default/DawnWebGPUCache",
+    "Default/Service Worker/CacheStorage",
+    "Default/Service Worker/ScriptCache",
+    "Default/Shared Dictionary",
+    "Default/optimization_guide_hint_cache_store",
+    "Default/Safe Browsing Network",
+    "Default/History",
+    "Default/History-journal",
+    "Default/Favicons",
+    "Default/Favicons-journal",
+    "Default/Top Sites",
+    "Default/Top Sites-journal",
+)
+
+# Present while a Chromium instance has the profile open
+LOCK_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+
+
+def dir_size(path):
+    if os.path.isfile(path) or os.path.islink(path):
+        return os.lstat(path).st_size
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def junk_size(profile):
+    return sum(dir_size(os.path.join(profile, p)) for p in JUNK if os.path.lexists(os.path.join(profile, p)))
+
+
+def in_use(profile):
+    return any(os.path.lexists(os.path.join(profile, name)) for name in LOCK_FILES)
+
+
+def _remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def prune(profile):
+    """Delete caches from a profile that is not open; returns the bytes freed"""
+    if in_use(profile):
+        raise RuntimeError(f"Profile is open in a browser: {profile}")
+    freed = 0
+    for rel in JUNK:
+        path = os.path.join(profile, rel)
+        if os.path.lexists(path):
+            freed += dir_size(path)
+            _remove(path)
+    logger.info("🧹 Pruned %s: %.1f MB freed", profile, freed / 2**20)
+    return freed
+
+
+def snapshot_path(name):
+    return os.path.join(config.PROFILE_SNAPSHOTS_DIR, name)
+
+
+def snapshot_name(profile):
+    return os.path.basename(os.path.normpath(profile))
+
+
+def snapshot(profile, name=None):
+    """Copy the login state of `profile` (not open in a browser) into a snapshot; returns its path.
+
+    The snapshot is written next to its final place and renamed over it,
+    so a crash never leaves a half-written snapshot behind.
+    """
+    if in_use(profile):
+        raise RuntimeError(f"Profile is open in a browser: {profile}")
+    name = name or snapshot_name(profile)
+    dest = snapshot_path(name)
+    os.makedirs(config.PROFILE_SNAPSHOTS_DIR, exist_ok=True)
+    staging = f"{dest}.tmp-{os.getpid()}"
+    _remove(staging)
+    copied = 0
+    for rel in KEEP:
+        src = os.path.join(profile, rel)
+        if not os.path.lexists(src):
+            continue
+        target = os.path.join(staging, rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.isdir(src):
+            shutil.copytree(src, target, symlinks=True, ignore=shutil.ignore_patterns("LOCK"))
+        else:
+            shutil.copy2(src, target)
+        copied += dir_size(target)
+    if not copied:
+        _remove(staging)
+        raise FileNotFoundError(f"No login state found in {profile}")
+    with open(os.path.join(staging, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump({"source": os.path.abspath(profile), "created": time.time(), "bytes": copied}, f)
+
+    old = f"{dest}.old-{os.getpid()}"
+    if os.path.exists(dest):
+        os.rename(dest, old)
+    os.rename(staging, dest)
+    _remove(old)
+    logger.info("📸 Snapshot %s: %.1f MB (profile was %.1f MB)", name, copied / 2**20, dir_size(profile) / 2**20)
+    return dest
+
+
+def _copy_tree(src, dest):
+    """Copy-on-write where the filesystem can (btrfs/XFS reflinks, APFS clones), a plain copy elsewhere"""
+    if sys.platform.startswith("linux"):
+        cmd = ["cp", "-a", "--reflink=auto", src, dest]
+    elif sys.platform == "darwin":
+        cmd = ["cp", "-c", "-R", "-p", src, dest]
+    else:
+        cmd = None
+    if cmd is not None:
+        try:
+            subprocess.run(cmd, check=True, capture_output=True)
+            return
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.debug("cp failed (%s), copying in Python", e)
+            _remove(dest)
+    shutil.copytree(src, dest, symlinks=True)
+
+
+def clone(name, dest):
+    """New profile directory `dest` from snapshot `name`; `dest` must not exist yet"""
+    src = snapshot_path(name)
+    if not os.path.isdir(src):
+        raise FileNotFoundError(f"No snapshot named {name!r} in {config.PROFILE_SNAPSHOTS_DIR}")
+    if os.path.exists(dest):
+        raise FileExistsError(f"Profile already exists: {dest}")
+    start = time.perf_counter()
+    _copy_tree(src, dest)
+    _remove(os.path.join(dest, MANIFEST))
+    logger.info("🧬 Profile %s cloned from %s in %.2f s", dest, name, time.perf_counter() - start)
+    return dest
+
+
+def snapshots():
+    """[{"name", "source", "created", "bytes"}] of the saved snapshots"""
+    result = []
+    if not os.path.isdir(config.PROFILE_SNAPSHOTS_DIR):
+        return result
+    for name in sorted(os.listdir(config.PROFILE_SNAPSHOTS_DIR)):
+        try:
+            with open(os.path.join(snapshot_path(name), MANIFEST), "r", encoding="utf-8") as f:
+                result.append({"name": name, **json.load(f)})
+        except (OSError, ValueError):
+            continue  # staging leftovers and foreign directories
+    return result
+
+
+def maintain(profile):
+    """Called before a session launches its browser.
+
+    A missing profile is restored from its snapshot (no QR scan needed),
+    and one whose caches grew past PROFILE_PRUNE_MB is pruned, so launch
+    time does not creep up over months of use.
+    """
+    name = snapshot_name(profile)
+    if not os.path.exists(profile) and os.path.isdir(snapshot_path(name)):
+        return clone(name, profile)
+    if os.path.isdir(profile) and config.PROFILE_PRUNE_MB and not in_use(profile):
+        if junk_size(profile) > config.PROFILE_PRUNE_MB * 2**20:
+            prune(profile)
+    return profile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Browser profile snapshots and cache pruning")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("snapshot", help="save the login state of a closed profile")
+    p.add_argument("profile")
+    p.add_argument("--name", help="snapshot name (default: the profile's directory name)")
+    p = sub.add_parser("clone", help="create a profile from a snapshot")
+    p.add_argument("name")
+    p.add_argument("dest")
+    p = sub.add_parser("prune", help="delete caches from a closed profile")
+    p.add_argument("profiles", nargs="+")
+    sub.add_parser("list", help="list snapshots")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.cmd == "snapshot":
+            print(f"📸 {snapshot(os.path.expanduser(args.profile), args.name)}")
+        elif args.cmd == "clone":
+            print(f"🧬 {clone(args.name, os.path.expanduser(args.dest))}")
+        elif args.cmd == "prune":
+            for profile in args.profiles:
+                print(f"🧹 {profile}: {prune(os.path.expanduser(profile)) / 2**20:.1f} MB freed")
+        else:
+            for snap in snapshots():
+                created = time.strftime("%Y-%m-%d %H:%M", time.localtime(snap["created"]))
+                print(f"{snap['name']:<28} {snap['bytes'] / 2**20:7.2f} MB  {created}  {snap['source']}")
+    except (OSError, RuntimeError) as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,118 @@
+# retry.py
+# Failure classification and the delayed retry lane. Transient failures come
+# back after an exponential backoff, slotted in between fresh contacts;
+# permanent ones are final; session-level ones need a reconnect first.
+import heapq
+import itertools
+import random
+import time
+
+import config
+from statuses import STATUS_INVALID, STATUS_LOGGED_OUT, STATUS_UNCONFIRMED
+
+TRANSIENT = "transient"    # timeouts, detached frames, anything unexpected
+PERMANENT = "permanent"    # number is not on WhatsApp, or send was pressed and then something failed
+SESSION = "session"        # logged out or the browser is gone
+
+# Playwright errors that mean the page/browser itself died, not this chat
+SESSION_ERRORS = ("Target page, context or browser has been closed", "Browser has been closed",
+                  "Target closed", "Connection closed")
+
+BACKOFF_JITTER = 0.2  # +-20%, so retries of one burst of failures spread out
+
+
+def classify(status, error=None):
+    """TRANSIENT, PERMANENT or SESSION for a MessageSender.last_status / last_error pair"""
+    if status in (STATUS_INVALID, STATUS_UNCONFIRMED):
+        return PERMANENT
+    if status == STATUS_LOGGED_OUT:
+        return SESSION
+    if error and any(marker in error for marker in SESSION_ERRORS):
+        return SESSION
+    return TRANSIENT
+
+
+def backoff(attempt, base=None, cap=None):
+    """Seconds to wait after failed attempt number `attempt` (1-based)"""
+    base = config.RETRY_BASE_DELAY if base is None else base
+    cap = config.RETRY_MAX_DELAY if cap is None else cap
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay * random.uniform(1 - BACKOFF_JITTER, 1 + BACKOFF_JITTER)
+
+
+class RetryQueue:
+    """Contacts waiting for another attempt, ordered by due time.
+
+    A contact is retried at most `max_retries` times. Nothing here blocks
+    the fresh contacts: interleave() hands out a due retry before the next
+    fresh contact and only sleeps once the fresh ones have run out.
+    """
+
+    def __init__(self, max_retries=None, base_delay=None, max_delay=None):
+        self.max_retries = config.MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.heap = []
+        self.seq = itertools.count()  # ties never compare the contact dicts
+
+    def __len__(self):
+        return len(self.heap)
+
+    def schedule(self, contact, attempt, now=None):
+        """Queue another try after failed attempt `attempt`; False once the retries are used up"""
+        if attempt > self.max_retries:
+            return False
+        now = time.monotonic() if now is None else now
+        due = now + backoff(attempt, self.base_delay, self.max_delay)
+        heapq.heappush(self.heap, (due, next(self.seq), contact, attempt + 1))
+        return True
+
+    def pop_due(self, now=None):
+        """(contact, attempt) of a retry that is due, or None"""
+        now = time.monotonic() if now is None else now
+        if self.heap and self.heap[0][0] <= now:
+            _, _, contact, attempt = heapq.heappop(self.heap)
+            return contact, attempt
+        return None
+
+    def wait_time(self, now=None):
+        """Seconds until the next retry is due (0 if one is), None when empty"""
+        if not self.heap:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.heap[0][0] - now)
+
+    def drain(self):
+        """Everything still waiting, as (contact, attempt); empties the queue"""
+        items = [(contact, attempt) for _, _, contact, attempt in sorted(self.heap)]
+        self.heap = []
+        return items
+
+    def interleave(self, contacts, stop=None):
+        """Yield (contact, attempt): due retries first, then the next fresh contact (attempt 1).
+
+        Setting `stop` (a threading.Event) ends it at once, even mid-backoff;
+        whatever is still queued stays unsent.
+        """
+        contacts = iter(contacts)
+        exhausted = False
+        while True:
+            if stop is not None and stop.is_set():
+                return
+            item = self.pop_due()
+            if item is not None:
+                yield item
+                continue
+            if not exhausted:
+                contact = next(contacts, None)
+                if contact is not None:
+                    yield contact, 1
+                    continue
+                exhausted = True
+            wait = self.wait_time()
+            if wait is None:
+                return
+            if stop is None:
+                time.sleep(wait)
+            else:
+                stop.wait(wait)
\ No newline at end of file
@@ -1,20 +1,526 @@
 # scheduler.py
+# Persistent job scheduler: one thread waits on a heap of upcoming run times,
+# jobs live in SQLite and survive restarts, due jobs run on a fixed pool.
+#
+#   python scheduler.py serve
+#   python scheduler.py add contacts.csv --template welcome --at "2026-01-31 09:00"
+#   python scheduler.py add contacts.csv --template offer --cron "0 9 * * 1-5"
+#   python scheduler.py list
+#   python scheduler.py cancel <job_id>
+import argparse
+import heapq
+import importlib
+import json
+import logging
+import sqlite3
+import sys
 import threading
 import time
-from datetime import datetime
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
 
-def schedule_task(run_function, run_time_str, *args):
-    """Run function at specific time"""
-    run_time = datetime.strptime(run_time_str, "%Y-%m-%d %H:%M")
-    now = datetime.now()
-    delay = (run_time - now).total_seconds()
+import config
+
+logger = logging.getLogger("scheduler")
+
+STATE_SCHEDULED = "scheduled"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+STATE_MISSED = "missed"
+STATE_CANCELLED = "cancelled"
+STATE_INTERRUPTED = "interrupted"
+
+# What to do with runs that were due while the scheduler was not running
+MISFIRE_RUN_ONCE = "run_once"  # run once now, then continue from the current time
+MISFIRE_RUN_ALL = "run_all"    # run every missed occurrence, oldest first
+MISFIRE_SKIP = "skip"          # drop missed runs, wait for the next occurrence
+MISFIRE_POLICIES = (MISFIRE_RUN_ONCE, MISFIRE_RUN_ALL, MISFIRE_SKIP)
+
+MAX_WAIT = 5.0  # seconds; also how soon jobs added by another process are noticed
+
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+# --- Task registry: jobs are stored by name, never as pickled callables ---
+TASKS = {}
+
+
+def task(name):
+    """Decorator: make a function schedulable under a stable name"""
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def _task_name(func):
+    if isinstance(func, str):
+        return func
+    for name, registered in TASKS.items():
+        if registered is func:
+            return name
+    name = f"{func.__module__}:{func.__qualname__}"
+    # Lambdas and closures cannot be imported again after a restart; they only
+    # resolve in this process
+    TASKS[name] = func
+    return name
+
+
+def _resolve(name):
+    if name in TASKS:
+        return TASKS[name]
+    if ":" not in name:
+        raise LookupError(f"unknown task {name!r}")
+    module, _, qualname = name.partition(":")
+    target = importlib.import_module(module)
+    for attr in qualname.split("."):
+        target = getattr(target, attr)
+    return target
+
+
+# --- Cron ---
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+}
+CRON_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _parse_cron_field(text, low, high):
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = end = int(part)
+            if step > 1:
+                end = high
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"cron field {text!r} is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Five-field cron expression (minute hour day month weekday), local time.
+
+    Supports *, lists, ranges and steps; weekday 0 and 7 are Sunday. As in
+    cron, when both day and weekday are restricted either one may match.
+    """
+
+    def __init__(self, expr):
+        fields = CRON_ALIASES.get(expr.strip(), expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expr!r}")
+        parsed = [_parse_cron_field(f, lo, hi) for f, (lo, hi) in zip(fields, CRON_RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = (sorted(v) for v in parsed)
+        self.weekdays = {d % 7 for d in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        day_ok = day.day in self.days
+        weekday_ok = (day.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, timestamp):
+        start = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(366 * 8):  # Feb 29 on a given weekday can be years away
+            if self._day_matches(day):
+                first = day == start.date()
+                for hour in self.hours:
+                    if first and hour < start.hour:
+                        continue
+                    for minute in self.minutes:
+                        if first and hour == start.hour and minute < start.minute:
+                            continue
+                        return datetime(day.year, day.month, day.day, hour, minute).timestamp()
+            day += timedelta(days=1)
+        raise ValueError("cron expression never fires")
+
+
+@lru_cache(maxsize=256)
+def _cron(expr):
+    return CronSchedule(expr)
+
+
+def _to_timestamp(run_at):
+    if run_at is None:
+        return time.time()
+    if isinstance(run_at, (int, float)):
+        return float(run_at)
+    if isinstance(run_at, str):
+        run_at = datetime.strptime(run_at, TIME_FORMAT)
+    return run_at.timestamp()
+
+
+class Scheduler:
+    """Durable scheduler for one-shot, interval and cron jobs.
+
+    Jobs are rows in SQLite; only a window of the earliest `window` run
+    times is kept in memory as (time, id) heap entries, so 100k pending
+    jobs cost the same threads and about the same memory as ten. Cancelled
+    or rescheduled jobs leave stale heap entries that are skipped when they
+    come up. Task arguments must be JSON-serializable.
+    """
+
+    def __init__(self, path=None, workers=None, window=1000, grace=None):
+        self.path = path or config.SCHEDULER_DB
+        self.window = window
+        self.grace = config.SCHEDULER_MISFIRE_GRACE if grace is None else grace
+        self.workers = workers or config.SCHEDULER_WORKERS
+        self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
+        self.heap = []
+        self.cursor = (float("-inf"), "")  # every scheduled job <= cursor is in the heap
+        self.exhausted = False
+        self.running = False
+        self.thread = None
+        self.executor = None
+
+        config.init_dirs()
+        self.conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id         TEXT PRIMARY KEY,
+                task       TEXT NOT NULL,
+                args       TEXT NOT NULL,
+                kwargs     TEXT NOT NULL,
+                next_run   REAL,
+                every      REAL,
+                cron       TEXT,
+                misfire    TEXT NOT NULL,
+                grace      REAL NOT NULL,
+                state      TEXT NOT NULL,
+                runs       INTEGER NOT NULL DEFAULT 0,
+                last_run   REAL,
+                last_error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS jobs_due ON jobs (state, next_run, id);
+        """)
+        self.data_version = self._data_version()
+
+    # --- Adding and cancelling ---
+    def _job_row(self, func, run_at=None, every=None, cron=None, args=(), kwargs=None,
+                 job_id=None, misfire=MISFIRE_RUN_ONCE, grace=None):
+        if misfire not in MISFIRE_POLICIES:
+            raise ValueError(f"misfire must be one of {MISFIRE_POLICIES}")
+        if every is not None and cron is not None:
+            raise ValueError("use either every or cron, not both")
+        if every is not None and every <= 0:
+            raise ValueError("every must be a positive number of seconds")
+        if cron is not None and run_at is None:
+            next_run = _cron(cron).next_after(time.time())
+        else:
+            next_run = _to_timestamp(run_at)
+        return (job_id or uuid.uuid4().hex[:12], _task_name(func), json.dumps(list(args)),
+                json.dumps(kwargs or {}), next_run, every, cron, misfire,
+                self.grace if grace is None else grace, STATE_SCHEDULED)
+
+    def _insert(self, rows):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO jobs (id, task, args, kwargs, next_run, every, cron, misfire, grace, state)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        for row in rows:
+            self._push(row[4], row[0])
+        self.cond.notify()
+
+    def add_job(self, func, run_at=None, every=None, cron=None, args=(), kwargs=None,
+                job_id=None, misfire=MISFIRE_RUN_ONCE, grace=None):
+        """Schedule `func` (a callable or registered task name); returns the job id.
 
-    if delay <= 0:
-        print("Scheduled time is in the past!")
-        return
+        run_at: datetime, epoch seconds or "YYYY-MM-DD HH:MM" (default: now).
+        every: repeat interval in seconds. cron: five-field cron expression.
+        """
+        row = self._job_row(func, run_at, every, cron, args, kwargs, job_id, misfire, grace)
+        with self.lock:
+            self._insert([row])
+        return row[0]
 
+    def add_jobs(self, jobs):
+        """Schedule many jobs (dicts of add_job arguments) in one transaction"""
+        rows = [self._job_row(**job) for job in jobs]
+        with self.lock:
+            self._insert(rows)
+        return [row[0] for row in rows]
+
+    def cancel(self, job_id):
+        with self.lock:
+            with self.conn:
+                changed = self.conn.execute(
+                    "UPDATE jobs SET state = ? WHERE id = ? AND state = ?",
+                    (STATE_CANCELLED, job_id, STATE_SCHEDULED),
+                ).rowcount
+        return changed > 0
+
+    def get_job(self, job_id):
+        with self.lock:
+            cur = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cur.fetchone()
+            return dict(zip([c[0] for c in cur.description], row)) if row else None
+
+    def jobs(self, state=STATE_SCHEDULED, limit=100):
+        with self.lock:
+            cur = self.conn.execute(
+                "SELECT * FROM jobs WHERE state = ? ORDER BY next_run, id LIMIT ?", (state, limit))
+            names = [c[0] for c in cur.description]
+            return [dict(zip(names, row)) for row in cur]
+
+    # --- Heap window (callers hold self.lock) ---
+    def _data_version(self):
+        # Changes only when another connection (process) commits
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _push(self, next_run, job_id):
+        entry = (next_run, job_id)
+        if entry > self.cursor:
+            return  # loaded from the store when the window gets there
+        heapq.heappush(self.heap, entry)
+        if len(self.heap) > 2 * self.window:
+            self.heap = heapq.nsmallest(self.window, self.heap)  # sorted, so still a heap
+            self.cursor = self.heap[-1]
+            self.exhausted = False
+
+    def _load_window(self):
+        rows = self.conn.execute(
+            "SELECT next_run, id FROM jobs WHERE state = ? AND (next_run, id) > (?, ?)"
+            " ORDER BY next_run, id LIMIT ?",
+            (STATE_SCHEDULED, *self.cursor, self.window),
+        ).fetchall()
+        for row in rows:
+            heapq.heappush(self.heap, tuple(row))
+        if len(rows) < self.window:
+            self.exhausted = True
+            self.cursor = (float("inf"), "")
+        elif rows:
+            self.cursor = tuple(rows[-1])
+
+    def _reload(self):
+        """Another process changed the store: rebuild the window from scratch"""
+        self.heap = []
+        self.cursor = (float("-inf"), "")
+        self.exhausted = False
+        self._load_window()
+
+    # --- Running ---
+    def _next_occurrence(self, every, cron, scheduled, now, catch_up):
+        if every:
+            if catch_up:
+                return scheduled + every
+            return scheduled + every * ((now - scheduled) // every + 1)
+        return _cron(cron).next_after(scheduled if catch_up else now)
+
+    def _fire(self, scheduled, job_id):
+        row = self.conn.execute(
+            "SELECT task, args, kwargs, every, cron, misfire, grace, state, next_run FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return
+        task_name, args, kwargs, every, cron, misfire, grace, state, next_run = row
+        if state != STATE_SCHEDULED or next_run != scheduled:
+            return  # cancelled or moved since this entry was pushed
+
+        now = time.time()
+        late = now - scheduled > grace
+        run = not (late and misfire == MISFIRE_SKIP)
+        if late:
+            logger.info("job %s is %.0fs late (%s)", job_id, now - scheduled, misfire)
+
+        with self.conn:
+            if every or cron:
+                following = self._next_occurrence(every, cron, scheduled, now, misfire == MISFIRE_RUN_ALL)
+                self.conn.execute("UPDATE jobs SET next_run = ? WHERE id = ?", (following, job_id))
+                self._push(following, job_id)
+            else:
+                self.conn.execute("UPDATE jobs SET state = ? WHERE id = ?",
+                                  (STATE_RUNNING if run else STATE_MISSED, job_id))
+        if run:
+            self.executor.submit(self._execute, job_id, task_name, args, kwargs, bool(every or cron))
+
+    def _execute(self, job_id, task_name, args, kwargs, recurring):
+        started = time.time()
+        error = None
+        try:
+            _resolve(task_name)(*json.loads(args), **json.loads(kwargs))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.exception("job %s (%s) failed", job_id, task_name)
+        with self.lock:
+            with self.conn:
+                if recurring:
+                    self.conn.execute(
+                        "UPDATE jobs SET runs = runs + 1, last_run = ?, last_error = ? WHERE id = ?",
+                        (started, error, job_id))
+                else:
+                    self.conn.execute(
+                        "UPDATE jobs SET runs = runs + 1, last_run = ?, last_error = ?, state = ?"
+                        " WHERE id = ? AND state = ?",
+                        (started, error, STATE_FAILED if error else STATE_DONE, job_id, STATE_RUNNING))
+
+    def _loop(self):
+        with self.lock:
+            while self.running:
+                version = self._data_version()
+                if version != self.data_version:
+                    self.data_version = version
+                    self._reload()
+                elif not self.heap and not self.exhausted:
+                    self._load_window()
+                if not self.heap:
+                    self.cond.wait(MAX_WAIT)
+                    continue
+                scheduled, job_id = self.heap[0]
+                delay = scheduled - time.time()
+                if delay > 0:
+                    self.cond.wait(min(delay, MAX_WAIT))
+                    continue
+                heapq.heappop(self.heap)
+                try:
+                    self._fire(scheduled, job_id)
+                except Exception:
+                    logger.exception("could not start job %s", job_id)
+
+    def start(self):
+        if self.running:
+            return self
+        with self.lock:
+            # One-shot jobs that were running when the process died are not rerun
+            with self.conn:
+                self.conn.execute("UPDATE jobs SET state = ? WHERE state = ?",
+                                  (STATE_INTERRUPTED, STATE_RUNNING))
+            self._reload()
+            self.running = True
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self.thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self.thread.start()
+        return self
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            self.running = False
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join()
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+        self.conn.close()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """The process-wide scheduler, started on first use"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler().start()
+        return _scheduler
+
+
+def schedule_task(run_function, run_time_str, *args):
+    """Run function at specific time; returns the job id (cancel with get_scheduler().cancel)"""
+    run_time = datetime.strptime(run_time_str, TIME_FORMAT)
+    if run_time <= datetime.now():
+        print("⚠️ Scheduled time is in the past, running it now.")
+    job_id = get_scheduler().add_job(run_function, run_at=run_time, args=args)
     print(f"🕒 Task scheduled for {run_time_str}")
+    return job_id
+
+
+@task("send_campaign")
+def send_campaign(contact_file, message, media_path=None, campaign_id=None):
+    """Send a campaign to completion (through the session daemon when one is running)"""
+    from main import run_sender_yielding
+
+    sent = total = 0
+    failed = []
+    for sent, total, failed in run_sender_yielding(contact_file, message, media_path,
+                                                   campaign_id=campaign_id, resume=True):
+        pass
+    print(f"📊 Scheduled campaign {contact_file}: {sent}/{total} sent, {len(failed)} failed")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scheduled campaigns")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    sub.add_parser("serve", help="run scheduled jobs in the foreground")
+
+    add = sub.add_parser("add", help="schedule a campaign")
+    add.add_argument("contacts", nargs="+", help="one or more CSV/TXT/XLSX files")
+    group = add.add_mutually_exclusive_group(required=True)
+    group.add_argument("--message")
+    group.add_argument("--template")
+    add.add_argument("--media")
+    when = add.add_mutually_exclusive_group()
+    when.add_argument("--every", type=float, help="repeat every N seconds")
+    when.add_argument("--cron", help='cron expression, e.g. "0 9 * * 1-5"')
+    add.add_argument("--at", help=f"first run, {TIME_FORMAT.replace('%', '%%')} (default: now)")
+    add.add_argument("--misfire", choices=MISFIRE_POLICIES, default=MISFIRE_RUN_ONCE)
+
+    listing = sub.add_parser("list", help="show jobs")
+    listing.add_argument("--state", default=STATE_SCHEDULED)
+
+    cancel = sub.add_parser("cancel", help="cancel a scheduled job")
+    cancel.add_argument("job_id")
+
+    args = parser.parse_args(argv)
+    scheduler = Scheduler()
+
+    if args.cmd == "serve":
+        from logsetup import setup_logging
+        setup_logging()
+        scheduler.start()
+        print("🟢 Scheduler running. Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            scheduler.shutdown(wait=False)
+            print("🔴 Scheduler stopped.")
+        return 0
+
+    if args.cmd == "add":
+        message = args.message
+        if args.template:
+            from template_registry import get_registry
+            message = get_registry().get(args.template).text
+        job_id = scheduler.add_job("send_campaign", run_at=args.at, every=args.every, cron=args.cron,
+                                   args=(args.contacts, message, args.media), misfire=args.misfire)
+        job = scheduler.get_job(job_id)
+        print(f"🕒 {job_id} scheduled for {datetime.fromtimestamp(job['next_run']).strftime(TIME_FORMAT)}")
+    elif args.cmd == "list":
+        for job in scheduler.jobs(args.state):
+            when = datetime.fromtimestamp(job["next_run"]).strftime(TIME_FORMAT)
+            repeat = f"every {job['every']:g}s" if job["every"] else (job["cron"] or "once")
+            print(f"{job['id']}  {when}  {repeat:<16} {job['task']}  runs={job['runs']}")
+    elif args.cmd == "cancel":
+        print("🗑️ Cancelled." if scheduler.cancel(args.job_id) else "⚠️ No such scheduled job.")
+    scheduler.conn.close()
+    return 0
+
 
-    timer = threading.Timer(delay, run_function, args)
-    timer.start()
-    return timer
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
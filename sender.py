@@ -1,70 +1,196 @@
 # sender.py
-from utils import random_delay
-import time
+import logging
+from urllib.parse import quote
+from pacing import get_pacer, OUTCOME_OK, OUTCOME_ERROR, OUTCOME_TIMEOUT
+from logsetup import SendAttempt
+from media import get_media_cache
+from delivery import DeliveryFailedError, DELIVERY_FAILED
+# Selectors and errors live with the Playwright transport; re-exported for older imports
+from transport import (COMPOSE_BOX, INVALID_NUMBER_DIALOG, LOGIN_QR, ATTACH_BUTTON, ATTACH_INPUT, SEND_BUTTON,
+                       OPEN_CHAT_TIMEOUT_MS, IN_APP_TIMEOUT_MS, InvalidNumberError, LoggedOutError,
+                       Transport, PlaywrightTransport)
+# Classified send results (MessageSender.last_status); they live in statuses.py
+from statuses import (STATUS_SENT, STATUS_INVALID, STATUS_LOGGED_OUT, STATUS_TIMEOUT, STATUS_ERROR,
+                      STATUS_UNCONFIRMED)
+import config
+
+logger = logging.getLogger("sender")
+
+# Navigation modes
+NAV_GOTO = "goto"      # full page.goto per contact (reloads the whole app)
+NAV_IN_APP = "in_app"  # let the already-loaded app route to the chat, goto as fallback (opt-in)
+
+
+class SendStopped(Exception):
+    """The campaign was stopped while this send waited for its slot; nothing was sent"""
+
 
 class MessageSender:
-    def __init__(self, page):
+    """Pacing, stage timing and result classification of one send; the
+    client itself is a transport.Transport (a Playwright page is wrapped in
+    PlaywrightTransport)."""
+
+    def __init__(self, page, navigation=None, base_url=config.WHATSAPP_URL, pacer=None,
+                 negative_cache=None, media_cache=None, stop=None):
         self.page = page
+        self.navigation = navigation or config.NAVIGATION  # NAV_GOTO unless opted in
+        self.base_url = base_url
+        self.pacer = pacer or get_pacer()
+        self.negative_cache = negative_cache
+        self.media = media_cache or get_media_cache()
+        self.stop = stop  # threading.Event that cuts the pacing wait short
+        self.last_status = None
+        self.last_error = None
+        self.last_delivery = None  # delivery state of the last message once it left the outbox
+        self.attempt = None  # SendAttempt of the send in progress, or the last one
 
-    def send_message(self, phone: str, message: str, media_path: str = None) -> bool:
-        print(f"    🔹 send_message: phone={phone}, media={media_path is not None}")
+    @property
+    def page(self):
+        return self.transport.page
+
+    @page.setter
+    def page(self, page):
+        """A Playwright page or any Transport (after a reconnect too)"""
+        self.transport = page if isinstance(page, Transport) else PlaywrightTransport(page)
 
+    def _stage(self, name):
+        if self.attempt is not None:
+            self.attempt.stage(name)
+
+    def chat_url(self, phone: str, message: str = "") -> str:
+        url = f"{self.base_url}/send?phone={phone}"
+        if message.strip():
+            url += f"&text={quote(message)}"
+        return url
+
+    def _open_chat_in_app(self, url) -> bool:
         try:
-            url = f"https://web.whatsapp.com/send?phone={phone}"
-            if message.strip():
-                url += f"&text={message}"
-            print(f"    🌐 Going to: {url}")
-            self.page.goto(url)
+            self._stage("navigate")
+            self.transport.navigate(url, in_app=True)
+            self._stage("compose_wait")
+            self.transport.wait_for_chat(in_app=True)
+            return True
+        except (InvalidNumberError, LoggedOutError):
+            raise
+        except Exception as e:
+            logger.debug("In-app navigation failed, falling back to goto: %s", e)
+            return False
+
+    def open_chat(self, phone: str, message: str = ""):
+        """Open the chat (with the text pre-filled) and wait for its compose box.
+
+        Raises InvalidNumberError / LoggedOutError as soon as WhatsApp shows
+        them, instead of waiting out the compose-box timeout.
+        """
+        url = self.chat_url(phone, message)
+        if self.navigation == NAV_IN_APP and self.transport.url.startswith(self.base_url):
+            if self._open_chat_in_app(url):
+                return
+        logger.debug("Going to: %s", url)
+        self._stage("navigate")
+        self.transport.navigate(url)
+        self._stage("compose_wait")
+        self.transport.wait_for_chat()
 
-            # Wait for input box
-            self.page.wait_for_selector('div[contenteditable="true"][data-tab="10"]', timeout=30000)
-            print("    ✅ Input box found.")
+    def attach(self, files):
+        """Attach the prepared files; several files go out as one album"""
+        self.transport.attach(files)
+
+    def _wait_for_slot(self, ready_at):
+        """Pacing wait; raises SendStopped when self.stop is set meanwhile"""
+        if not self.pacer.wait_until(ready_at, self.stop):
+            raise SendStopped("stopped before sending")
+
+    def send_message(self, phone: str, message: str, media_path: str = None) -> bool:
+        self.attempt = attempt = SendAttempt(phone, self.pacer.account)
+        self.last_delivery = None
+
+        # Reserve the send slot first; navigation time counts towards the wait
+        ready_at = self.pacer.reserve()
+        pressed = False
+        try:
+            self.open_chat(phone, message)
 
             if media_path:
-                print("    📎 Attaching file...")
-                self.page.click('div[title="Attach"]')
-                with self.page.expect_file_chooser() as fc_info:
-                    self.page.click('input[type="file"]')
-                file_chooser = fc_info.value
-                file_chooser.set_files(media_path)
-                print("    ✅ File selected.")
-
-                self.page.wait_for_selector('span[data-icon="send"]', timeout=20000)
+                attempt.stage("attach")
+                self.attach(self.media.prepare_all(media_path))  # cached after the first contact
+
+                attempt.stage("attach_preview")
+                self.transport.wait_media_preview()
                 if message.strip():
-                    self.page.fill('div[contenteditable="true"][data-tab="10"]', message)
-                self.page.click('span[data-icon="send"]')
+                    self.transport.fill_caption(message)
+                attempt.stage("pacing")
+                self._wait_for_slot(ready_at)
+                attempt.stage("send")
+                self.transport.send_media()
+                pressed = True
             else:
-                print("    ✉️ Sending text message...")
-                self.page.press('div[contenteditable="true"][data-tab="10"]', "Enter")
+                attempt.stage("pacing")
+                self._wait_for_slot(ready_at)
+                attempt.stage("send")
+                self.transport.send_text()
+                pressed = True
+
+            # Move on as soon as the bubble has left the outbox; later ticks arrive on their own
+            attempt.stage("confirm")
+            self.last_delivery = self.transport.confirm(phone)
+            if self.last_delivery == DELIVERY_FAILED:
+                raise DeliveryFailedError("WhatsApp could not send the message")
 
-            time.sleep(random_delay())
+            self.pacer.record(OUTCOME_OK)
+            self.last_status, self.last_error = STATUS_SENT, None
+            attempt.finish(STATUS_SENT)
+            logger.debug("Sent to %s", phone)
             return True
 
+        except InvalidNumberError as e:
+            logger.info("🚫 Not on WhatsApp: %s", phone)
+            attempt.finish(STATUS_INVALID, e)
+            self.pacer.refund()  # nothing was sent, and it says nothing about throttling
+            self.last_status, self.last_error = STATUS_INVALID, str(e)
+            if self.negative_cache is not None:
+                self.negative_cache.add(phone, STATUS_INVALID)
+            return False
+        except SendStopped:
+            self.pacer.refund()  # the slot was never used, and no attempt is counted
+            raise
+        except LoggedOutError as e:
+            logger.warning("🔒 Logged out: %s", e)
+            attempt.finish(STATUS_LOGGED_OUT, e)
+            self.pacer.refund()
+            self.last_status, self.last_error = STATUS_LOGGED_OUT, str(e)
+            return False
         except Exception as e:
-            print(f"    ❌ Send failed: {str(e)}")
+            logger.warning("❌ Send failed (%s): %s", phone, e)
+            timed_out = type(e).__name__ == "TimeoutError"
+            self.pacer.record(OUTCOME_TIMEOUT if timed_out else OUTCOME_ERROR)
+            if pressed:  # retrying could send it twice (retry.classify keeps it final)
+                self.last_status = STATUS_UNCONFIRMED
+            else:
+                self.last_status = STATUS_TIMEOUT if timed_out else STATUS_ERROR
+            self.last_error = str(e)
+            attempt.finish(self.last_status, e)
             return False
         
+    def delivery_updates(self):
+        """{phone: delivery state} that changed since the last call"""
+        tracker = self.transport.delivery
+        return tracker.drain() if tracker is not None else {}
+
+    def settle(self, seconds=None):
+        """Wait (up to DELIVERY_SETTLE_SECONDS) for messages still in the outbox"""
+        self.transport.settle(config.DELIVERY_SETTLE_SECONDS if seconds is None else seconds)
+
     def send_bulk(self, contacts, message_template, media_path=None):
-        success_count = 0
-        total = len(contacts)
-
-        for contact in contacts:
-            name = contact['name']
-            phone = contact['phone']
-            msg = message_template.format(name=name)
-
-            print(f"📤 Sending to {name} ({phone})...")
-
-            try:
-                if self.send_message(phone, msg, media_path):
-                    success_count += 1
-                else:
-                    print(f"❌ Failed to send to {name}")
-            except Exception as e:
-                print(f"💥 Error sending to {name}: {e}")
-                # Continue to next contact
-            finally:
-                # Always yield progress
-                yield success_count, total, []
-
-        print(f"✅ Sent {success_count}/{total} messages.")
\ No newline at end of file
+        """{name} templates over a list of contacts; yields (sent, total, failed).
+
+        Failures are retried like in any campaign (campaign.send_contacts),
+        but there is no journal, and a lost session ends the run.
+        """
+        from campaign import send_contacts
+
+        contacts = [dict(c, message=message_template.format(name=c['name'])) for c in contacts]
+        sent = 0
+        for sent, total, failed in send_contacts(self, contacts, media_path, len(contacts)):
+            yield sent, total, failed
+        logger.info("✅ Sent %d/%d messages.", sent, len(contacts))
\ No newline at end of file
@@ -1,53 +1,219 @@
 # session.py
-from playwright.sync_api import sync_playwright
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+import json
+import logging
 import os
 import time
 
+import config
+import procstats
+import profiles
+from sender import LOGIN_QR
+
+logger = logging.getLogger("session")
+
+DEFAULT_PROFILE_DIR = os.path.expanduser("~/whatsapp_profile_debug")
+CHAT_LIST = 'div[aria-label="Chat list"]'
+LOGIN_TIMEOUT_MS = 120000
+
+# Written into the profile after a successful login; lets later lean sessions
+# start headless and reuse the real browser's user agent
+LOGIN_MARKER = ".wa_login.json"
+
+DEFAULT_ARGS = ["--disable-blink-features=AutomationControlled"]
+DEFAULT_VIEWPORT = {"width": 1366, "height": 768}
+
+# Chromium switches that trim memory/CPU of a browser nobody looks at
+LEAN_ARGS = [
+    "--blink-settings=imagesEnabled=false",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--no-first-run",
+    "--mute-audio",
+    "--renderer-process-limit=1",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    "--js-flags=--max-old-space-size=512",
+]
+
+
 class WhatsAppSession:
-    def __init__(self):
+    def __init__(self, user_data_dir=None, base_url=config.WHATSAPP_URL, lean=False, snapshot=None):
+        self.user_data_dir = user_data_dir or DEFAULT_PROFILE_DIR
+        self.base_url = base_url  # mock_server.py URL for offline runs
+        self.lean = lean
+        # Snapshot the profile after its first login (config.PROFILE_AUTO_SNAPSHOT);
+        # never for a mock session, whose throwaway profile has no login worth keeping
+        if snapshot is None:
+            snapshot = config.PROFILE_AUTO_SNAPSHOT and base_url == config.WHATSAPP_URL
+        self.snapshot = snapshot
+        self.headless = False
         self.playwright = None
         self.browser = None
         self.page = None
+        self.driver_pid = None
+        self.logged_in = False
+
+    # --- Login marker ---
+    @property
+    def marker_path(self):
+        return os.path.join(self.user_data_dir, LOGIN_MARKER)
+
+    def _read_marker(self):
+        try:
+            with open(self.marker_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_marker(self):
+        user_agent = self.page.evaluate("navigator.userAgent")
+        if "Headless" in user_agent:
+            return  # keep the one recorded by a headed login
+        with open(self.marker_path, "w", encoding="utf-8") as f:
+            json.dump({"user_agent": user_agent, "logged_in_at": time.time()}, f)
+
+    def _forget_login(self):
+        if os.path.exists(self.marker_path):
+            os.remove(self.marker_path)
+
+    # --- Lean mode ---
+    def _block_resources(self, route):
+        if route.request.resource_type in config.LEAN_BLOCKED_RESOURCES:
+            route.abort()
+        else:
+            route.continue_()
+
+    def _launch_options(self, headless, marker):
+        options = {"headless": headless, "args": list(DEFAULT_ARGS), "viewport": DEFAULT_VIEWPORT}
+        if self.lean:
+            options["args"] += LEAN_ARGS
+            options["viewport"] = config.LEAN_VIEWPORT
+        if headless and marker and marker.get("user_agent"):
+            # The headless UA says "HeadlessChrome", which WhatsApp Web refuses
+            options["user_agent"] = marker["user_agent"]
+        return options
 
-    def start(self, headless=False):
-        print("📞 Starting WhatsApp session...")
-        user_data_dir = os.path.expanduser("~/whatsapp_profile_debug")
+    def start(self, headless=None):
+        """Launch the browser and wait until the chat list shows up.
+
+        headless=None means: headless if this is a lean session and the
+        profile has logged in before, otherwise a visible window for the QR.
+        """
+        user_data_dir = self.user_data_dir
+        try:
+            profiles.maintain(user_data_dir)  # restore from snapshot / prune caches
+        except (OSError, RuntimeError) as e:
+            logger.warning("⚠️ Profile maintenance skipped: %s", e)
         os.makedirs(user_data_dir, exist_ok=True)
+        marker = self._read_marker()
+        auto = headless is None
+        if auto:
+            headless = self.lean and marker is not None
+        self.headless = headless
+        logger.info("📞 Starting WhatsApp session (%s%s)...", user_data_dir,
+                    ", lean headless" if self.lean and headless else ", lean" if self.lean else "")
 
         try:
+            before = set(procstats.children())
             self.playwright = sync_playwright().start()
-            print("✅ Playwright started.")
+            # The driver is the new child of this process; the browser runs under it
+            new = set(procstats.children()) - before
+            self.driver_pid = min(new) if new else None
+            logger.debug("✅ Playwright started.")
 
             self.browser = self.playwright.chromium.launch_persistent_context(
-                user_data_dir=user_data_dir,
-                headless=headless,
-                args=["--disable-blink-features=AutomationControlled"],
-                viewport={"width": 1366, "height": 768}
-            )
-            print("✅ Browser launched.")
+                user_data_dir=user_data_dir, **self._launch_options(headless, marker))
+            if self.lean:
+                self.browser.route("**/*", self._block_resources)
+            logger.debug("✅ Browser launched.")
 
             self.page = self.browser.pages[0]
-            self.page.goto("https://web.whatsapp.com")
-            print("🌍 Opening WhatsApp...")
-
-            # Wait loop
-            for _ in range(60):
-                if self.page.query_selector('div[aria-label="Chat list"]'):
-                    print("✅ Logged in!")
-                    return True
-                time.sleep(2)
-            print("❌ Timeout: Not logged in.")
-            return False
+            self.page.goto(self.base_url)
+            logger.info("🌍 Opening WhatsApp...")
+
+            # Resolves as soon as the chat list renders (QR scan included), no polling.
+            # Headless, nobody can scan a QR, so that ends the wait too.
+            wait_for = f"{CHAT_LIST}, {LOGIN_QR}" if headless else CHAT_LIST
+            try:
+                self.page.wait_for_selector(wait_for, timeout=LOGIN_TIMEOUT_MS)
+            except PlaywrightTimeoutError:
+                logger.error("❌ Timeout: Not logged in.")
+                return False
+            if self.page.query_selector(CHAT_LIST) is None:
+                logger.warning("🔒 Headless session needs a QR login.")
+                self._forget_login()
+                if auto:
+                    self.close()
+                    return self.start(headless=False)
+                return False
+            logger.info("✅ Logged in!")
+            self.logged_in = True
+            self._write_marker()
+            self.report_usage()
+            return True
 
         except Exception as e:
-            print(f"❌ Launch failed: {str(e)}")
+            logger.error("❌ Launch failed: %s", e)
             return False
 
+    def reconnect(self):
+        """Relaunch the browser on the same profile after a crash or logout; True once logged in again.
+
+        A lean session that lost its login falls back to a visible window for the QR scan.
+        """
+        logger.warning("🔄 Reconnecting %s...", self.user_data_dir)
+        self.close()
+        return self.start()
+
+    def is_ready(self):
+        """True while the browser is up and WhatsApp still shows the chat list"""
+        try:
+            return (self.page is not None and not self.page.is_closed()
+                    and self.page.query_selector(CHAT_LIST) is not None)
+        except Exception:
+            return False
+
+    def usage(self):
+        """{"rss", "cpu", "processes"} of this session's driver + browser processes"""
+        if self.driver_pid is None:
+            return None
+        return procstats.tree_usage(self.driver_pid)
+
+    def report_usage(self, level=logging.INFO):
+        """Log the session's RSS/CPU and publish it to the metrics exporter"""
+        usage = self.usage()
+        if usage is None:
+            return None
+        from metrics import get_metrics
+        get_metrics().record_session(self.user_data_dir, usage)
+        logger.log(level, "📈 Session %s: RSS %.0f MB, CPU %.1f s, %d processes", self.user_data_dir,
+                    usage["rss"] / 2**20, usage["cpu"], usage["processes"])
+        return usage
+
     def close(self):
-        print("📞 Closing browser...")
+        logger.info("📞 Closing browser...")
         if self.browser:
+            self.report_usage()
             self.browser.close()
         if self.playwright:
             import time
             time.sleep(0.5)
-            self.playwright.stop()
\ No newline at end of file
+            self.playwright.stop()
+        self.playwright = self.browser = self.page = None
+        self.driver_pid = None
+        if self.logged_in and self.snapshot:
+            self._snapshot_once()
+        self.logged_in = False
+
+    def _snapshot_once(self):
+        """First logged-in close of a profile: keep its login state for profiles.maintain()"""
+        if os.path.isdir(profiles.snapshot_path(profiles.snapshot_name(self.user_data_dir))):
+            return
+        try:
+            profiles.snapshot(self.user_data_dir)
+        except (OSError, RuntimeError) as e:
+            logger.warning("⚠️ Profile snapshot failed: %s", e)
\ No newline at end of file
@@ -0,0 +1,9 @@
+# statuses.py
+# Classified send results (MessageSender.last_status), shared by the sender,
+# the retry lane and the metrics without importing the browser side
+STATUS_SENT = "sent"
+STATUS_INVALID = "invalid"          # number is not on WhatsApp
+STATUS_LOGGED_OUT = "logged_out"    # session shows the QR code again
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+STATUS_UNCONFIRMED = "unconfirmed"  # failed after send was pressed: the message may be out
\ No newline at end of file
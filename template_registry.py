@@ -0,0 +1,155 @@
+# template_registry.py
+import logging
+import os
+import string
+import threading
+import time
+from urllib.parse import quote
+
+import config
+
+logger = logging.getLogger("templates")
+
+class Template:
+    """A message template parsed once: placeholders are known up front.
+
+    Any contact column can be used as a placeholder ({name}, {city}, ...).
+    """
+
+    def __init__(self, text, name=None, mtime=None):
+        self.name = name
+        self.text = text
+        self.mtime = mtime
+        self.fields = set()
+        for _, field, _, _ in string.Formatter().parse(text):
+            if field is None:
+                continue
+            key = field.split(".")[0].split("[")[0]
+            if not key or key.isdigit():
+                label = f"Template '{name}'" if name else "Template"
+                raise ValueError(f"{label} uses a positional placeholder {{{field}}}; "
+                                 "use a column name like {name}")
+            self.fields.add(key)
+
+    def check(self, columns, source=None):
+        missing = self.fields - set(columns)
+        if missing:
+            where = f"contacts in {source}" if source else "contacts"
+            raise ValueError(f"Template uses {sorted(missing)} but {where} only have {sorted(columns)}")
+
+    def check_sources(self, contact_file):
+        """Check the placeholders against the header of every source, before anything is sent"""
+        from contact_store import contact_sources
+        from utils import contact_columns
+        for path in contact_sources(contact_file):
+            self.check(contact_columns(path), os.path.basename(path))
+
+    def render(self, row) -> str:
+        return self.text.format_map(row)
+
+    def render_batch(self, rows, url_encode=False):
+        """Render many rows at once; url_encode=True gives ready-to-use &text= values"""
+        messages = [self.text.format_map(row) for row in rows]
+        if url_encode:
+            return [quote(m) for m in messages]
+        return messages
+
+    def render_stream(self, contacts, batch_size=500):
+        """Attach contact["message"] ahead of the send loop, one batch at a time.
+
+        Entry points call check_sources() first, so a typo or a source
+        without the column fails before anything is sent; a contact that
+        still lacks a placeholder raises ValueError here rather than a
+        KeyError in the middle of a batch.
+        """
+        batch = []
+        for contact in contacts:
+            if not all(field in contact for field in self.fields):
+                self.check(contact.keys())
+            batch.append(contact)
+            if len(batch) >= batch_size:
+                yield from self._attach(batch)
+                batch = []
+        if batch:
+            yield from self._attach(batch)
+
+    def _attach(self, batch):
+        for contact, message in zip(batch, self.render_batch(batch)):
+            contact["message"] = message
+        return batch
+
+
+class TemplateRegistry:
+    """Caches parsed templates from templates/ and reloads them when files change.
+
+    Freshness is checked with os.stat (directory mtime for added/removed
+    files, file mtime for edits), at most once per `check_interval` seconds.
+    A file that failed to load is retried once its mtime changes.
+    """
+
+    def __init__(self, directory=None, check_interval=1.0):
+        self.directory = directory or config.TEMPLATES_DIR
+        self.check_interval = check_interval
+        self.templates = {}
+        self.files = {}   # name -> path of every .txt, loaded or not
+        self.failed = {}  # name -> mtime of a file that did not load
+        self.dir_mtime = None
+        self.last_check = 0.0
+        self.lock = threading.Lock()
+
+    def _refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
+        if not os.path.isdir(self.directory):
+            self.templates, self.files, self.failed, self.dir_mtime = {}, {}, {}, None
+            return
+
+        dir_mtime = os.stat(self.directory).st_mtime
+        if dir_mtime != self.dir_mtime:
+            self.files = {f[:-4]: os.path.join(self.directory, f)
+                          for f in os.listdir(self.directory) if f.endswith(".txt")}
+            self.templates = {k: v for k, v in self.templates.items() if k in self.files}
+            self.failed = {k: v for k, v in self.failed.items() if k in self.files}
+            self.dir_mtime = dir_mtime
+
+        for key, path in self.files.items():
+            mtime = None
+            try:
+                mtime = os.stat(path).st_mtime
+                cached = self.templates.get(key)
+                if (cached is not None and cached.mtime == mtime) or self.failed.get(key) == mtime:
+                    continue
+                with open(path, "r", encoding="utf-8") as f:
+                    self.templates[key] = Template(f.read().strip(), name=key, mtime=mtime)
+                self.failed.pop(key, None)
+            except Exception as e:
+                logger.warning("⚠️ Failed to load template %s.txt: %s", key, e)
+                self.templates.pop(key, None)
+                self.failed[key] = mtime
+
+    def names(self):
+        with self.lock:
+            self._refresh()
+            return sorted(self.templates)
+
+    def get(self, name) -> Template:
+        with self.lock:
+            self._refresh()
+            return self.templates[name]
+
+    def as_dict(self):
+        with self.lock:
+            self._refresh()
+            return {k: t.text for k, t in self.templates.items()}
+
+
+_registry = None
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = TemplateRegistry()
+    return _registry
\ No newline at end of file
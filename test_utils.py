@@ -1,7 +1,7 @@
 # test_utils.py
 try:
-    from utils import random_delay
-    print("✅ random_delay imported!")
-    print(f"Delay: {random_delay()} seconds")
+    from utils import format_phone_number
+    print("✅ utils imported!")
+    print(f"Formatted: {format_phone_number('01712345678')}")
 except Exception as e:
     print("❌ Error:", e)
\ No newline at end of file
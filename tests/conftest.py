@@ -0,0 +1,47 @@
+# conftest.py
+# Every test gets its own state, log and template directories, so nothing
+# touches the real journal, contact store or logs.
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(tmp_path, monkeypatch):
+    state = tmp_path / "state"
+    logs = tmp_path / "logs"
+    paths = {
+        "STATE_DIR": state,
+        "LOGS_DIR": logs,
+        "TEMPLATES_DIR": tmp_path / "templates",
+        "FAILED_DIR": tmp_path / "failed_contacts",
+        "JOURNAL_DB": state / "journal.sqlite3",
+        "CONTACT_STORE_DB": state / "contacts.sqlite3",
+        "NEGATIVE_CACHE_DB": state / "negative_cache.sqlite3",
+        "SCHEDULER_DB": state / "scheduler.sqlite3",
+        "MEDIA_CACHE_DIR": state / "media",
+        "DAEMON_KEY_FILE": state / "daemon.key",
+        "PROFILE_SNAPSHOTS_DIR": tmp_path / "snapshots",
+        "LOG_FILE": logs / "send_log.log",
+        "EVENTS_FILE": logs / "send_events.jsonl",
+    }
+    for name, path in paths.items():
+        monkeypatch.setattr(config, name, str(path))
+    monkeypatch.setattr(config, "METRICS_FILE", None)
+    monkeypatch.setattr(config, "_dirs_ready", False)
+    return tmp_path
+
+
+@pytest.fixture
+def write_contacts(tmp_path):
+    """write_contacts("a.csv", "name,phone", "Ana,01711111111") -> path"""
+    def write(name, *lines):
+        path = tmp_path / name
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return str(path)
+    return write
\ No newline at end of file
@@ -0,0 +1,51 @@
+# test_cli.py
+# Exit codes of `cli.py send`: 2 for a campaign that can't start, 1 when
+# contacts failed, 0 when everything went out.
+import sys
+
+import pytest
+
+import cli
+import config
+
+CONTACTS = ("name,phone", "Ana,01711111111", "Bo,01711111112")
+
+
+@pytest.fixture(autouse=True)
+def no_browser(monkeypatch):
+    """Starting a real session would fail the test: the checks come first"""
+    monkeypatch.setitem(sys.modules, "session", None)
+    # --simulate sets these for the run; put them back afterwards
+    monkeypatch.setattr(config, "RETRY_BASE_DELAY", config.RETRY_BASE_DELAY)
+    monkeypatch.setattr(config, "RETRY_MAX_DELAY", config.RETRY_MAX_DELAY)
+
+
+def send(*args):
+    return cli.main(["send", "--quiet", "--no-daemon", *args])
+
+
+def test_missing_contact_file(tmp_path, capsys):
+    assert send("--contacts", str(tmp_path / "none.csv"), "--message", "Hi") == 2
+    assert "not found" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_template_the_sources_cannot_fill(write_contacts, capsys, workers):
+    path = write_contacts("a.csv", *CONTACTS)
+    assert send("--contacts", path, "--message", "Hi {city}", "--workers", workers) == 2
+    assert "city" in capsys.readouterr().out
+
+
+def test_unreadable_media(write_contacts, tmp_path):
+    path = write_contacts("a.csv", *CONTACTS)
+    assert send("--contacts", path, "--message", "Hi", "--media", str(tmp_path / "none.jpg")) == 2
+
+
+def test_simulated_run_exit_codes(write_contacts, capsys):
+    path = write_contacts("a.csv", *CONTACTS)
+    simulate = ("--contacts", path, "--message", "Hi {name}", "--simulate", "--sim-latency-ms", "0",
+                "--sim-retry-delay", "0", "--no-resume")
+    assert send(*simulate) == 0
+    assert "Done: 2/2 sent, 0 failed" in capsys.readouterr().out
+    assert send(*simulate, "--sim-invalid-rate", "1") == 1
+    assert "Done: 0/2 sent, 2 failed" in capsys.readouterr().out
\ No newline at end of file
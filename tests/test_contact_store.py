@@ -0,0 +1,58 @@
+# test_contact_store.py
+import pytest
+
+from contact_store import (ContactStore, contact_sources, count_sources, SKIP_DUPLICATE, SKIP_SUPPRESSED,
+                           SKIP_CAPPED)
+from journal import SendJournal, STATUS_SENT
+
+
+def test_contact_sources():
+    assert contact_sources(None) == []
+    assert contact_sources("a.csv; b.xlsx") == ["a.csv", "b.xlsx"]
+    assert contact_sources(["a.csv", " ", "b.txt"]) == ["a.csv", "b.txt"]
+
+
+def test_sources_are_merged_and_deduplicated_on_the_normalized_number(write_contacts):
+    a = write_contacts("a.csv", "name,phone,city", "Ana,01711111111,Dhaka", "Bo,01711111112,Sylhet")
+    b = write_contacts("b.txt", "Ana again - +8801711111111", "Cy - 1711111113")
+    store = ContactStore()
+    contacts = list(store.stream([a, b]))
+    assert [c["phone"] for c in contacts] == ["8801711111111", "8801711111112", "8801711111113"]
+    assert contacts[0]["name"] == "Ana"  # the first row for a number wins
+    assert store.stats["read"] == 4 and store.stats[SKIP_DUPLICATE] == 1
+    assert count_sources([a, b]) == 4
+    assert store.count() == 3
+    store.close()
+
+
+def test_suppressed_numbers_are_skipped(write_contacts):
+    path = write_contacts("a.csv", "name,phone", "Ana,01711111111", "Bo,01711111112")
+    store = ContactStore()
+    assert store.suppress(["+880 1711-111111"]) == 1
+    assert [c["phone"] for c in store.stream(path)] == ["8801711111112"]
+    assert store.stats[SKIP_SUPPRESSED] == 1
+    store.unsuppress(["01711111111"])
+    assert len(list(store.stream(path))) == 2
+    store.close()
+
+
+def test_frequency_cap_counts_other_campaigns(write_contacts):
+    path = write_contacts("a.csv", "name,phone", "Ana,01711111111", "Bo,01711111112")
+    journal = SendJournal("earlier")
+    journal.record("8801711111111", "Ana", STATUS_SENT)
+    journal.close()
+
+    store = ContactStore()
+    assert len(list(store.stream(path, "now"))) == 2  # off by default
+    assert [c["phone"] for c in store.stream(path, "now", cap=1)] == ["8801711111112"]
+    assert store.stats[SKIP_CAPPED] == 1
+    assert len(list(store.stream(path, "earlier", cap=1))) == 2  # a campaign never caps itself
+    store.close()
+
+
+def test_a_missing_source_fails_before_anything_is_read(write_contacts):
+    path = write_contacts("a.csv", "name,phone", "Ana,01711111111")
+    store = ContactStore()
+    with pytest.raises(FileNotFoundError):
+        next(store.stream([path, path + ".missing"]))
+    store.close()
\ No newline at end of file
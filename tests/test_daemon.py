@@ -0,0 +1,109 @@
+# test_daemon.py
+# The daemon's job handling on a simulated session, directly and over its socket.
+import socket
+import threading
+import time
+
+import pytest
+
+import config
+from daemon import SessionDaemon, _request, daemon_running, job_status, run_remote_yielding, submit_job
+from transport import SimulatedSession
+
+CONTACTS = ("name,phone", "Ana,01711111111", "Bo,01711111112", "Cy,01711111113")
+
+
+def make_daemon(tmp_path):
+    daemon = SessionDaemon()
+    daemon.session = SimulatedSession(user_data_dir=str(tmp_path / "profile"), latency_ms=0, attach_ms=0,
+                                      send_ms=0, seed=1)
+    return daemon
+
+
+def submit(daemon, path):
+    job_id = daemon._handle({"cmd": "submit", "job": {"contacts": [path], "message": "Hi {name}"}})["job_id"]
+    return job_id, daemon.pending.get_nowait()
+
+
+def status(daemon, job_id):
+    return daemon._handle({"cmd": "status", "job_id": job_id})
+
+
+def test_a_queued_job_cancelled_never_starts(tmp_path, write_contacts):
+    daemon = make_daemon(tmp_path)
+    job_id, job = submit(daemon, write_contacts("a.csv", *CONTACTS))
+    assert daemon._handle({"cmd": "cancel", "job_id": job_id}) == {"ok": True, "state": "cancelled"}
+    daemon._run_job(job)
+    assert status(daemon, job_id)["state"] == "cancelled"
+    assert daemon.session.page.counts["opened"] == 0
+    assert daemon.stops == {}
+
+
+def test_a_running_job_stops_during_the_pacing_wait(tmp_path, write_contacts, monkeypatch):
+    monkeypatch.setattr(config, "PACING_JITTER", 0)  # the first message goes out at once
+    daemon = make_daemon(tmp_path)
+    job_id, job = submit(daemon, write_contacts("a.csv", *CONTACTS))
+
+    def cancel_after_the_first_send():
+        while status(daemon, job_id)["sent"] < 1:
+            time.sleep(0.01)
+        daemon._handle({"cmd": "cancel", "job_id": job_id})
+        cancelled.append(time.monotonic())
+
+    cancelled = []
+    threading.Thread(target=cancel_after_the_first_send, daemon=True).start()
+    daemon._run_job(job)  # default pacing: the second message is seconds away
+    assert time.monotonic() - cancelled[0] < 2
+    result = status(daemon, job_id)
+    assert result["state"] == "cancelled"
+    assert (result["sent"], result["failed_count"]) == (1, 0)
+
+
+def test_cancel_of_an_unknown_job():
+    assert SessionDaemon()._handle({"cmd": "cancel", "job_id": "nope"}) == {"ok": False, "error": "unknown job"}
+
+
+@pytest.fixture
+def served(tmp_path, monkeypatch):
+    """A daemon serving on a free local port, with pacing out of the way"""
+    for name, value in (("MIN_DELAY", 0.001), ("MAX_DELAY", 0.001), ("PACING_MAX_RATE", 1e9), ("PACING_JITTER", 0)):
+        monkeypatch.setattr(config, name, value)
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        address = s.getsockname()
+    daemon = make_daemon(tmp_path)
+    daemon.address = address
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not daemon_running(address) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    yield daemon, address
+    _request({"cmd": "stop"}, address)
+    thread.join(5)
+
+
+def test_submit_and_status_round_trip(served, write_contacts):
+    daemon, address = served
+    path = write_contacts("a.csv", *CONTACTS, "Dee,8801700000000")
+    daemon.session.page.invalid_numbers.add("8801700000000")
+    job_id = submit_job(path, "Hi {name}", address=address)
+    deadline = time.monotonic() + 5
+    while job_status(job_id, address=address)["state"] != "done" and time.monotonic() < deadline:
+        time.sleep(0.02)
+    status = job_status(job_id, address=address)
+    assert (status["state"], status["sent"], status["total"], status["failed_count"]) == ("done", 3, 4, 1)
+    assert [c["phone"] for c in status["failed"]] == ["8801700000000"]
+    assert job_status(job_id, failed_since=1, address=address)["failed"] == []  # only what is new
+    assert status["metrics"]["sent"] == 3
+    assert _request({"cmd": "jobs"}, address)["jobs"] == {job_id: "done"}
+
+
+def test_remote_progress_stream(served, write_contacts):
+    _, address = served
+    path = write_contacts("a.csv", *CONTACTS)
+    *_, (sent, total, failed) = run_remote_yielding(path, "Hi {name}", poll_interval=0.02, address=address)
+    assert (sent, total, failed) == (3, 3, [])
+
+def test_no_daemon_without_a_key_file():
+    assert not daemon_running(("127.0.0.1", 9))  # no key: no connection attempt at all
\ No newline at end of file
@@ -0,0 +1,113 @@
+# test_delivery.py
+from delivery import (DeliveryTracker, tracker_for, phone_of, BINDING, BLIND_LIMIT, DELIVERY_PENDING, DELIVERY_SENT,
+                      DELIVERY_DELIVERED, DELIVERY_READ, DELIVERY_FAILED)
+
+PHONE = "8801711111111"
+
+
+def msg(n, phone=PHONE):
+    return f"true_{phone}@c.us_{n}"
+
+
+class FakePage:
+    """Records the binding and answers CONFIRM_JS with canned results"""
+
+    def __init__(self, results=()):
+        self.bindings = {}
+        self.init_scripts = []
+        self.results = list(results)
+
+    def expose_binding(self, name, callback):
+        self.bindings[name] = callback
+
+    def add_init_script(self, script):
+        self.init_scripts.append(script)
+
+    def evaluate(self, script, arg=None):
+        if "new Promise" in script and self.results:
+            return self.results.pop(0)
+        return None
+
+
+def test_phone_of():
+    assert phone_of(msg("3EB0")) == PHONE
+
+
+def test_states_only_move_forward():
+    tracker = DeliveryTracker()
+    tracker.claim(PHONE, [msg(1)])
+    assert tracker.state(PHONE) == DELIVERY_PENDING
+    tracker.report(PHONE, DELIVERY_DELIVERED, msg(1))
+    tracker.report(PHONE, DELIVERY_SENT, msg(1))  # late event
+    assert tracker.state(PHONE) == DELIVERY_DELIVERED
+    tracker.report(PHONE, DELIVERY_READ)  # chat list row: the chat's last message
+    assert tracker.state(PHONE) == DELIVERY_READ
+    tracker.report(PHONE, "bogus", msg(1))
+    assert tracker.state(PHONE) == DELIVERY_READ
+
+
+def test_an_album_counts_as_its_least_advanced_bubble():
+    tracker = DeliveryTracker()
+    tracker.claim(PHONE, [msg(1), msg(2)])
+    tracker.report(PHONE, DELIVERY_DELIVERED, msg(1))
+    assert tracker.state(PHONE) == DELIVERY_PENDING
+    tracker.report(PHONE, DELIVERY_SENT, msg(2))
+    assert tracker.state(PHONE) == DELIVERY_SENT
+
+
+def test_a_resend_retires_the_earlier_bubbles():
+    tracker = DeliveryTracker()
+    tracker.claim(PHONE, [msg(1)], msg(1), DELIVERY_FAILED)
+    assert tracker.state(PHONE) == DELIVERY_FAILED
+    tracker.claim(PHONE, [msg(2)], msg(2), DELIVERY_SENT)
+    tracker.report(PHONE, DELIVERY_READ, msg(1))  # ignored from now on
+    assert tracker.state(PHONE) == DELIVERY_SENT
+    assert tracker.pending() == 0
+
+
+def test_drain_hands_out_changes_once():
+    tracker = DeliveryTracker()
+    tracker.claim(PHONE, [msg(1)], msg(1), DELIVERY_SENT)
+    assert tracker.drain() == {PHONE: DELIVERY_SENT}
+    assert tracker.drain() == {}
+    tracker.report(PHONE, DELIVERY_DELIVERED, msg(1))
+    assert tracker.drain() == {PHONE: DELIVERY_DELIVERED}
+
+
+def test_page_events_arrive_through_the_binding():
+    page = FakePage()
+    tracker = DeliveryTracker(page)
+    assert tracker.enabled and page.init_scripts
+    tracker.claim(PHONE, [msg(1)])
+    page.bindings[BINDING](None, {"id": msg(1), "phone": PHONE, "state": DELIVERY_DELIVERED})
+    assert tracker.state(PHONE) == DELIVERY_DELIVERED
+
+
+def test_confirm_claims_the_new_bubble():
+    page = FakePage([{"ids": [msg(1)], "id": msg(1), "state": DELIVERY_SENT}])
+    tracker = DeliveryTracker(page)
+    assert tracker.confirm(PHONE, 1000) == DELIVERY_SENT
+    assert tracker.phones[PHONE] == [msg(1)]
+
+
+def test_confirm_stops_waiting_on_a_page_without_bubbles():
+    page = FakePage([{"ids": [], "id": None, "state": None}] * BLIND_LIMIT)
+    tracker = DeliveryTracker(page)
+    for _ in range(BLIND_LIMIT):
+        assert tracker.confirm(PHONE, 1000) is None
+    assert not tracker.enabled
+
+
+def test_a_page_without_bindings_disables_tracking():
+    class BrokenPage(FakePage):
+        def expose_binding(self, name, callback):
+            raise RuntimeError("binding already registered")
+
+    tracker = DeliveryTracker(BrokenPage())
+    assert not tracker.enabled
+    assert tracker.confirm(PHONE, 1000) is None
+
+
+def test_one_tracker_per_page():
+    page = FakePage()
+    assert tracker_for(page) is tracker_for(page)
\ No newline at end of file
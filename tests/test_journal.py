@@ -0,0 +1,64 @@
+# test_journal.py
+from journal import SendJournal, campaign_id_for, STATUS_SENT, STATUS_FAILED
+
+
+def test_records_are_buffered_until_a_batch_is_full():
+    journal = SendJournal("c1", batch_size=3, flush_interval=60)
+    journal.record("8801711111111", "Ana", STATUS_SENT)
+    journal.record("8801711111112", "Bo", STATUS_FAILED, "timeout")
+    rows = journal.conn.execute("SELECT COUNT(*) FROM sends").fetchone()[0]
+    assert rows == 0
+    journal.record("8801711111113", "Cy", STATUS_SENT)
+    rows = journal.conn.execute("SELECT COUNT(*) FROM sends").fetchone()[0]
+    assert rows == 3
+    journal.close()
+
+
+def test_counts_and_failed_contacts_flush_first():
+    journal = SendJournal("c1", batch_size=100, flush_interval=60)
+    journal.record("8801711111111", "Ana", STATUS_SENT)
+    journal.record("8801711111112", "Bo", STATUS_FAILED, "timeout")
+    assert journal.counts() == {STATUS_SENT: 1, STATUS_FAILED: 1}
+    assert journal.failed_contacts() == [{"name": "Bo", "phone": "8801711111112", "error": "timeout", "attempts": 1}]
+    journal.close()
+
+
+def test_a_second_attempt_updates_the_row():
+    journal = SendJournal("c1", batch_size=1)
+    journal.record("8801711111112", "Bo", STATUS_FAILED, "timeout")
+    journal.record("8801711111112", "Bo", STATUS_SENT)
+    row = journal.conn.execute("SELECT status, error, attempts FROM sends").fetchone()
+    assert row == (STATUS_SENT, None, 2)
+    journal.close()
+
+
+def test_resume_skips_only_sent_contacts():
+    journal = SendJournal("c1")
+    journal.record("1", "Ana", STATUS_SENT)
+    journal.record("2", "Bo", STATUS_FAILED, "timeout")
+    journal.close()
+
+    journal = SendJournal("c1")
+    contacts = [{"phone": p} for p in ("1", "2", "3")]
+    assert [c["phone"] for c in journal.pending(contacts)] == ["2", "3"]
+    assert journal.resumed == 1
+    other = SendJournal("c2")
+    assert [c["phone"] for c in other.pending(contacts)] == ["1", "2", "3"]
+    journal.close()
+    other.close()
+
+
+def test_delivery_states_land_on_rows_written_in_the_same_batch():
+    journal = SendJournal("c1", batch_size=100, flush_interval=60)
+    journal.record("1", "Ana", STATUS_SENT)
+    journal.record("2", "Bo", STATUS_SENT)
+    journal.record_delivery("1", "delivered")
+    assert journal.delivery_counts() == {"delivered": 1, "unknown": 1}
+    journal.close()
+
+
+def test_campaign_id_is_stable_per_file_and_message(tmp_path):
+    path = str(tmp_path / "list.csv")
+    assert campaign_id_for(path, "Hi") == campaign_id_for(path, "Hi")
+    assert campaign_id_for(path, "Hi") != campaign_id_for(path, "Hello")
+    assert campaign_id_for(path, "Hi").startswith("list-")
\ No newline at end of file
@@ -0,0 +1,76 @@
+# test_logsetup.py
+# The queue listener and the SEND_EVENTS modes, written to the test's log files.
+import json
+import logging
+import queue
+
+import pytest
+
+import config
+import logsetup
+from logsetup import SendAttempt, listen, phone_hash, setup_logging, stop_logging
+from statuses import STATUS_SENT, STATUS_TIMEOUT
+
+
+@pytest.fixture(autouse=True)
+def fresh_logging():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    stop_logging()
+    yield
+    stop_logging()
+    root.handlers, root.level = handlers, level
+    logsetup._events_mode = logsetup.EVENTS_ALL
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def two_sends():
+    SendAttempt("8801711111111", "acct").finish(STATUS_SENT)
+    attempt = SendAttempt("8801711111112", "acct")
+    attempt.stage("compose_wait")
+    attempt.finish(STATUS_TIMEOUT, TimeoutError("no compose box"))
+
+
+def test_text_log_and_events_are_written_by_the_listener():
+    setup_logging(events=logsetup.EVENTS_ALL, console=False, rotate="size")
+    logging.getLogger("campaign").info("📬 hello")
+    two_sends()
+    stop_logging()  # flushes the queue
+    text = read_lines(config.LOG_FILE)
+    assert any(line.endswith("INFO - campaign - 📬 hello") for line in text)
+    assert not any('"event"' in line for line in text)
+    events = [json.loads(line) for line in read_lines(config.EVENTS_FILE)]
+    assert [e["status"] for e in events] == [STATUS_SENT, STATUS_TIMEOUT]
+    assert events[0]["phone"] == phone_hash("8801711111111")  # never the number itself
+    assert (events[1]["stage"], events[1]["error"]) == ("compose_wait", "TimeoutError")
+
+
+@pytest.mark.parametrize("mode, statuses", [(logsetup.EVENTS_FAILURES, [STATUS_TIMEOUT]),
+                                            (logsetup.EVENTS_OFF, [])])
+def test_events_modes(mode, statuses):
+    setup_logging(events=mode, console=False, rotate="size")
+    two_sends()
+    stop_logging()
+    assert [json.loads(line)["status"] for line in read_lines(config.EVENTS_FILE)] == statuses
+
+
+def test_worker_records_reach_the_parent_files():
+    setup_logging(console=False, rotate="size")
+    worker_queue = queue.Queue()
+    worker = logging.Logger("pool-worker")
+    worker.addHandler(logsetup._QueueHandler(worker_queue))  # what setup_logging(log_queue=...) installs
+    try:
+        raise RuntimeError("browser gone")
+    except RuntimeError:
+        worker.exception("💥 send failed")
+    record = worker_queue.queue[0]
+    assert record.exc_info is None and "browser gone" in record.exc_text  # picklable across processes
+    listener = listen(worker_queue)
+    listener.stop()
+    stop_logging()
+    text = "\n".join(read_lines(config.LOG_FILE))
+    assert "💥 send failed" in text and "RuntimeError: browser gone" in text
\ No newline at end of file
@@ -0,0 +1,53 @@
+# test_media.py
+import pytest
+
+import config
+from media import MediaCache, MediaError, media_list, file_digest
+
+
+def test_media_list():
+    assert media_list(None) == []
+    assert media_list("a.png; b.jpg") == ["a.png", "b.jpg"]
+    assert media_list(["a.png", ""]) == ["a.png"]
+
+
+def test_documents_are_uploaded_as_they_are(tmp_path):
+    doc = tmp_path / "offer.pdf"
+    doc.write_bytes(b"%PDF-1.4 offer")
+    cache = MediaCache()
+    assert cache.prepare(str(doc)) == str(doc)
+    assert cache.prepare_all(f"{doc}; {doc}") == [str(doc), str(doc)]
+
+
+def test_images_are_passed_through_or_cached(tmp_path):
+    image = tmp_path / "photo.png"
+    image.write_bytes(b"not really a png")
+    cache = MediaCache()
+    if cache.pillow is not None:
+        pytest.skip("Pillow is installed; recompression is covered by bench_media.py")
+    assert cache.prepare(str(image)) == str(image)
+
+
+def test_missing_and_oversized_files_fail_before_sending(tmp_path, monkeypatch):
+    cache = MediaCache()
+    with pytest.raises(MediaError, match="not readable"):
+        cache.prepare(str(tmp_path / "missing.pdf"))
+    doc = tmp_path / "big.pdf"
+    doc.write_bytes(b"x" * 2048)
+    monkeypatch.setattr(config, "MEDIA_MAX_DOCUMENT_BYTES", 1024)
+    with pytest.raises(MediaError, match="over the"):
+        cache.prepare(str(doc))
+
+
+def test_albums_are_limited(tmp_path, monkeypatch):
+    doc = tmp_path / "a.pdf"
+    doc.write_bytes(b"a")
+    monkeypatch.setattr(config, "MEDIA_MAX_FILES", 2)
+    with pytest.raises(MediaError, match="at most 2"):
+        MediaCache().prepare_all([str(doc)] * 3)
+
+
+def test_file_digest_is_content_based(tmp_path):
+    (tmp_path / "a").write_bytes(b"same")
+    (tmp_path / "b").write_bytes(b"same")
+    assert file_digest(str(tmp_path / "a")) == file_digest(str(tmp_path / "b"))
\ No newline at end of file
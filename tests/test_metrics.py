@@ -0,0 +1,47 @@
+# test_metrics.py
+import pytest
+
+from metrics import Histogram, Metrics, format_summary
+from statuses import STATUS_SENT, STATUS_TIMEOUT
+
+
+def test_histogram_quantiles_are_close():
+    h = Histogram()
+    for i in range(1, 1001):
+        h.observe(i / 100.0)  # 0.01 .. 10 s
+    assert h.quantile(0.5) == pytest.approx(5.0, rel=0.25)  # within one bucket (25% wide)
+    assert h.quantile(0.99) == pytest.approx(9.9, rel=0.25)
+    assert Histogram().quantile(0.5) is None
+
+
+def test_recent_throughput_counts_sent_messages_only():
+    metrics = Metrics()
+    metrics.begin("c1")
+    for status in (STATUS_SENT, STATUS_TIMEOUT, STATUS_TIMEOUT, STATUS_SENT):
+        metrics.record(status, 1.0, {"open_chat": 0.5})
+    summary = metrics.summary()
+    assert summary["attempts"] == 4 and summary["sent"] == 2
+    assert summary["error_rate"] == 0.5
+    assert len(metrics.current.recent) == 2
+    assert summary["stages"]["open_chat"]["count"] == 4
+    assert "msg/min" in format_summary(summary)
+
+
+def test_prometheus_text():
+    metrics = Metrics()
+    metrics.begin('say "hi"')
+    metrics.record(STATUS_SENT, 1.0, {"send": 0.2})
+    text = metrics.prometheus()
+    assert 'wa_sends_total{campaign="say \\"hi\\"",status="sent"} 1' in text
+    assert 'wa_stage_duration_seconds_count{campaign="say \\"hi\\"",stage="total"} 1' in text
+
+def test_write_file_replaces_the_file_through_a_per_process_temp(tmp_path):
+    metrics = Metrics()
+    metrics.record(STATUS_SENT, 1.0, {"open_chat": 0.5})
+    assert metrics.dirty
+    (tmp_path / "out").mkdir()
+    path = tmp_path / "out" / "metrics.prom"
+    metrics.write_file(str(path))
+    assert not metrics.dirty
+    assert "wa_sends_total" in path.read_text(encoding="utf-8")
+    assert [p.name for p in path.parent.iterdir()] == ["metrics.prom"]  # no temp left behind
\ No newline at end of file
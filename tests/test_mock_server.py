@@ -0,0 +1,53 @@
+# test_mock_server.py
+# The mock's HTTP API, over a real socket (no browser needed).
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from mock_server import DEFAULTS, MockWhatsAppServer
+
+
+@pytest.fixture
+def server():
+    server = MockWhatsAppServer(latency_ms=0, jitter_ms=0).start()
+    yield server
+    server.stop()
+
+
+def call(server, path, body=None):
+    data = None if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode())
+    request = urllib.request.Request(server.url + path, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_config_changes_the_running_server(server):
+    status, settings = call(server, "/api/config", {"invalid_numbers": ["8801711111112"], "delivery_ms": 0})
+    assert status == 200
+    assert settings == {**DEFAULTS, "latency_ms": 0, "jitter_ms": 0, "invalid_numbers": ["8801711111112"],
+                        "delivery_ms": 0}
+    assert call(server, "/api/open?phone=8801711111112")[1] == {"result": "invalid"}
+    assert call(server, "/api/open?phone=8801711111111")[1] == {"result": "ok"}
+
+
+def test_config_rejects_unknown_keys_and_bad_json(server):
+    status, reply = call(server, "/api/config", {"latency": 5, "jitter_ms": 1})
+    assert status == 400 and reply["unknown"] == ["latency"]
+    assert server.settings["jitter_ms"] == 0  # nothing applied
+    assert call(server, "/api/config", b"{not json")[0] == 400
+
+
+def test_stats_count_what_happened_until_a_reset(server):
+    call(server, "/api/open?phone=8801711111111")
+    call(server, "/api/sent", {"phone": "8801711111111", "text": "Hi"})
+    call(server, "/api/sent", {"phone": "8801711111111", "media": ["a.jpg", "b.jpg"]})
+    status, stats = call(server, "/api/stats")
+    assert status == 200
+    assert stats == {"opened": 1, "invalid": 0, "stalled": 0, "logged_out": 0, "sent": 2, "media": 1, "files": 2}
+    call(server, "/api/reset", {})
+    assert call(server, "/api/stats")[1]["sent"] == 0
\ No newline at end of file
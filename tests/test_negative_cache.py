@@ -0,0 +1,34 @@
+# test_negative_cache.py
+import time
+
+from negative_cache import NegativeCache
+from statuses import STATUS_INVALID
+from utils import iter_contacts
+
+BAD = "8801711111112"
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = NegativeCache(ttl_days=1)
+    cache.add(BAD, STATUS_INVALID)
+    assert cache.known_bad() == {BAD}
+    now[0] += 86400 - 1
+    assert cache.known_bad() == {BAD}
+    now[0] += 1
+    assert cache.known_bad() == set()
+    assert cache.purge_expired() == 1
+    cache.add(BAD, STATUS_INVALID)  # seen again: a fresh TTL
+    cache.remove(BAD)
+    assert cache.known_bad() == set()
+    cache.close()
+
+
+def test_known_bad_numbers_are_skipped_while_loading(write_contacts):
+    cache = NegativeCache()
+    cache.add(BAD, STATUS_INVALID)
+    cache.close()
+    path = write_contacts("a.csv", "name,phone", "Ana,01711111111", "Bo,01711111112")
+    assert [c["name"] for c in iter_contacts(path)] == ["Ana"]
+    assert [c["name"] for c in iter_contacts(path, skip_known_bad=False)] == ["Ana", "Bo"]
\ No newline at end of file
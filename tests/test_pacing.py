@@ -0,0 +1,61 @@
+# test_pacing.py
+import threading
+import time
+
+import pytest
+
+from pacing import Pacer, OUTCOME_OK, OUTCOME_ERROR, OUTCOME_TIMEOUT
+
+
+def make_pacer(**kwargs):
+    settings = dict(rate=1.0, burst=2, min_rate=0.1, max_rate=2.0, increase=0.5, jitter=0)
+    settings.update(kwargs)
+    return Pacer("test", **settings)
+
+
+def test_rate_is_additive_increase_multiplicative_decrease():
+    pacer = make_pacer()
+    pacer.record(OUTCOME_OK)
+    assert pacer.rate == pytest.approx(1.5)
+    pacer.record(OUTCOME_ERROR)
+    assert pacer.rate == pytest.approx(1.2)
+    pacer.record(OUTCOME_TIMEOUT)
+    assert pacer.rate == pytest.approx(0.6)
+
+
+def test_rate_stays_within_bounds():
+    pacer = make_pacer()
+    for _ in range(10):
+        pacer.record(OUTCOME_OK)
+    assert pacer.rate == 2.0
+    for _ in range(20):
+        pacer.record(OUTCOME_TIMEOUT)
+    assert pacer.rate == 0.1
+
+
+def test_reserve_waits_once_the_tokens_are_spent(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("pacing.time.monotonic", lambda: now[0])
+    pacer = make_pacer()
+    assert pacer.reserve() == 100.0       # the one token a new pacer starts with
+    assert pacer.reserve() == pytest.approx(101.0)
+    pacer.refund()
+    assert pacer.reserve() == pytest.approx(101.0)
+
+
+def test_idle_time_refills_up_to_the_burst(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("pacing.time.monotonic", lambda: now[0])
+    pacer = make_pacer()
+    now[0] += 60
+    assert [pacer.reserve() for _ in range(2)] == [160.0, 160.0]
+    assert pacer.reserve() == pytest.approx(161.0)
+
+def test_wait_until_returns_early_once_stopped():
+    pacer = make_pacer()
+    stop = threading.Event()
+    threading.Timer(0.1, stop.set).start()
+    started = time.monotonic()
+    assert pacer.wait_until(started + 60, stop) is False
+    assert time.monotonic() - started < 5
+    assert pacer.wait_until(time.monotonic() - 1) is True
\ No newline at end of file
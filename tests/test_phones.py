@@ -0,0 +1,70 @@
+# test_phones.py
+import pandas as pd
+import pytest
+
+from phones import normalize_phones, REJECT_EMPTY, REJECT_UNKNOWN_COUNTRY, REJECT_BAD_NUMBER
+from utils import format_phone_number
+
+
+@pytest.mark.parametrize("raw, phone, country", [
+    ("01712345678", "8801712345678", "BD"),
+    ("1712345678", "8801712345678", "BD"),
+    ("+880 1712-345678", "8801712345678", "BD"),
+    ("8801712345678", "8801712345678", "BD"),
+    ("+91 98123 45678", "919812345678", "IN"),
+    ("00447912345678", "447912345678", "GB"),
+    (8801712345678, "8801712345678", "BD"),
+])
+def test_valid_numbers(raw, phone, country):
+    row = normalize_phones([raw]).iloc[0]
+    assert row["valid"]
+    assert row["phone"] == phone
+    assert row["e164"] == "+" + phone
+    assert row["country"] == country
+    assert row["reason"] is None
+
+
+@pytest.mark.parametrize("raw, reason", [
+    ("", REJECT_EMPTY),
+    ("abc", REJECT_EMPTY),
+    ("0171234", REJECT_BAD_NUMBER),
+    ("+8801012345678", REJECT_BAD_NUMBER),
+    ("+999123456789", REJECT_UNKNOWN_COUNTRY),
+])
+def test_rejected_numbers(raw, reason):
+    row = normalize_phones([raw]).iloc[0]
+    assert not row["valid"]
+    assert row["phone"] is None and row["e164"] is None
+    assert row["reason"] == reason
+
+
+def test_result_is_aligned_with_a_series_index():
+    values = pd.Series(["01712345678", "", "01812345678"], index=[10, 20, 30])
+    result = normalize_phones(values)
+    assert list(result.index) == [10, 20, 30]
+    assert list(result["valid"]) == [True, False, True]
+
+
+def test_empty_input():
+    result = normalize_phones([])
+    assert list(result.columns) == ["phone", "e164", "country", "valid", "reason"]
+    assert len(result) == 0
+
+
+def test_default_country():
+    assert normalize_phones(["07912345678"], default_country="GB").iloc[0]["phone"] == "447912345678"
+    with pytest.raises(ValueError):
+        normalize_phones(["1"], default_country="XX")
+
+
+def test_agrees_with_the_per_row_formatter_on_bangladeshi_numbers():
+    raw = ["01712345678", "1812345678", "8801912345678", "+880 1512-345678"]
+    assert normalize_phones(raw)["phone"].tolist() == [format_phone_number(p) for p in raw]
+
+def test_floats_in_a_mixed_column_lose_their_decimal_point():
+    values = pd.Series(["01712345678", 8801812345678.0, None, float("nan")], dtype=object)
+    result = normalize_phones(values)
+    assert result["phone"].tolist() == ["8801712345678", "8801812345678", None, None]
+    assert result["reason"].tolist()[2:] == ["empty", "empty"]
+    us = normalize_phones(pd.Series([2125550123.0, 1712345678.0, "2125550124"], dtype=object), default_country="US")
+    assert us["phone"].tolist() == ["12125550123", None, "12125550124"]  # not "17123456780", a valid US number
\ No newline at end of file
@@ -0,0 +1,121 @@
+# test_pool.py
+# The dispatcher with stand-in workers (no browser). They run in spawned
+# processes, so they have to be module-level functions.
+import os
+import time
+
+from journal import SendJournal, STATUS_SENT, STATUS_FAILED
+import pool
+from pool import SessionPool
+from retry import PERMANENT
+
+INVALID = "8801700000003"
+
+
+def steady(profile_dir, tasks, results, media_path, headless, log_queue, taken):
+    results.put(("ready", profile_dir, None))
+    try:
+        while True:
+            item = tasks.get()
+            if item is None:
+                break
+            index, contact = item
+            taken.value = index
+            if contact["phone"] == INVALID:
+                results.put(("failed", profile_dir, (index, contact, "invalid", PERMANENT, None, {})))
+            else:
+                results.put(("sent", profile_dir, (index, contact, None, None, None, {contact["phone"]: "sent"})))
+    finally:
+        results.put(("done", profile_dir, None))
+
+
+def patient(profile_dir, *args):
+    """steady, once killed_mid_send has taken its contact"""
+    while not os.path.exists(os.path.join(os.path.dirname(profile_dir), "taken")):
+        time.sleep(0.01)
+    steady(profile_dir, *args)
+
+
+def killed_mid_send(profile_dir, tasks, results, media_path, headless, log_queue, taken):
+    results.put(("ready", profile_dir, None))
+    index, contact = tasks.get()
+    taken.value = index
+    open(os.path.join(os.path.dirname(profile_dir), "taken"), "w").close()
+    os._exit(1)  # no "done", no result: what an OOM kill looks like
+
+
+def one_and_done(profile_dir, tasks, results, media_path, headless, log_queue, taken):
+    results.put(("ready", profile_dir, None))
+    try:
+        index, contact = tasks.get()
+        taken.value = index
+        results.put(("sent", profile_dir, (index, contact, None, None, None, {})))
+    finally:
+        results.put(("done", profile_dir, None))
+
+
+def dead_at_start(profile_dir, tasks, results, *args):
+    results.put(("dead", profile_dir, None))  # its browser never came up
+
+
+def slow_login(profile_dir, *args):
+    """steady, after a login that outlasts several result waits"""
+    time.sleep(1)
+    steady(profile_dir, *args)
+
+
+def contacts(n, read=None):
+    for i in range(n):
+        if read is not None:
+            read.append(i)
+        yield {"name": f"n{i}", "phone": f"88017{i:08d}"}
+
+
+def stand_in(profile_dir, *args):
+    """The profile name says how its worker behaves: "steady-1", "killed_mid_send-2", ..."""
+    globals()[os.path.basename(profile_dir).rsplit("-", 1)[0]](profile_dir, *args)
+
+
+def run(tmp_path, behaviours, n, journal=None, read=None):
+    pool = SessionPool([str(tmp_path / f"{name}-{i}") for i, name in enumerate(behaviours)], worker=stand_in)
+    *_, last = pool.run(contacts(n, read), "Hi {name}", total=n, journal=journal)
+    return last
+
+
+def test_contacts_are_shared_between_workers_and_journaled(tmp_path):
+    journal = SendJournal("pool", batch_size=1)
+    sent, total, failed = run(tmp_path, ["steady", "steady"], 20, journal)
+    assert (sent, total) == (19, 20)
+    assert [c["phone"] for c in failed] == [INVALID]
+    assert journal.counts() == {STATUS_SENT: 19, STATUS_FAILED: 1}
+    assert journal.delivery_counts() == {"sent": 19}
+    journal.close()
+
+
+def test_a_worker_killed_mid_send_does_not_hang_the_run(tmp_path):
+    journal = SendJournal("pool", batch_size=1)
+    sent, total, failed = run(tmp_path, ["patient", "killed_mid_send"], 20, journal)
+    assert sent + len(failed) == 20
+    assert len([c for c in failed if c["phone"] != INVALID]) == 1
+    stopped = journal.conn.execute("SELECT COUNT(*) FROM sends WHERE error = 'worker stopped'").fetchone()[0]
+    assert stopped == 1  # failed, not resent: the message may be out
+    journal.close()
+
+
+def test_unsent_contacts_stay_pending_when_every_worker_stops(tmp_path):
+    journal = SendJournal("pool", batch_size=1)
+    read = []
+    sent, total, failed = run(tmp_path, ["one_and_done", "one_and_done"], 1000, journal, read)
+    assert sent == 2 and failed == []
+    assert journal.counts() == {STATUS_SENT: 2}
+    assert len(read) < 1000  # the stream is not drained into the journal as failures
+    journal.close()
+
+
+def test_a_slow_worker_is_not_taken_for_dead(tmp_path, monkeypatch):
+    monkeypatch.setattr(pool, "RESULT_WAIT", 0.1)
+    journal = SendJournal("pool", batch_size=1)
+    sent, total, failed = run(tmp_path, ["dead_at_start", "slow_login"], 3, journal)
+    assert (sent, total, failed) == (3, 3, [])  # none failed while it was logging in
+    assert journal.counts() == {STATUS_SENT: 3}
+    journal.close()
\ No newline at end of file
@@ -0,0 +1,64 @@
+# test_profiles.py
+# Snapshots, pruning and clones on fake profile directories.
+import os
+
+import pytest
+
+import profiles
+
+
+def make_profile(path, locked=False):
+    """A profile with some login state and some cache"""
+    for rel, size in (("Local State", 10), ("Default/Cookies", 100), ("Default/IndexedDB/keys", 1000),
+                      ("Default/Cache/data_0", 5000), ("GrShaderCache/data", 2000)):
+        target = os.path.join(path, rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(b"x" * size)
+    if locked:
+        open(os.path.join(path, "SingletonLock"), "w").close()
+    return str(path)
+
+
+def test_snapshot_keeps_the_login_state_only(tmp_path):
+    profile = make_profile(tmp_path / "wa_1")
+    dest = profiles.snapshot(profile)
+    assert os.path.isfile(os.path.join(dest, "Default", "IndexedDB", "keys"))
+    assert not os.path.exists(os.path.join(dest, "Default", "Cache"))
+    [entry] = profiles.snapshots()
+    assert entry["name"] == "wa_1" and entry["bytes"] == 1110
+
+
+def test_snapshot_and_prune_refuse_an_open_profile(tmp_path):
+    profile = make_profile(tmp_path / "wa_1", locked=True)
+    with pytest.raises(RuntimeError, match="open in a browser"):
+        profiles.snapshot(profile)
+    with pytest.raises(RuntimeError, match="open in a browser"):
+        profiles.prune(profile)
+    assert os.path.exists(os.path.join(profile, "Default", "Cache"))
+
+
+def test_prune_removes_caches_only(tmp_path):
+    profile = make_profile(tmp_path / "wa_1")
+    assert profiles.prune(profile) == 7000
+    assert not os.path.exists(os.path.join(profile, "Default", "Cache"))
+    assert os.path.isfile(os.path.join(profile, "Default", "Cookies"))
+
+
+def test_clone_restores_a_snapshot_but_never_over_a_profile(tmp_path):
+    profiles.snapshot(make_profile(tmp_path / "wa_1"))
+    clone = profiles.clone("wa_1", str(tmp_path / "wa_2"))
+    assert os.path.isfile(os.path.join(clone, "Default", "Cookies"))
+    assert not os.path.exists(os.path.join(clone, profiles.MANIFEST))
+    with pytest.raises(FileExistsError):
+        profiles.clone("wa_1", make_profile(tmp_path / "wa_3", locked=True))
+    with pytest.raises(FileNotFoundError):
+        profiles.clone("nope", str(tmp_path / "wa_4"))
+
+
+def test_maintain_restores_a_missing_profile(tmp_path):
+    profile = make_profile(tmp_path / "wa_1")
+    profiles.snapshot(profile)
+    profiles._remove(profile)
+    assert profiles.maintain(profile) == profile
+    assert os.path.isfile(os.path.join(profile, "Local State"))
\ No newline at end of file
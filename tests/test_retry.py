@@ -0,0 +1,61 @@
+# test_retry.py
+import threading
+import time
+
+from retry import RetryQueue, classify, backoff, TRANSIENT, PERMANENT, SESSION
+from statuses import STATUS_INVALID, STATUS_LOGGED_OUT, STATUS_TIMEOUT, STATUS_ERROR, STATUS_UNCONFIRMED
+
+
+def test_classify():
+    assert classify(STATUS_TIMEOUT) == TRANSIENT
+    assert classify(STATUS_ERROR, "Element is not attached to the DOM") == TRANSIENT
+    assert classify(STATUS_INVALID) == PERMANENT
+    assert classify(STATUS_LOGGED_OUT) == SESSION
+    assert classify(STATUS_ERROR, "Target page, context or browser has been closed") == SESSION
+
+
+def test_a_pressed_send_is_never_retried():
+    # The message may already be out; a retry could send it twice
+    assert classify(STATUS_UNCONFIRMED, "Target closed") == PERMANENT
+
+
+def test_backoff_doubles_up_to_the_cap():
+    for attempt, expected in ((1, 10), (2, 20), (3, 40), (6, 100)):
+        assert 0.8 * expected <= backoff(attempt, base=10, cap=100) <= 1.2 * expected
+
+
+def test_retries_are_limited():
+    queue = RetryQueue(max_retries=2, base_delay=0)
+    assert queue.schedule({"phone": "1"}, 1)
+    assert queue.schedule({"phone": "1"}, 2)
+    assert not queue.schedule({"phone": "1"}, 3)
+    assert len(queue) == 2
+
+
+def test_due_retries_come_before_fresh_contacts():
+    queue = RetryQueue(max_retries=3, base_delay=0, max_delay=0)
+    fresh = iter([{"phone": "2"}, {"phone": "3"}])
+    order = []
+    for contact, attempt in queue.interleave(fresh):
+        order.append((contact["phone"], attempt))
+        if contact["phone"] == "2" and attempt == 1:
+            queue.schedule(contact, attempt)
+    assert order == [("2", 1), ("2", 2), ("3", 1)]
+
+
+def test_drain_empties_the_queue():
+    queue = RetryQueue(max_retries=3, base_delay=60)
+    queue.schedule({"phone": "1"}, 1)
+    assert queue.pop_due() is None
+    assert queue.drain() == [({"phone": "1"}, 2)]
+    assert queue.wait_time() is None
+
+def test_stop_ends_a_backoff_wait():
+    queue = RetryQueue(max_retries=3, base_delay=60)
+    queue.schedule({"phone": "1"}, 1)
+    stop = threading.Event()
+    threading.Timer(0.1, stop.set).start()
+    started = time.monotonic()
+    assert list(queue.interleave([], stop)) == []
+    assert time.monotonic() - started < 5
+    assert len(queue) == 1  # still waiting, never handed out
\ No newline at end of file
@@ -0,0 +1,102 @@
+# test_scheduler.py
+import time
+from datetime import datetime
+
+import pytest
+
+from scheduler import (CronSchedule, Scheduler, task, STATE_SCHEDULED, STATE_DONE, STATE_FAILED, STATE_CANCELLED,
+                       STATE_INTERRUPTED, STATE_RUNNING)
+
+calls = []
+
+
+@task("tests.record")
+def record(value):
+    calls.append(value)
+
+
+@task("tests.fail")
+def fail():
+    raise RuntimeError("boom")
+
+
+def ts(*args):
+    return datetime(*args).timestamp()
+
+
+def test_cron_next_after():
+    weekdays = CronSchedule("30 9 * * 1-5")
+    assert weekdays.next_after(ts(2026, 1, 2, 9, 0)) == ts(2026, 1, 2, 9, 30)   # Friday
+    assert weekdays.next_after(ts(2026, 1, 2, 10, 0)) == ts(2026, 1, 5, 9, 30)  # -> Monday
+    assert CronSchedule("*/15 * * * *").next_after(ts(2026, 1, 1, 0, 7)) == ts(2026, 1, 1, 0, 15)
+    assert CronSchedule("@monthly").next_after(ts(2026, 1, 15)) == ts(2026, 2, 1)
+
+
+def test_cron_day_or_weekday():
+    # Both restricted: either may match, as in cron
+    schedule = CronSchedule("0 0 13 * 5")
+    assert schedule.next_after(ts(2026, 1, 1)) == ts(2026, 1, 2)  # a Friday comes first
+
+
+@pytest.mark.parametrize("expr", ["* * *", "60 * * * *", "0 0 31 2 *"])
+def test_bad_cron_expressions(expr):
+    with pytest.raises(ValueError):
+        CronSchedule(expr).next_after(ts(2026, 1, 1))
+
+
+def test_jobs_are_stored_and_cancelled():
+    scheduler = Scheduler(workers=1)
+    job_id = scheduler.add_job("tests.record", run_at="2099-01-01 09:00", args=(1,))
+    assert scheduler.get_job(job_id)["state"] == STATE_SCHEDULED
+    assert [job["id"] for job in scheduler.jobs()] == [job_id]
+    assert scheduler.cancel(job_id)
+    assert not scheduler.cancel(job_id)
+    assert scheduler.get_job(job_id)["state"] == STATE_CANCELLED
+    with pytest.raises(ValueError):
+        scheduler.add_job("tests.record", every=10, cron="* * * * *")
+    scheduler.shutdown()
+
+
+def wait_for(scheduler, job_id, states, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = scheduler.get_job(job_id)
+        if job["state"] in states:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} still {job['state']}")
+
+
+def test_due_jobs_run_and_record_the_outcome():
+    calls.clear()
+    scheduler = Scheduler(workers=1).start()
+    try:
+        ok = scheduler.add_job(record, args=("hello",))
+        assert wait_for(scheduler, ok, (STATE_DONE,))["runs"] == 1
+        bad = scheduler.add_job("tests.fail")
+        assert "boom" in wait_for(scheduler, bad, (STATE_FAILED,))["last_error"]
+    finally:
+        scheduler.shutdown()
+    assert calls == ["hello"]
+
+
+def test_jobs_running_at_a_crash_are_not_rerun():
+    scheduler = Scheduler(workers=1)
+    job_id = scheduler.add_job("tests.record", run_at="2099-01-01 09:00", args=(1,))
+    with scheduler.conn:
+        scheduler.conn.execute("UPDATE jobs SET state = ? WHERE id = ?", (STATE_RUNNING, job_id))
+    scheduler.shutdown()
+
+    scheduler = Scheduler(workers=1).start()
+    scheduler.shutdown()
+    scheduler = Scheduler(workers=1)
+    assert scheduler.get_job(job_id)["state"] == STATE_INTERRUPTED
+    scheduler.shutdown()
+
+
+def test_every_reschedules_from_the_last_slot():
+    scheduler = Scheduler(workers=1)
+    start = time.time() - 25
+    assert scheduler._next_occurrence(10, None, start, time.time(), catch_up=True) == start + 10
+    assert scheduler._next_occurrence(10, None, start, start + 25, catch_up=False) == start + 30
+    scheduler.shutdown()
\ No newline at end of file
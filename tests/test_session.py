@@ -0,0 +1,89 @@
+# test_session.py
+# Lean-mode launch decisions of WhatsAppSession, with Playwright's launcher
+# replaced by a fake browser: headless launches only ever show the login QR.
+import json
+import os
+import time
+
+import pytest
+
+pytest.importorskip("playwright.sync_api")
+
+import session  # noqa: E402
+from session import CHAT_LIST, LOGIN_MARKER, WhatsAppSession  # noqa: E402
+
+HEADED_UA = "Mozilla/5.0 (X11; Linux x86_64) Chrome/124.0 Safari/537.36"
+
+
+class FakePage:
+    def __init__(self, logged_in):
+        self.logged_in = logged_in
+
+    def goto(self, url):
+        pass
+
+    def wait_for_selector(self, selector, timeout=None):
+        pass  # the chat list or the QR, whichever the launch shows
+
+    def query_selector(self, selector):
+        return object() if selector == CHAT_LIST and self.logged_in else None
+
+    def evaluate(self, script):
+        return HEADED_UA
+
+    def is_closed(self):
+        return False
+
+
+class FakeBrowser:
+    def __init__(self, launches):
+        self.launches = launches
+
+    def launch_persistent_context(self, user_data_dir, **options):
+        self.launches.append(options)
+        context = type("Context", (), {"route": lambda *a: None, "close": lambda *a: None})()
+        context.pages = [FakePage(logged_in=not options["headless"])]  # the headless UA gets the QR
+        return context
+
+
+@pytest.fixture
+def launches(monkeypatch):
+    launches = []
+    playwright = type("Playwright", (), {"chromium": FakeBrowser(launches), "stop": lambda self: None})()
+    monkeypatch.setattr(session, "sync_playwright", lambda: type("Starter", (), {"start": lambda self: playwright})())
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    return launches
+
+
+def make_profile(tmp_path, marker=True):
+    profile = tmp_path / "profile"
+    profile.mkdir()
+    if marker:
+        (profile / LOGIN_MARKER).write_text(json.dumps({"user_agent": HEADED_UA}), encoding="utf-8")
+    return str(profile)
+
+
+def test_first_lean_start_is_headed(tmp_path, launches):
+    profile = make_profile(tmp_path, marker=False)
+    wa = WhatsAppSession(user_data_dir=profile, lean=True, snapshot=False)
+    assert wa.start()
+    assert [options["headless"] for options in launches] == [False]
+    assert json.loads(open(os.path.join(profile, LOGIN_MARKER), encoding="utf-8").read())["user_agent"] == HEADED_UA
+
+
+def test_a_lost_headless_login_falls_back_to_a_visible_window(tmp_path, launches):
+    profile = make_profile(tmp_path)
+    wa = WhatsAppSession(user_data_dir=profile, lean=True, snapshot=False)
+    assert wa.start()
+    assert [options["headless"] for options in launches] == [True, False]
+    assert launches[0]["user_agent"] == HEADED_UA  # the real browser's UA, not HeadlessChrome
+    assert wa.headless is False and wa.logged_in
+    assert os.path.exists(os.path.join(profile, LOGIN_MARKER))  # rewritten by the headed login
+
+
+def test_an_explicit_headless_start_does_not_fall_back(tmp_path, launches):
+    profile = make_profile(tmp_path)
+    wa = WhatsAppSession(user_data_dir=profile, lean=True, snapshot=False)
+    assert not wa.start(headless=True)
+    assert len(launches) == 1
+    assert not os.path.exists(os.path.join(profile, LOGIN_MARKER))  # the next auto start is headed
\ No newline at end of file
@@ -0,0 +1,76 @@
+# test_template_registry.py
+import os
+
+import pytest
+
+from template_registry import Template, TemplateRegistry
+
+
+def test_placeholders_are_parsed_once():
+    template = Template("Hi {name}, see you in {city}!")
+    assert template.fields == {"name", "city"}
+    assert template.render({"name": "Ana", "city": "Dhaka"}) == "Hi Ana, see you in Dhaka!"
+
+
+def test_positional_placeholders_are_rejected():
+    with pytest.raises(ValueError, match="positional"):
+        Template("Hi {0}", name="bad")
+
+
+def test_render_batch_url_encodes():
+    template = Template("Hi {name}")
+    assert template.render_batch([{"name": "A B"}], url_encode=True) == ["Hi%20A%20B"]
+
+
+def test_render_stream_attaches_messages():
+    contacts = [{"name": str(i)} for i in range(5)]
+    out = list(Template("Hi {name}").render_stream(contacts, batch_size=2))
+    assert [c["message"] for c in out] == [f"Hi {i}" for i in range(5)]
+
+
+def test_every_source_is_checked_before_sending(write_contacts):
+    # The second source has no city column: this used to be a KeyError mid-campaign
+    a = write_contacts("a.csv", "name,phone,city", "Ana,01711111111,Dhaka")
+    b = write_contacts("b.txt", "Bo - 01711111112")
+    template = Template("Hi {name} from {city}")
+    template.check_sources(a)
+    with pytest.raises(ValueError, match=r"\['city'\] but contacts in b.txt"):
+        template.check_sources([a, b])
+
+
+def test_render_stream_raises_value_error_for_a_missing_column():
+    contacts = [{"name": "Ana", "city": "Dhaka"}, {"name": "Bo"}]
+    with pytest.raises(ValueError, match="city"):
+        list(Template("Hi {name} from {city}").render_stream(contacts))
+
+
+def write(path, text, mtime):
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def test_registry_reloads_edited_templates(tmp_path):
+    write(tmp_path / "welcome.txt", "Hi {name}", 1000)
+    registry = TemplateRegistry(str(tmp_path), check_interval=0)
+    assert registry.get("welcome").text == "Hi {name}"
+    write(tmp_path / "welcome.txt", "Hello {name}", 2000)
+    assert registry.get("welcome").text == "Hello {name}"
+
+
+def test_registry_retries_a_failed_file_once_it_is_fixed(tmp_path):
+    write(tmp_path / "good.txt", "Hi {name}", 1000)
+    write(tmp_path / "bad.txt", "Hi {0}", 1000)
+    registry = TemplateRegistry(str(tmp_path), check_interval=0)
+    assert registry.names() == ["good"]
+    assert registry.names() == ["good"]  # not parsed again while unchanged
+    write(tmp_path / "bad.txt", "Hi {name}", 2000)  # fixed in place: the directory mtime stays the same
+    assert registry.names() == ["bad", "good"]
+
+
+def test_registry_forgets_deleted_templates(tmp_path):
+    write(tmp_path / "a.txt", "A", 1000)
+    registry = TemplateRegistry(str(tmp_path), check_interval=0)
+    assert registry.names() == ["a"]
+    os.remove(tmp_path / "a.txt")
+    os.utime(tmp_path, (3000, 3000))
+    assert registry.names() == []
\ No newline at end of file
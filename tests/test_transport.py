@@ -0,0 +1,139 @@
+# test_transport.py
+# Whole campaigns on the simulated client: contact store, templates, sender,
+# retries, journal and delivery ticks, without a browser.
+import threading
+import time
+
+import pytest
+
+import config
+from campaign import run_campaign
+from journal import SendJournal, STATUS_SENT, STATUS_FAILED
+from pacing import Pacer
+from sender import MessageSender
+from transport import SimulatedSession, SimulatedTransport, Transport
+
+CONTACTS = ("name,phone", "Ana,01711111111", "Bo,01711111112", "Cy,01711111113")
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(config, "RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(config, "RETRY_MAX_DELAY", 0)
+    monkeypatch.setattr(config, "MAX_RETRIES", 2)
+
+
+def run(path, message="Hi {name}", campaign_id="sim", resume=False, **settings):
+    session = SimulatedSession(latency_ms=0, attach_ms=0, send_ms=0, seed=1, **settings)
+    pacer = Pacer("simulated", rate=1e9, burst=1e9, max_rate=1e9, jitter=0)
+    progress = list(run_campaign(session, path, message, campaign_id=campaign_id, resume=resume, pacer=pacer))
+    return session.page, progress[-1] if progress else None
+
+
+def journal_counts(campaign_id="sim"):
+    journal = SendJournal(campaign_id)
+    try:
+        return journal.counts(), journal.delivery_counts()
+    finally:
+        journal.close()
+
+
+def test_transport_is_abstract():
+    class Incomplete(Transport):
+        def navigate(self, url, in_app=False):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_unknown_simulation_settings_are_rejected():
+    with pytest.raises(ValueError, match="unknown simulation settings"):
+        SimulatedTransport(latency=5)
+
+
+def test_every_contact_is_sent_and_journaled(write_contacts):
+    path = write_contacts("a.csv", *CONTACTS)
+    client, (sent, total, failed) = run(path)
+    assert (sent, total, failed) == (3, 3, [])
+    assert client.counts["sent"] == 3
+    counts, deliveries = journal_counts()
+    assert counts == {STATUS_SENT: 3}
+    assert deliveries == {"delivered": 3}
+
+
+def test_undelivered_messages_keep_one_tick(write_contacts):
+    path = write_contacts("a.csv", *CONTACTS)
+    run(path, undelivered_rate=1.0)
+    assert journal_counts()[1] == {"sent": 3}
+
+
+def test_invalid_numbers_fail_once_and_are_remembered(write_contacts):
+    path = write_contacts("a.csv", *CONTACTS)
+    client, (sent, total, failed) = run(path, invalid_numbers=["8801711111112"])
+    assert sent == 2 and [c["name"] for c in failed] == ["Bo"]
+    assert client.counts["opened"] == 3  # not retried
+    client, (sent, total, failed) = run(path, campaign_id="next")
+    assert client.counts["opened"] == 2  # the negative cache drops it while loading
+
+
+def test_transient_errors_are_retried_then_given_up(write_contacts):
+    path = write_contacts("a.csv", *CONTACTS[:2])
+    client, (sent, total, failed) = run(path, error_rate=1.0)
+    assert sent == 0 and len(failed) == 1
+    assert client.counts["errors"] == 1 + config.MAX_RETRIES
+    assert journal_counts()[0] == {STATUS_FAILED: 1}
+
+
+def test_a_logout_reconnects_and_carries_on(write_contacts):
+    path = write_contacts("a.csv", *CONTACTS)
+    client, (sent, total, failed) = run(path, logout_after=2)
+    assert (sent, failed) == (3, [])
+    assert client.counts["logged_out"] == 1
+
+
+def test_resume_skips_what_was_sent(write_contacts):
+    path = write_contacts("a.csv", *CONTACTS)
+    run(path, invalid_numbers=["8801711111112"])
+    client, _ = run(path, resume=True)
+    assert client.counts["opened"] == 0  # Bo is in the negative cache, the others were sent
+    client, _ = run(path, resume=False)
+    assert client.counts["opened"] == 2
+
+
+def test_a_source_without_a_placeholder_column_fails_before_sending(write_contacts):
+    a = write_contacts("a.csv", "name,phone,city", "Ana,01711111111,Dhaka")
+    b = write_contacts("b.txt", "Bo - 01711111112")
+    session = SimulatedSession(latency_ms=0)
+    with pytest.raises(ValueError, match="b.txt"):
+        list(run_campaign(session, [a, b], "Hi {name} from {city}"))
+    assert session.page.counts["opened"] == 0
+
+def test_stop_cuts_the_pacing_wait_and_leaves_the_rest_pending(write_contacts):
+    path = write_contacts("a.csv", *CONTACTS)
+    session = SimulatedSession(latency_ms=0, attach_ms=0, send_ms=0, seed=1)
+    pacer = Pacer("simulated", rate=0.01, burst=1, min_rate=0.01, max_rate=0.01, jitter=0)  # 100 s per message
+    stop = threading.Event()
+    progress = run_campaign(session, path, "Hi {name}", campaign_id="sim", pacer=pacer, stop=stop)
+    assert next(progress)[0] == 1
+    threading.Timer(0.2, stop.set).start()  # the second send is waiting for its slot by then
+    started = time.monotonic()
+    assert [sent for sent, _, _ in progress] == [1]  # the bar closes at what was processed
+    assert time.monotonic() - started < 5
+    assert session.page.counts["sent"] == 1
+    assert journal_counts()[0] == {STATUS_SENT: 1}  # the other two were never journaled
+    client, (sent, total, failed) = run(path, resume=True)
+    assert client.counts["sent"] == 2 and failed == []
+
+@pytest.mark.parametrize("setting, expected", [("goto", [False, False]), ("in_app", [False, True])])
+def test_in_app_navigation_is_opt_in(monkeypatch, setting, expected):
+    monkeypatch.setattr(config, "NAVIGATION", setting)
+    client = SimulatedTransport(latency_ms=0, attach_ms=0, send_ms=0, seed=1)
+    modes = []
+    navigate = client.navigate
+    monkeypatch.setattr(client, "navigate", lambda url, in_app=False: modes.append(in_app) or navigate(url, in_app))
+    sender = MessageSender(client, base_url=client.base_url,
+                           pacer=Pacer("simulated", rate=1e9, burst=1e9, max_rate=1e9, jitter=0))
+    for phone in ("8801711111111", "8801711111112"):
+        assert sender.send_message(phone, "Hi")
+    assert modes == expected  # in-app needs a loaded app, so the first chat is a goto either way
\ No newline at end of file
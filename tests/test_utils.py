@@ -0,0 +1,65 @@
+# test_utils.py
+# Contact files: streaming, counting and number cleanup.
+import logging
+
+import pytest
+
+from utils import count_contacts, export_failed_contacts, iter_contacts, load_contacts
+
+
+def test_skipped_numbers_are_logged_not_printed(write_contacts, caplog, capsys):
+    path = write_contacts("a.csv", "name,phone", "Ana,01711111111", "Bo,123", "Cy,")
+    with caplog.at_level(logging.INFO, logger="utils"):
+        contacts = list(iter_contacts(path, skip_known_bad=False))
+        export_failed_contacts([{"name": "Bo", "phone": "123"}], "failed.csv")
+    assert [c["name"] for c in contacts] == ["Ana"]
+    assert [r.levelno for r in caplog.records] == [logging.WARNING, logging.INFO]
+    assert "Skipping 2 invalid numbers" in caplog.records[0].getMessage()
+    assert "failed.csv" in caplog.records[1].getMessage()
+    assert capsys.readouterr().out == ""
+
+
+def test_csv_is_read_in_chunks_with_extra_columns_and_the_number_alias(write_contacts):
+    rows = [f"n{i},0171111111{i},city{i}" for i in range(5)]
+    path = write_contacts("a.csv", "name,number,city", *rows)
+    stream = iter_contacts(path, chunk_size=2, skip_known_bad=False)
+    first = next(stream)  # available before the rest of the file is parsed
+    assert first == {"name": "n0", "phone": "8801711111110", "city": "city0"}
+    assert [c["name"] for c in stream] == ["n1", "n2", "n3", "n4"]
+    assert count_contacts(path) == 5
+
+
+def test_count_contacts_without_a_trailing_newline(tmp_path):
+    path = tmp_path / "a.csv"
+    path.write_text("name,phone\nAna,01711111111\nBo,01711111112", encoding="utf-8")
+    assert count_contacts(str(path)) == 2
+
+
+def test_txt_lines_with_and_without_a_name(write_contacts):
+    path = write_contacts("a.txt", "Ana - 01711111111", "", "01711111112")
+    assert [(c["name"], c["phone"]) for c in load_contacts(path, skip_known_bad=False)] == [
+        ("Ana", "8801711111111"), ("Customer", "8801711111112")]
+    assert count_contacts(path) == 2
+
+
+def test_xlsx_rows(tmp_path):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    wb.active.append(["Name", "Number"])
+    for row in (["Ana", 8801711111111.0], ["Bo", None], ["Cy", "01711111113"]):
+        wb.active.append(row)
+    path = str(tmp_path / "a.xlsx")
+    wb.save(path)
+    contacts = load_contacts(path, skip_known_bad=False)
+    assert [(c["name"], c["phone"]) for c in contacts] == [("Ana", "8801711111111"), ("Cy", "8801711111113")]
+    assert count_contacts(path) == 3  # a row count: the empty one is included
+
+
+def test_bad_files_fail_before_any_row_is_read(write_contacts, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        iter_contacts(str(tmp_path / "none.csv"))
+    with pytest.raises(ValueError, match=".csv, .txt or .xlsx"):
+        iter_contacts(write_contacts("a.json", "{}"))
+    with pytest.raises(ValueError, match="CSV must have columns"):
+        list(iter_contacts(write_contacts("b.csv", "who,phone", "Ana,01711111111")))
\ No newline at end of file
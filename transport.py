@@ -0,0 +1,291 @@
+# transport.py
+# The browser side of a send, behind one small interface: MessageSender keeps
+# pacing, stage timing and result classification, a Transport opens chats,
+# attaches files and presses send. PlaywrightTransport drives WhatsApp Web;
+# SimulatedTransport does the same in-process with configurable latency and
+# failures, so the Python side of a campaign can be measured on its own.
+import abc
+import math
+import random
+import time
+
+import config
+from delivery import DeliveryTracker, tracker_for, DELIVERY_SENT, DELIVERY_DELIVERED
+
+COMPOSE_BOX = 'div[contenteditable="true"][data-tab="10"]'
+INVALID_NUMBER_DIALOG = 'div[data-animate-modal-popup="true"]:has-text("invalid")'
+LOGIN_QR = 'canvas[aria-label="Scan me!"]'
+ATTACH_BUTTON = 'div[title="Attach"]'
+ATTACH_INPUT = 'input[type="file"]'
+SEND_BUTTON = 'span[data-icon="send"]'
+OPEN_CHAT_TIMEOUT_MS = 30000
+IN_APP_TIMEOUT_MS = 10000
+MEDIA_PREVIEW_TIMEOUT_MS = 20000
+
+# Clicking a /send link inside WhatsApp Web is routed by the app itself, the
+# same way it handles click-to-chat links in messages. The current compose box
+# is marked first, so the wait below only matches the box of the new chat.
+OPEN_CHAT_JS = """
+(url) => {
+    document.querySelectorAll('%s').forEach(el => el.setAttribute('data-raven-stale', '1'));
+    const link = document.createElement('a');
+    link.href = url;
+    link.style.display = 'none';
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
+}
+""" % COMPOSE_BOX
+
+
+class InvalidNumberError(Exception):
+    pass
+
+
+class LoggedOutError(Exception):
+    pass
+
+
+class Transport(abc.ABC):
+    """What MessageSender needs from a WhatsApp client.
+
+    wait_for_chat() raises InvalidNumberError / LoggedOutError as soon as the
+    client shows them; slow steps raise an exception named TimeoutError
+    (Playwright's or the builtin), which MessageSender reports as a timeout.
+    """
+
+    url = ""  # current location, for the in-app navigation check
+    page = None  # the Playwright page, where there is one
+    delivery = None  # delivery.DeliveryTracker, where the client reports tick states
+
+    @abc.abstractmethod
+    def navigate(self, url, in_app=False):
+        pass
+
+    @abc.abstractmethod
+    def wait_for_chat(self, in_app=False):
+        pass
+
+    @abc.abstractmethod
+    def attach(self, files):
+        pass
+
+    @abc.abstractmethod
+    def wait_media_preview(self):
+        pass
+
+    @abc.abstractmethod
+    def fill_caption(self, text):
+        pass
+
+    @abc.abstractmethod
+    def send_media(self):
+        pass
+
+    @abc.abstractmethod
+    def send_text(self):
+        pass
+
+    def confirm(self, phone):
+        """Delivery state once the message just sent has left the outbox; None when not tracked"""
+        return None
+
+    def settle(self, seconds):
+        pass
+
+
+class PlaywrightTransport(Transport):
+    def __init__(self, page):
+        self.page = page
+        self.delivery = tracker_for(page) if config.DELIVERY_TRACKING else None
+
+    @property
+    def url(self):
+        return self.page.url
+
+    def navigate(self, url, in_app=False):
+        if in_app:
+            self.page.evaluate(OPEN_CHAT_JS, url)
+        else:
+            self.page.goto(url)
+
+    def wait_for_chat(self, in_app=False):
+        """Race the compose box against the error states, raise on the errors"""
+        compose = f"{COMPOSE_BOX}:not([data-raven-stale])" if in_app else COMPOSE_BOX
+        timeout = IN_APP_TIMEOUT_MS if in_app else OPEN_CHAT_TIMEOUT_MS
+        self.page.wait_for_selector(f"{compose}, {INVALID_NUMBER_DIALOG}, {LOGIN_QR}", timeout=timeout)
+        if self.page.query_selector(INVALID_NUMBER_DIALOG):
+            self.page.keyboard.press("Escape")  # close the popup so the next chat can open
+            raise InvalidNumberError("Phone number is not on WhatsApp")
+        if self.page.query_selector(LOGIN_QR):
+            raise LoggedOutError("WhatsApp Web is asking for a QR login")
+
+    def attach(self, files):
+        """Put the files straight on the hidden file input, without the native chooser round trip.
+
+        Several files go out as one album. The input only exists once the
+        attach menu has been rendered, so Attach is clicked only if it is missing.
+        """
+        if self.page.query_selector(ATTACH_INPUT) is None:
+            self.page.click(ATTACH_BUTTON)
+        self.page.set_input_files(ATTACH_INPUT, files)
+
+    def wait_media_preview(self):
+        self.page.wait_for_selector(SEND_BUTTON, timeout=MEDIA_PREVIEW_TIMEOUT_MS)
+
+    def fill_caption(self, text):
+        self.page.fill(COMPOSE_BOX, text)
+
+    def send_media(self):
+        self.page.click(SEND_BUTTON)
+
+    def send_text(self):
+        self.page.press(COMPOSE_BOX, "Enter")
+
+    def confirm(self, phone):
+        if self.delivery is None:
+            return None
+        return self.delivery.confirm(phone, config.DELIVERY_CONFIRM_TIMEOUT_MS)
+
+    def settle(self, seconds):
+        if self.delivery is not None:
+            self.delivery.settle(seconds)
+
+
+# Same knobs as mock_server.DEFAULTS, plus the cost of the send steps and the
+# shape of the latency distribution
+SIM_DEFAULTS = {
+    "latency_ms": 150,        # opening a chat (median for "lognormal")
+    "jitter_ms": 100,         # uniform: extra 0..jitter_ms; lognormal: ignored
+    "sigma": 0.5,             # lognormal spread
+    "distribution": "uniform",  # "uniform", "lognormal" or "fixed"
+    "attach_ms": 50,
+    "send_ms": 20,
+    "invalid_rate": 0.0,      # share of chats answered with the invalid-number popup
+    "stall_rate": 0.0,        # share of chats that time out
+    "error_rate": 0.0,        # share of sends failing with an unexpected error
+    "undelivered_rate": 0.0,  # share of sent messages that never get the second tick
+    "logout_after": 0,        # log out after this many sends (0 = never)
+    "invalid_numbers": (),
+    "seed": None,
+}
+DISTRIBUTIONS = ("uniform", "lognormal", "fixed")
+
+
+class SimulatedTransport(Transport):
+    """No browser: every step sleeps for a drawn latency and fails at the configured rates.
+
+    With all latencies at 0 nothing sleeps, and a run measures only the
+    Python side (loading, templating, pacing, journaling, progress).
+    """
+
+    def __init__(self, base_url="sim://whatsapp", **settings):
+        unknown = set(settings) - set(SIM_DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown simulation settings: {sorted(unknown)}")
+        self.settings = {**SIM_DEFAULTS, **settings}
+        if self.settings["distribution"] not in DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {DISTRIBUTIONS}")
+        self.base_url = base_url
+        self.url = ""
+        self.random = random.Random(self.settings["seed"])
+        self.invalid_numbers = set(self.settings["invalid_numbers"])
+        self.counts = {"opened": 0, "invalid": 0, "stalled": 0, "logged_out": 0, "errors": 0, "sent": 0,
+                       "media": 0}
+        self.since_login = 0
+        self.phone = None
+        self.files = None
+        self.delivery = DeliveryTracker()
+
+    def _sleep(self, ms):
+        if ms > 0:
+            time.sleep(ms / 1000.0)
+
+    def _latency_ms(self):
+        s = self.settings
+        if s["distribution"] == "fixed" or not s["latency_ms"]:
+            return s["latency_ms"]
+        if s["distribution"] == "lognormal":
+            return s["latency_ms"] * math.exp(self.random.gauss(0.0, s["sigma"]))
+        return s["latency_ms"] + self.random.uniform(0, s["jitter_ms"])
+
+    def reset(self):
+        """Log back in (what a reconnect does to a real session)"""
+        self.since_login = 0
+
+    def navigate(self, url, in_app=False):
+        self.url = url
+        query = url.partition("?")[2]
+        self.phone = next((p[6:] for p in query.split("&") if p.startswith("phone=")), "")
+        self.files = None
+
+    def wait_for_chat(self, in_app=False):
+        s = self.settings
+        self.counts["opened"] += 1
+        self._sleep(self._latency_ms())
+        if s["logout_after"] and self.since_login >= s["logout_after"]:
+            self.counts["logged_out"] += 1
+            raise LoggedOutError("WhatsApp Web is asking for a QR login")
+        if self.phone in self.invalid_numbers or (s["invalid_rate"] and self.random.random() < s["invalid_rate"]):
+            self.counts["invalid"] += 1
+            raise InvalidNumberError("Phone number is not on WhatsApp")
+        if s["stall_rate"] and self.random.random() < s["stall_rate"]:
+            self.counts["stalled"] += 1
+            raise TimeoutError(f"Simulated compose box wait exceeded "
+                               f"{IN_APP_TIMEOUT_MS if in_app else OPEN_CHAT_TIMEOUT_MS} ms")
+
+    def attach(self, files):
+        self._sleep(self.settings["attach_ms"])
+        self.files = list(files)
+
+    def wait_media_preview(self):
+        if not self.files:
+            raise TimeoutError("Simulated media preview never appeared")
+
+    def fill_caption(self, text):
+        pass
+
+    def _send(self):
+        s = self.settings
+        self._sleep(s["send_ms"])
+        if s["error_rate"] and self.random.random() < s["error_rate"]:
+            self.counts["errors"] += 1
+            raise RuntimeError("Simulated send failure")
+        self.counts["sent"] += 1
+        self.since_login += 1
+        message_id = f"true_{self.phone}@c.us_SIM{self.counts['sent']}"
+        self.delivery.claim(self.phone, [message_id], message_id, DELIVERY_SENT)
+        if self.random.random() >= s["undelivered_rate"]:
+            self.delivery.report(self.phone, DELIVERY_DELIVERED, message_id)
+
+    def send_media(self):
+        self._send()
+        self.counts["media"] += 1
+
+    def send_text(self):
+        self._send()
+
+    def confirm(self, phone):
+        return self.delivery.state(phone)
+
+
+class SimulatedSession:
+    """Drop-in for WhatsAppSession in run_campaign: `page` is a SimulatedTransport"""
+
+    def __init__(self, user_data_dir="simulated", **settings):
+        self.user_data_dir = user_data_dir
+        self.page = SimulatedTransport(**settings)
+        self.base_url = self.page.base_url
+
+    def start(self, headless=None):
+        return True
+
+    def is_ready(self):
+        return True
+
+    def reconnect(self):
+        self.page.reset()
+        return True
+
+    def close(self):
+        pass
\ No newline at end of file
@@ -1,39 +1,16 @@
 # utils.py
 import re
-import random
-import pandas as pd
 import os
 from datetime import datetime
 import logging
 
-# --- Load config values ---
-# Since we removed config.py for simplicity, define paths here
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-LOGS_DIR = os.path.join(BASE_DIR, "logs")
-TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
-FAILED_DIR = os.path.join(BASE_DIR, "failed_contacts")
-
-os.makedirs(LOGS_DIR, exist_ok=True)
-os.makedirs(TEMPLATES_DIR, exist_ok=True)
-os.makedirs(FAILED_DIR, exist_ok=True)
-
-LOG_FILE = os.path.join(LOGS_DIR, f"send_log_{datetime.now().strftime('%Y-%m-%d')}.log")
-
-# --- Logging Setup ---
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
-
-def log_message(phone, name, status, error=None):
-    if status == "success":
-        logging.info(f"✅ Sent to {name} | {phone}")
-    else:
-        logging.error(f"❌ Failed {name} | {phone} | {error}")
+import config
+
+# pandas/numpy (via phones) are imported inside the functions that need them,
+# so importing utils stays cheap. Logging is configured by the entry points
+# (logsetup.setup_logging) and directories by config.init_dirs(), not on import.
+
+logger = logging.getLogger(__name__)
 
 # --- Phone Number Formatting (Bangladesh: 017... → +88017...) ---
 def format_phone_number(phone: str) -> str:
@@ -57,72 +34,190 @@ def format_phone_number(phone: str) -> str:
 
     return phone  # Will be used in URL as ?phone=88017... → WhatsApp sees +88017
 
-# --- Load Contacts from CSV or TXT ---
-def load_contacts(file_path: str):
+# --- Load Contacts from CSV, TXT or XLSX (streamed in chunks) ---
+CONTACT_EXTENSIONS = (".csv", ".txt", ".xlsx")
+CHUNK_SIZE = 20000
+PHONE_COLUMN_ALIASES = ("phone", "number", "mobile")  # exports use "number" (see data.xlsx)
+
+def _phone_column(columns):
+    for col in PHONE_COLUMN_ALIASES:
+        if col in columns:
+            return col
+    return None
+
+def _check_contact_file(file_path: str) -> str:
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Contact file not found: {file_path}")
-
-    contacts = []
     ext = os.path.splitext(file_path)[1].lower()
-
-    if ext == ".csv":
-        df = pd.read_csv(file_path)
-        required_cols = {"name", "phone"}
-        if not required_cols.issubset(df.columns):
+    if ext not in CONTACT_EXTENSIONS:
+        raise ValueError("File must be .csv, .txt or .xlsx")
+    return ext
+
+def _chunked(rows, chunk_size):
+    import pandas as pd
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield pd.DataFrame(chunk)
+            chunk = []
+    if chunk:
+        yield pd.DataFrame(chunk)
+
+def _iter_csv_chunks(file_path, chunk_size):
+    import pandas as pd
+    required_cols = {"name", "phone"}
+    reader = pd.read_csv(file_path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+    for chunk in reader:
+        phone_col = _phone_column(chunk.columns)
+        if "name" not in chunk.columns or phone_col is None:
             raise ValueError(f"CSV must have columns: {required_cols}")
-        contacts = df.to_dict(orient="records")
-
-    elif ext == ".txt":
-        with open(file_path, "r", encoding="utf-8") as f:
-            lines = [line.strip() for line in f if line.strip()]
-        for line in lines:
+        if phone_col != "phone":
+            chunk = chunk.rename(columns={phone_col: "phone"})
+        yield chunk
+
+def _iter_txt_rows(file_path):
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
             if "-" in line:
                 parts = line.split("-", 1)
                 name, phone = parts[0].strip(), parts[1].strip()
             else:
-                name, phone = "Customer", line.strip()
-            contacts.append({"name": name, "phone": phone})
-    else:
-        raise ValueError("File must be .csv or .txt")
+                name, phone = "Customer", line
+            yield {"name": name, "phone": phone}
+
+def _iter_xlsx_rows(file_path):
+    from openpyxl import load_workbook
 
-    # Format phone numbers
-    valid_contacts = []
-    for c in contacts:
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h).strip().lower() if h is not None else "" for h in next(rows, ())]
+        required_cols = {"name", "phone"}
+        phone_col = _phone_column(header)
+        if "name" not in header or phone_col is None:
+            raise ValueError(f"XLSX must have columns: {required_cols}")
+        header = ["phone" if h == phone_col else h for h in header]
+        for values in rows:
+            row = {key: ("" if value is None else value) for key, value in zip(header, values) if key}
+            if row.get("phone") == "":
+                continue
+            if isinstance(row["phone"], float) and row["phone"].is_integer():
+                row["phone"] = int(row["phone"])  # Excel stores long numbers as floats
+            yield row
+    finally:
+        wb.close()
+
+def _format_contacts(chunks, exclude=None):
+    from phones import normalize_phones
+    for chunk in chunks:
+        result = normalize_phones(chunk["phone"])
+        rejected = ~result["valid"]
+        if rejected.any():
+            reasons = result.loc[rejected, "reason"].value_counts().to_dict()
+            logger.warning("❌ Skipping %d invalid numbers: %s", int(rejected.sum()), reasons)
+        chunk = chunk.loc[result["valid"]].assign(phone=result.loc[result["valid"], "phone"])
+        if exclude:
+            known_bad = chunk["phone"].isin(exclude)
+            if known_bad.any():
+                logger.info("🚫 Skipping %d numbers known not to be on WhatsApp", int(known_bad.sum()))
+                chunk = chunk.loc[~known_bad]
+        yield from chunk.to_dict(orient="records")
+
+def iter_contacts(file_path: str, chunk_size: int = CHUNK_SIZE, skip_known_bad: bool = True):
+    """Stream contacts with normalized phones; memory stays bounded by one chunk.
+
+    Numbers are validated a chunk at a time with phones.normalize_phones, and
+    numbers in the negative cache are dropped unless skip_known_bad is False.
+    The file is checked up front so a bad path fails before sending starts.
+    """
+    ext = _check_contact_file(file_path)
+    exclude = None
+    if skip_known_bad:
+        from negative_cache import NegativeCache
+        cache = NegativeCache()
+        exclude = cache.known_bad()
+        cache.close()
+    if ext == ".csv":
+        chunks = _iter_csv_chunks(file_path, chunk_size)
+    elif ext == ".xlsx":
+        chunks = _chunked(_iter_xlsx_rows(file_path), chunk_size)
+    else:
+        chunks = _chunked(_iter_txt_rows(file_path), chunk_size)
+    return _format_contacts(chunks, exclude)
+
+def contact_columns(file_path: str) -> set:
+    """Column names a contact from this file will have (header only, phone aliases applied)"""
+    ext = _check_contact_file(file_path)
+    if ext == ".txt":
+        return {"name", "phone"}
+    if ext == ".csv":
+        import pandas as pd
+        header = [str(c) for c in pd.read_csv(file_path, nrows=0, dtype=str).columns]
+    else:
+        from openpyxl import load_workbook
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            first = next(wb.active.iter_rows(values_only=True), ())
+            header = [str(h).strip().lower() for h in first if h is not None]
+        finally:
+            wb.close()
+    phone_col = _phone_column(header)
+    return {"phone" if h == phone_col else h for h in header if h}
+
+def count_contacts(file_path: str) -> int:
+    """Fast row-count pre-pass for the progress bar (invalid numbers included)"""
+    ext = _check_contact_file(file_path)
+
+    if ext == ".xlsx":
+        from openpyxl import load_workbook
+        wb = load_workbook(file_path, read_only=True)
         try:
-            c["phone"] = format_phone_number(c["phone"])
-            valid_contacts.append(c)
-        except Exception as e:
-            print(f"❌ Skipping invalid number {c.get('phone')}: {e}")
-    return valid_contacts
-
-# --- Random Delay (5–15 seconds) ---
-def random_delay():
-    delay = random.randint(5, 15)
-    print(f"⏳ Waiting {delay} seconds before next message...")
-    return delay
+            ws = wb.active
+            rows = ws.max_row
+            if rows is None:  # no <dimension> tag, walk the sheet instead
+                rows = sum(1 for _ in ws.iter_rows(values_only=True))
+        finally:
+            wb.close()
+        return max(rows - 1, 0)
+
+    if ext == ".txt":
+        with open(file_path, "rb") as f:
+            return sum(1 for line in f if line.strip())
+
+    lines = 0
+    last = b"\n"
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)  # minus header
+
+def load_contacts(file_path: str, skip_known_bad: bool = True):
+    return list(iter_contacts(file_path, skip_known_bad=skip_known_bad))
 
 # --- Load Message Templates ---
 def load_templates():
-    """Load all .txt files from templates/ folder as templates"""
-    templates = {}
-    if not os.path.exists(TEMPLATES_DIR):
-        return templates
-    for file in os.listdir(TEMPLATES_DIR):
-        if file.endswith(".txt"):
-            key = file.replace(".txt", "")
-            try:
-                with open(os.path.join(TEMPLATES_DIR, file), "r", encoding="utf-8") as f:
-                    templates[key] = f.read().strip()
-            except Exception as e:
-                print(f"⚠️ Failed to load template {file}: {e}")
-    return templates
+    """Load all .txt files from templates/ folder as templates (cached, see template_registry)"""
+    from template_registry import get_registry
+    return get_registry().as_dict()
 
 # --- Export Failed Contacts ---
-def export_failed_contacts(failed_list, filename=None):
-    """Save failed contacts to CSV"""
+def export_failed_contacts(failed_list=None, filename=None, journal=None):
+    """Save failed contacts to CSV; with a SendJournal, read them from the journal"""
+    if journal is not None:
+        failed_list = journal.failed_contacts()
     if not filename:
-        filename = f"failed_{datetime.now().strftime('%Y-%m-%d_%H%M')}.csv"
-    path = os.path.join(FAILED_DIR, filename)
+        prefix = f"failed_{journal.campaign_id}" if journal is not None else "failed"
+        filename = f"{prefix}_{datetime.now().strftime('%Y-%m-%d_%H%M')}.csv"
+    import pandas as pd
+    config.init_dirs()
+    path = os.path.join(config.FAILED_DIR, filename)
     pd.DataFrame(failed_list).to_csv(path, index=False)
-    print(f"📝 Failed contacts saved to {path}")
+    logger.info("📝 Failed contacts saved to %s", path)
     return path
\ No newline at end of file